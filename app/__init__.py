@@ -2,7 +2,6 @@
 Flask应用工厂模式
 """
 import os
-import logging
 from flask import Flask
 from config import config
 
@@ -29,6 +28,8 @@ def create_app(config_name=None):
     register_blueprints(app)
     register_error_handlers(app)
     register_context_processors(app)
+    register_response_handlers(app)
+    register_background_services(app)
     
     # 配置日志
     configure_logging(app)
@@ -54,21 +55,10 @@ def create_directories(app):
 
 
 def configure_logging(app):
-    """配置日志"""
+    """配置日志（生产环境使用异步日志管道）"""
     if not app.debug and not app.testing:
-        # 生产环境日志配置
-        if not os.path.exists('logs'):
-            os.mkdir('logs')
-        
-        file_handler = logging.FileHandler('logs/wood.log')
-        file_handler.setFormatter(logging.Formatter(
-            '%(asctime)s %(levelname)s %(name)s %(message)s'
-        ))
-        file_handler.setLevel(logging.INFO)
-        app.logger.addHandler(file_handler)
-        
-        app.logger.setLevel(logging.INFO)
-        app.logger.info('Wood application startup')
+        from app.utils.log_pipeline import log_pipeline
+        log_pipeline.init_app(app)
 
 
 def register_blueprints(app):
@@ -77,11 +67,13 @@ def register_blueprints(app):
     from app.api.reports import reports_bp
     from app.api.tasks import tasks_bp
     from app.api.main import main_bp
+    from app.api.admin import admin_bp
     
     app.register_blueprint(main_bp)
     app.register_blueprint(auth_bp, url_prefix='/auth')
     app.register_blueprint(reports_bp, url_prefix='/api/reports')
     app.register_blueprint(tasks_bp, url_prefix='/api/tasks')
+    app.register_blueprint(admin_bp, url_prefix='/api/admin')
 
 
 def register_error_handlers(app):
@@ -90,6 +82,50 @@ def register_error_handlers(app):
     register_error_handlers(app)
 
 
+def register_background_services(app):
+    """注册后台服务"""
+    from app.utils.temp_janitor import temp_janitor
+    from app.utils.single_flight import single_flight
+    from app.utils.http_pool import http_pool
+    from app.services.token_service import token_manager
+    from app.utils.response_cache import feed_cache
+    from app.utils.metrics import metrics_registry
+    from app.utils.job_summary import job_summary_store
+    from app.utils.profiler import task_profiler
+    from app.utils.tracing import tracer
+    from app.utils.listing_store import listing_store
+    from app.utils.artifact_cache import artifact_cache
+    from app.utils.concurrency import concurrency
+    from app.services.xml_service import item_fetch_limiter
+    concurrency.init_app(app)
+    item_fetch_limiter.init_app(app)
+    temp_janitor.init_app(app)
+    single_flight.init_app(app)
+    http_pool.init_app(app)
+    token_manager.init_app(app)
+    metrics_registry.init_app(app)
+    job_summary_store.init_app(app)
+    task_profiler.init_app(app)
+    tracer.init_app(app)
+    listing_store.init_app(app)
+    artifact_cache.configure(
+        max_bytes=int(app.config.get('ARTIFACT_CACHE_MB', 128)) * 1024 * 1024,
+        enabled=app.config.get('ARTIFACT_CACHE_ENABLED', True)
+    )
+    feed_cache.configure(
+        max_entries=app.config.get('FEED_CACHE_MAX_ENTRIES', 1024),
+        enabled=app.config.get('FEED_CACHE_ENABLED', True)
+    )
+
+
+def register_response_handlers(app):
+    """注册响应压缩和静态资源缓存"""
+    from app.utils.compression import response_compressor
+    from app.utils.static_assets import static_assets
+    response_compressor.init_app(app)
+    static_assets.init_app(app)
+
+
 def register_context_processors(app):
     """注册上下文处理器"""
     @app.context_processor
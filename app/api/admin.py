@@ -0,0 +1,73 @@
+"""
+管理接口 - 按需性能分析
+"""
+import os
+import logging
+from flask import Blueprint, Response, jsonify, request, send_file, current_app
+from app.utils.decorators import admin_required, validate_task_id
+from app.utils.profiler import task_profiler, render_collapsed
+
+logger = logging.getLogger(__name__)
+
+admin_bp = Blueprint('admin', __name__)
+
+
+@admin_bp.route('/profile/<task_id>/sample', methods=['POST'])
+@admin_required
+@validate_task_id
+def sample_task(task_id):
+    """对运行中的任务采样N秒，返回折叠栈文本（flamegraph.pl / speedscope）"""
+    max_seconds = current_app.config.get('PROFILE_MAX_SECONDS', 60)
+    try:
+        seconds = float(request.args.get('seconds', 10))
+        interval = float(request.args.get('interval', current_app.config.get('PROFILE_SAMPLE_INTERVAL', 0.01)))
+    except ValueError:
+        return jsonify({'error': 'seconds / interval は数値で指定してください'}), 400
+    if not 0 < seconds <= max_seconds or interval <= 0:
+        return jsonify({'error': f'seconds は 0〜{max_seconds} の範囲で指定してください'}), 400
+    
+    # 采样只能看到本工作进程的线程
+    if not task_profiler.is_tracking(task_id):
+        return jsonify({
+            'error': 'このワーカーでは実行中のタスクが見つかりません',
+            'worker_pid': os.getpid()
+        }), 409
+    
+    logger.info(f"开始采样分析任务 {task_id}: {seconds}秒, 间隔 {interval}秒")
+    stacks, rounds = task_profiler.sample(task_id, seconds, interval)
+    response = Response(render_collapsed(stacks), mimetype='text/plain')
+    response.headers['X-Profile-Samples'] = str(rounds)
+    response.headers['X-Profile-Worker'] = str(os.getpid())
+    return response
+
+
+@admin_bp.route('/profile/<task_id>/cprofile', methods=['POST'])
+@admin_required
+@validate_task_id
+def arm_cprofile(task_id):
+    """标记任务，下一次运行时启用cProfile"""
+    if not task_profiler.arm(task_id):
+        return jsonify({'error': 'プロファイル出力先が設定されていません'}), 500
+    
+    return jsonify({
+        'status': 'armed',
+        'task_id': task_id,
+        'result_url': f'/api/admin/profile/{task_id}/cprofile'
+    }), 202
+
+
+@admin_bp.route('/profile/<task_id>/cprofile', methods=['GET'])
+@admin_required
+@validate_task_id
+def download_cprofile(task_id):
+    """下载cProfile结果（pstats格式）"""
+    path = task_profiler.result_path(task_id)
+    if not path or not os.path.exists(path):
+        return jsonify({'error': 'プロファイル結果が見つかりません'}), 404
+    
+    return send_file(
+        path,
+        as_attachment=True,
+        download_name=f'{task_id}.prof',
+        mimetype='application/octet-stream'
+    )
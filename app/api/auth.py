@@ -1,10 +1,12 @@
 """
 认证相关路由
 """
+import time
 import logging
 from flask import Blueprint, request, session, redirect, url_for, jsonify, current_app
 from app.services.ebay_service import EbayService
 from app.utils.decorators import handle_api_errors
+from app.utils.listing_store import listing_store
 
 logger = logging.getLogger(__name__)
 auth_bp = Blueprint('auth', __name__)
@@ -65,11 +67,13 @@ def callback():
         return jsonify({'error': 'アクセストークンの取得に失敗しました'}), 500
     
     # 保存token到session
+    expires_in = token_data.get('expires_in')
     session['ebay_token'] = {
         'access_token': token_data.get('access_token'),
         'refresh_token': token_data.get('refresh_token'),
         'token_type': token_data.get('token_type', 'Bearer'),
-        'expires_in': token_data.get('expires_in')
+        'expires_in': expires_in,
+        'expires_at': time.time() + int(expires_in) if expires_in else None
     }
     
     logger.info("OAuth authentication successful")
@@ -80,6 +84,9 @@ def callback():
 def logout():
     """登出"""
     session.pop('ebay_token', None)
+    listings_key = session.pop('listings_key', None)
+    if listings_key:
+        listing_store.delete(listings_key)
     logger.info("User logged out")
     return redirect(url_for('main.index'))
 
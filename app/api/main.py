@@ -1,7 +1,8 @@
 """
 主要页面路由
 """
-from flask import Blueprint, render_template, session, current_app
+from flask import Blueprint, Response, render_template, session, current_app
+from app.utils.decorators import metrics_access_required
 
 main_bp = Blueprint('main', __name__)
 
@@ -29,10 +30,24 @@ def health_check():
     """健康检查端点"""
     from datetime import datetime
     from flask import jsonify
+    from app.utils.response_cache import feed_cache
     
     return jsonify({
         'status': 'healthy',
         'timestamp': datetime.now().isoformat(),
         'service': 'wood-ebay-app',
-        'version': '2.0.0'
+        'version': '2.0.0',
+        'feed_cache': feed_cache.stats()
     }), 200
+
+
+@main_bp.route('/metrics')
+@metrics_access_required
+def metrics():
+    """Prometheus格式的指标"""
+    from flask import jsonify
+    from app.utils.metrics import metrics_registry
+    
+    if not metrics_registry.enabled:
+        return jsonify({'error': 'Not found'}), 404
+    return Response(metrics_registry.render(), mimetype='text/plain; version=0.0.4; charset=utf-8')
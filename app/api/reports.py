@@ -1,12 +1,15 @@
 """
 报告生成相关路由
 """
+import json
+import base64
 import logging
 from datetime import datetime
 from flask import Blueprint, request, session, jsonify, send_file
 from app.services.ebay_service import EbayService
 from app.services.csv_service import CSVService
 from app.utils.decorators import login_required, handle_api_errors
+from app.utils.listing_store import listing_store
 
 logger = logging.getLogger(__name__)
 reports_bp = Blueprint('reports', __name__)
@@ -29,7 +32,7 @@ def generate_report():
     if task_response is None:
         # 如果API调用失败，返回演示数据
         demo_data = _get_demo_data()
-        session['listings_data'] = demo_data
+        _save_listings(demo_data)
         
         return jsonify({
             'status': 'success',
@@ -118,19 +121,17 @@ def get_recent_reports():
     days = request.args.get('days', 7, type=int)
     
     ebay_service = EbayService()
+    
+    # 分页模式：提供cursor或page_size时只返回一页
+    cursor = request.args.get('cursor')
+    page_size = request.args.get('page_size', type=int)
+    if cursor or page_size:
+        return _get_recent_reports_page(ebay_service, access_token, days, cursor, page_size)
+    
     recent_tasks = ebay_service.get_recent_inventory_tasks(access_token, days)
     
     if recent_tasks and 'tasks' in recent_tasks:
-        tasks_list = []
-        for task in recent_tasks['tasks']:
-            task_info = {
-                'task_id': task.get('taskId'),
-                'status': task.get('status'),
-                'creation_date': task.get('creationDate'),
-                'completion_date': task.get('completionDate'),
-                'feed_type': task.get('feedType')
-            }
-            tasks_list.append(task_info)
+        tasks_list = [_task_summary(task) for task in recent_tasks['tasks']]
         
         return jsonify({
             'status': 'success',
@@ -146,16 +147,80 @@ def get_recent_reports():
         }), 200
 
 
+def _task_summary(task):
+    """转换库存任务为前端格式"""
+    return {
+        'task_id': task.get('taskId'),
+        'status': task.get('status'),
+        'creation_date': task.get('creationDate'),
+        'completion_date': task.get('completionDate'),
+        'feed_type': task.get('feedType')
+    }
+
+
+def _encode_cursor(date_range, offset):
+    payload = json.dumps({'date_range': date_range, 'offset': offset}).encode('utf-8')
+    return base64.urlsafe_b64encode(payload).decode('ascii')
+
+
+def _decode_cursor(cursor):
+    try:
+        payload = json.loads(base64.urlsafe_b64decode(cursor.encode('ascii')))
+        return payload['date_range'], int(payload['offset'])
+    except (ValueError, KeyError, TypeError) as e:
+        raise ValueError('cursorが無効です') from e
+
+
+def _get_recent_reports_page(ebay_service, access_token, days, cursor, page_size):
+    """返回一页最近的报告，cursor固定首次请求的日期范围以保证分页稳定"""
+    page_size = max(1, min(page_size or 50, 200))
+    if cursor:
+        date_range, offset = _decode_cursor(cursor)
+    else:
+        date_range, offset = ebay_service.recent_date_range(days), 0
+    
+    page = ebay_service.get_inventory_task_page(access_token, date_range, offset, page_size)
+    if page is None:
+        return jsonify({'error': 'タスク一覧を取得できません'}), 502
+    
+    tasks = page.get('tasks') or []
+    next_offset = offset + len(tasks)
+    total = page.get('total')
+    has_more = bool(tasks) and (bool(page.get('next')) or (total is not None and next_offset < int(total)))
+    
+    return jsonify({
+        'status': 'success',
+        'tasks': [_task_summary(task) for task in tasks],
+        'total_count': total if total is not None else next_offset,
+        'next_cursor': _encode_cursor(date_range, next_offset) if has_more else None
+    }), 200
+
+
+def _save_listings(listings_data):
+    """商品数据保存到服务端，会话中只保留键"""
+    old_key = session.pop('listings_key', None)
+    if old_key:
+        listing_store.delete(old_key)
+    session['listings_key'] = listing_store.put(listings_data)
+
+
+def _load_listings():
+    """读取当前会话的商品数据，不存在或已过期时返回None"""
+    key = session.get('listings_key')
+    return listing_store.get(key) if key else None
+
+
 @reports_bp.route('/export/csv')
 @login_required
 @handle_api_errors
 def export_csv():
     """导出基础CSV"""
-    if 'listings_data' not in session:
+    listings_data = _load_listings()
+    if listings_data is None:
         return jsonify({'error': 'エクスポートするデータがありません。まずレポートを生成してください'}), 400
     
     csv_service = CSVService()
-    output = csv_service.generate_basic_csv(session['listings_data'])
+    output = csv_service.generate_basic_csv(listings_data)
     
     filename = f"ebay_listings_{datetime.now().strftime('%Y%m%d_%H%M%S')}.csv"
     
@@ -172,11 +237,12 @@ def export_csv():
 @handle_api_errors
 def export_excel():
     """导出Excel文件"""
-    if 'listings_data' not in session:
+    listings_data = _load_listings()
+    if listings_data is None:
         return jsonify({'error': 'エクスポートするデータがありません。まずレポートを生成してください'}), 400
     
     csv_service = CSVService()
-    output = csv_service.generate_excel(session['listings_data'])
+    output = csv_service.generate_excel(listings_data)
     
     filename = f"ebay_listings_{datetime.now().strftime('%Y%m%d_%H%M%S')}.xlsx"
     
@@ -3,15 +3,26 @@
 """
 import os
 import logging
-import threading
 from flask import Blueprint, request, session, jsonify, send_file, Response, current_app
-from app.services.ebay_service import EbayService
+from app.services.ebay_service import EbayService, FINAL_TASK_STATUSES
 from app.services.xml_service import XMLService
 from app.services.csv_service import CSVService
-from app.utils.decorators import login_required, handle_api_errors, validate_task_id
+from app.services.checkpoint_service import CheckpointService
+from app.services.token_service import token_manager
+from app.models.ebay_models import ItemRecord, get_marketplace
+from app.utils.decorators import login_required, handle_api_errors, validate_task_id, is_valid_task_id
 from app.utils.progress_manager import progress_manager, TaskStatus
+from app.utils.temp_janitor import temp_janitor
+from app.utils.single_flight import single_flight
+from app.utils.job_summary import job_summary_store
+from app.utils.profiler import task_profiler
+from app.utils.tracing import tracer
+from app.utils.concurrency import concurrency
+from app.utils.metrics import background_jobs, pipeline_stage_seconds, sse_streams
 import json
 import time
+import random
+import hashlib
 
 logger = logging.getLogger(__name__)
 tasks_bp = Blueprint('tasks', __name__)
@@ -83,6 +94,73 @@ def download_task_result(task_id):
     return response
 
 
+@tasks_bp.route('/export', methods=['POST'])
+@login_required
+@handle_api_errors
+def start_export_job():
+    """服务端编排导出：创建库存报告，等待完成后自动生成增强CSV"""
+    token_info = session['ebay_token']
+    access_token = token_info.get('access_token')
+    
+    if not access_token:
+        return jsonify({'error': 'アクセストークンが無効です'}), 401
+    
+    data = request.get_json(silent=True) or {}
+    marketplace_ids = list(dict.fromkeys(
+        data.get('marketplaces') or [current_app.config.get('EBAY_MARKETPLACE_ID', 'EBAY_US')]
+    ))
+    max_marketplaces = current_app.config.get('EXPORT_MAX_MARKETPLACES', 4)
+    if len(marketplace_ids) > max_marketplaces:
+        return jsonify({'error': f'一度に指定できるサイトは{max_marketplaces}件までです'}), 400
+    try:
+        marketplaces = [get_marketplace(marketplace_id) for marketplace_id in marketplace_ids]
+    except ValueError:
+        return jsonify({'error': '対応していないサイトが指定されました'}), 400
+    
+    # 各站点的库存报告互不依赖，并发创建
+    config = current_app.config
+    with concurrency.executor(len(marketplaces)) as executor:
+        task_responses = list(executor.map(
+            lambda marketplace: EbayService(config, marketplace.marketplace_id).create_inventory_task(access_token),
+            marketplaces
+        ))
+    
+    jobs = []
+    failed_marketplaces = []
+    for marketplace, task_response in zip(marketplaces, task_responses):
+        task_id = task_response.get('taskId') if task_response else None
+        if not task_id:
+            logger.error(f"站点 {marketplace.marketplace_id} 的库存报告创建失败")
+            failed_marketplaces.append(marketplace.marketplace_id)
+            continue
+        
+        # 以eBay任务ID作为各站点的作业ID，每个站点独立跟踪进度
+        _launch_background_job(
+            task_id, token_info, _run_export_workflow,
+            status=TaskStatus.WAITING_REPORT, message=f'{marketplace.site_code}のレポート生成を待機中...',
+            marketplace_id=marketplace.marketplace_id
+        )
+        jobs.append({
+            'marketplace_id': marketplace.marketplace_id,
+            'job_id': task_id,
+            'progress_url': f'/api/tasks/progress-poll/{task_id}',
+            'download_url': f'/api/tasks/enhanced-csv/{task_id}'
+        })
+    
+    if not jobs:
+        return jsonify({'error': 'レポートタスクの作成に失敗しました'}), 502
+    
+    return jsonify({
+        'status': 'accepted',
+        'message': 'レポートを作成しました。完了後に自動でCSVを生成します',
+        'job_id': jobs[0]['job_id'],
+        'progress_url': jobs[0]['progress_url'],
+        'download_url': jobs[0]['download_url'],
+        'jobs': jobs,
+        'failed_marketplaces': failed_marketplaces
+    }), 202
+
+
 @tasks_bp.route('/enhanced-csv/<task_id>', methods=['GET', 'HEAD'])
 @login_required
 @handle_api_errors
@@ -91,44 +169,31 @@ def generate_enhanced_csv(task_id):
     """生成增强CSV文件"""
     if request.method == 'HEAD':
         # HEAD请求：启动处理但不等待完成
-        existing_progress = progress_manager.get_progress(task_id)
-        if existing_progress and existing_progress.status not in [TaskStatus.COMPLETED, TaskStatus.FAILED]:
-            return '', 202  # 已在处理中
-        
         token_info = session.get('ebay_token')
         if not token_info:
             return jsonify({'error': 'ログインしていません'}), 401
         
-        # 立即创建进度跟踪
-        progress_manager.start_task(task_id)
-        
-        # 获取当前应用实例和配置
-        app = current_app._get_current_object()
-        config = current_app.config.copy()
-        
-        # 启动异步处理
-        def async_process():
-            try:
-                with app.app_context():
-                    _process_enhanced_csv_async(task_id, token_info, config)
-            except Exception as e:
-                logger.error(f"异步处理错误: {e}")
-                with app.app_context():
-                    progress_manager.complete_task(task_id, success=False, message=f'エラー: {str(e)}')
+        try:
+            marketplace = get_marketplace(request.args.get('marketplace'))
+        except ValueError:
+            return jsonify({'error': '対応していないサイトが指定されました'}), 400
         
-        thread = threading.Thread(target=async_process)
-        thread.daemon = True
-        thread.start()
+        # 原子地获取任务租约，同一任务已在任意工作进程中处理时直接复用
+        _launch_background_job(
+            task_id, token_info, _process_enhanced_csv_async,
+            marketplace_id=marketplace.marketplace_id
+        )
         
-        return '', 202  # 处理已启动
+        return '', 202  # 处理已启动或已在处理中
     
-    # GET请求：检查是否已完成并返回文件
-    progress = progress_manager.get_progress(task_id)
+    # GET请求：检查是否已完成并返回文件（结果文件由所有工作进程共享）
+    progress = single_flight.get_progress(task_id)
     if progress and progress.status == TaskStatus.COMPLETED:
         csv_service = CSVService(current_app.config)
         temp_file_path = csv_service.get_temp_file_path(task_id)
         
         if temp_file_path and os.path.exists(temp_file_path):
+            temp_janitor.touch(temp_file_path)
             filename = csv_service.generate_filename(task_id, 'csv')
             return send_file(
                 temp_file_path,
@@ -145,6 +210,7 @@ def generate_enhanced_csv(task_id):
 def progress_stream(task_id):
     """Server-Sent Events进度推送"""
     def generate():
+        sse_streams.inc()
         try:
             # 发送初始连接确认
             yield f"data: {json.dumps({'status': 'connected', 'task_id': task_id})}\n\n"
@@ -154,19 +220,9 @@ def progress_stream(task_id):
             iteration = 0
             
             while iteration < max_iterations:
-                progress = progress_manager.get_progress(task_id)
+                progress = single_flight.get_progress(task_id)
                 if progress:
-                    data = {
-                        'task_id': progress.task_id,
-                        'status': progress.status.value,
-                        'current_step': progress.current_step,
-                        'total_steps': progress.total_steps,
-                        'current_item': progress.current_item,
-                        'total_items': progress.total_items,
-                        'progress_percentage': progress.progress_percentage,
-                        'message': progress.message,
-                        'elapsed_time': round(progress.elapsed_time, 1)
-                    }
+                    data = progress.to_dict()
                     
                     yield f"data: {json.dumps(data)}\n\n"
                     
@@ -179,15 +235,17 @@ def progress_stream(task_id):
                         yield f"data: {json.dumps({'error': 'Task not found'})}\n\n"
                         break
                 
-                time.sleep(1)  # 每秒推送一次
+                concurrency.sleep(1)  # 每秒推送一次
                 iteration += 1
-                
+        
         except GeneratorExit:
             # 客户端断开连接
             pass
         except Exception as e:
             logger.error(f"SSE推送错误: {e}")
             yield f"data: {json.dumps({'error': f'SSE error: {str(e)}'})}\n\n"
+        finally:
+            sse_streams.dec()
     
     response = Response(generate(), mimetype='text/event-stream')
     response.headers['Cache-Control'] = 'no-cache'
@@ -205,71 +263,290 @@ def progress_stream(task_id):
 @validate_task_id
 def progress_poll(task_id):
     """轮询方式获取任务进度状态"""
-    progress = progress_manager.get_progress(task_id)
+    progress = single_flight.get_progress(task_id)
     if progress:
         return jsonify({
             'status': 'success',
-            'data': {
-                'task_id': progress.task_id,
-                'status': progress.status.value,
-                'current_step': progress.current_step,
-                'total_steps': progress.total_steps,
-                'current_item': progress.current_item,
-                'total_items': progress.total_items,
-                'progress_percentage': progress.progress_percentage,
-                'message': progress.message,
-                'elapsed_time': round(progress.elapsed_time, 1)
-            }
+            'data': progress.to_dict()
         }), 200
     else:
         return jsonify({'error': 'Task not found'}), 404
 
 
-def _process_enhanced_csv_async(task_id, token_info, config):
+def _batch_progress(task_ids):
+    """读取多个任务的进度，返回（进度字典, 不存在的任务ID列表, ETag）"""
+    data = {}
+    missing = []
+    for task_id in task_ids:
+        progress = single_flight.get_progress(task_id)
+        if progress:
+            data[task_id] = progress.to_dict()
+        else:
+            missing.append(task_id)
+    # 经过时间和进行中阶段的耗时每次读取都会变化，不计入ETag
+    state = {
+        task_id: dict(
+            {k: v for k, v in item.items() if k not in ('elapsed_time', 'stages')},
+            stages=[(stage['stage'], stage['started_at'], stage['ended_at']) for stage in item['stages']]
+        )
+        for task_id, item in data.items()
+    }
+    etag = hashlib.sha1(json.dumps([state, missing], sort_keys=True).encode('utf-8')).hexdigest()[:20]
+    return data, missing, etag
+
+
+@tasks_bp.route('/progress-batch')
+@login_required
+def progress_batch():
+    """批量获取多个任务的进度（长轮询）
+    
+    ids为逗号分隔的任务ID。请求带If-None-Match且状态未变化时，最多挂起wait秒
+    等待变化，仍未变化则返回304。
+    """
+    if not request.args.get('ids'):
+        return jsonify({'error': 'ids パラメータが必要です'}), 400
+    task_ids = list(dict.fromkeys(request.args['ids'].split(',')))
+    # 与单任务接口相同的任务ID检查
+    if not all(is_valid_task_id(task_id) for task_id in task_ids):
+        return jsonify({'error': '有効なタスクIDが必要です'}), 400
+    max_tasks = current_app.config.get('PROGRESS_BATCH_MAX_TASKS', 50)
+    if len(task_ids) > max_tasks:
+        return jsonify({'error': f'一度に照会できるタスクは{max_tasks}件までです'}), 400
+    
+    max_wait = current_app.config.get('PROGRESS_LONGPOLL_MAX_WAIT', 25)
+    interval = current_app.config.get('PROGRESS_LONGPOLL_INTERVAL', 0.5)
+    try:
+        wait = min(max(float(request.args.get('wait', 0)), 0), max_wait)
+    except ValueError:
+        return jsonify({'error': 'wait は数値で指定してください'}), 400
+    
+    deadline = time.monotonic() + wait
+    while True:
+        data, missing, etag = _batch_progress(task_ids)
+        # 压缩后的响应使用弱ETag，按弱比较
+        if not request.if_none_match.contains_weak(etag):
+            break
+        # 所有任务都已结束时状态不会再变化，无需继续等待
+        finished = not missing and all(item['status'] in (TaskStatus.COMPLETED.value, TaskStatus.FAILED.value) for item in data.values())
+        if finished or time.monotonic() >= deadline:
+            response = Response(status=304)
+            response.set_etag(etag)
+            response.headers['Cache-Control'] = 'no-cache'
+            return response
+        concurrency.sleep(interval)
+    
+    response = jsonify({
+        'status': 'success',
+        'data': data,
+        'missing': missing
+    })
+    response.set_etag(etag)
+    response.headers['Cache-Control'] = 'no-cache'
+    return response
+
+
+@tasks_bp.route('/summary/<task_id>')
+@login_required
+@validate_task_id
+def task_summary(task_id):
+    """获取已结束任务的摘要（各阶段耗时和处理速度）"""
+    summary = job_summary_store.load(task_id)
+    if not summary:
+        return jsonify({'error': 'Summary not found'}), 404
+    
+    return jsonify({
+        'status': 'success',
+        'data': summary
+    }), 200
+
+
+@tasks_bp.route('/unfetched/<task_id>')
+@login_required
+@validate_task_id
+def unfetched_items(task_id):
+    """获取部分完成任务中未获取的ItemID列表"""
+    progress = single_flight.get_progress(task_id)
+    if not progress:
+        return jsonify({'error': 'Task not found'}), 404
+    
+    return jsonify({
+        'status': 'success',
+        'task_id': task_id,
+        'partial': progress.partial,
+        'unfetched_item_ids': progress.unfetched_item_ids
+    }), 200
+
+
+def _launch_background_job(task_id, token_info, target, status=None, message=None, **kwargs):
+    """获取任务租约并在后台线程中运行target，任务已在处理时返回False"""
+    lease = single_flight.acquire(task_id)
+    if lease is None:
+        return False
+    
+    # 立即创建进度跟踪
+    progress_manager.start_task(task_id)
+    if status is not None:
+        progress_manager.update_progress(task_id, status, message=message)
+    
+    # 获取当前应用实例和配置
+    app = current_app._get_current_object()
+    config = current_app.config.copy()
+    
+    def async_process():
+        try:
+            with app.app_context(), background_jobs.track_inprogress(kind=target.__name__.strip('_')), \
+                    task_profiler.track(task_id), task_profiler.profile_run(task_id), \
+                    tracer.span('job', task_id=task_id, kind=target.__name__.strip('_'),
+                                **{key: value for key, value in kwargs.items() if value is not None}):
+                target(task_id, token_info, config, **kwargs)
+        except Exception as e:
+            logger.error(f"异步处理错误: {e}")
+            with app.app_context():
+                progress_manager.complete_task(task_id, success=False, message=f'エラー: {str(e)}')
+        finally:
+            lease.release()
+    
+    try:
+        concurrency.spawn(async_process)
+    except Exception:
+        lease.release()
+        raise
+    return True
+
+
+def _poll_delays(initial_delay, max_delay):
+    """指数退避的查询间隔，带抖动避免多个作业同时请求"""
+    delay = initial_delay
+    while True:
+        yield delay * random.uniform(0.5, 1.0)
+        delay = min(delay * 2, max_delay)
+
+
+def _wait_for_report(task_id, access_token, config, marketplace_id=None):
+    """按指数退避查询库存报告状态，返回最终状态；超时返回None"""
+    ebay_service = EbayService(config, marketplace_id)
+    deadline = time.time() + config.get('REPORT_POLL_TIMEOUT', 1800)
+    delays = _poll_delays(config.get('REPORT_POLL_INITIAL_DELAY', 5), config.get('REPORT_POLL_MAX_DELAY', 60))
+    
+    while time.time() < deadline:
+        concurrency.sleep(min(next(delays), max(deadline - time.time(), 0)))
+        task_info = ebay_service.get_inventory_task_status(access_token.current(), task_id)
+        status = task_info.get('status') if task_info else None
+        logger.info(f"库存报告状态，任务ID: {task_id}, 状态: {status}")
+        if status in FINAL_TASK_STATUSES:
+            return status
+    return None
+
+
+def _run_export_workflow(task_id, token_info, config, marketplace_id=None):
+    """等待eBay生成库存报告，完成后直接下载并生成增强CSV"""
+    if not token_info.get('access_token'):
+        progress_manager.complete_task(task_id, success=False, message='アクセストークンが無効です')
+        return
+    
+    access_token = token_manager.for_session_token(token_info, config)
+    status = _wait_for_report(task_id, access_token, config, marketplace_id)
+    
+    if status is None:
+        progress_manager.complete_task(task_id, success=False, message='レポート生成がタイムアウトしました')
+        return
+    if status not in ('COMPLETED', 'COMPLETED_WITH_ERROR'):
+        progress_manager.complete_task(task_id, success=False, message=f'レポート生成に失敗しました（ステータス: {status}）')
+        return
+    
+    _process_enhanced_csv_async(task_id, token_info, config, marketplace_id)
+
+
+def _process_enhanced_csv_async(task_id, token_info, config, marketplace_id=None):
     """异步CSV生成处理逻辑"""
     # 注意：此函数必须在Flask应用上下文中调用
-    access_token = token_info.get('access_token')
-    
-    if not access_token:
+    if not token_info.get('access_token'):
         progress_manager.complete_task(task_id, success=False, message='アクセストークンが無効です')
         return
     
-    logger.info(f"开始生成增强CSV报告，任务ID: {task_id}")
+    marketplace = get_marketplace(marketplace_id or config.get('EBAY_MARKETPLACE_ID'))
+    logger.info(f"开始生成增强CSV报告，任务ID: {task_id}, 站点: {marketplace.marketplace_id}")
+    checkpoint_service = CheckpointService(config)
+    # 所有抓取线程共享的令牌，临近过期时主动刷新
+    access_token = token_manager.for_session_token(token_info, config)
     
     try:
-        # 1. 下载ZIP文件
+        # 1. 下载ZIP文件（已有检查点时跳过）
         progress_manager.update_progress(task_id, TaskStatus.DOWNLOADING, current_step=1, message='ZIPファイルをダウンロード中...')
         
-        ebay_service = EbayService(config)
-        zip_content = ebay_service.download_task_result(access_token, task_id)
-        
-        if not zip_content:
-            progress_manager.complete_task(task_id, success=False, message='レポートのダウンロードに失敗しました')
-            return
+        xml_service = XMLService(config, marketplace.marketplace_id)
+        item_ids = checkpoint_service.load_item_ids(task_id)
         
-        # 2. 提取ItemID列表
-        progress_manager.update_progress(task_id, TaskStatus.EXTRACTING, current_step=2, message='ItemIDを抽出中...')
-        
-        xml_service = XMLService(config)
-        item_ids = xml_service.extract_item_ids_from_zip(zip_content)
+        if item_ids is None:
+            zip_content = checkpoint_service.load_report(task_id)
+            if zip_content:
+                logger.info(f"从检查点恢复报告，任务ID: {task_id}")
+            else:
+                ebay_service = EbayService(config, marketplace.marketplace_id)
+                with pipeline_stage_seconds.time(stage='download'), tracer.span('report.download') as span:
+                    zip_content = ebay_service.download_task_result(access_token.current(), task_id)
+                    span.set_attribute('bytes', len(zip_content or b''))
+                
+                if not zip_content:
+                    progress_manager.complete_task(task_id, success=False, message='レポートのダウンロードに失敗しました')
+                    return
+                checkpoint_service.save_report(task_id, zip_content)
+            
+            # 2. 提取ItemID列表
+            progress_manager.update_progress(task_id, TaskStatus.EXTRACTING, current_step=2, message='ItemIDを抽出中...')
+            
+            with pipeline_stage_seconds.time(stage='extract'), tracer.span('report.extract', bytes=len(zip_content)) as span:
+                item_ids = xml_service.extract_item_ids_from_zip(zip_content)
+                span.set_attribute('item_count', len(item_ids))
+            
+            if not item_ids:
+                progress_manager.complete_task(task_id, success=False, message='レポートにアクティブな商品データが見つかりません。商品が存在するか、報告条件を満たしているかご確認ください。')
+                return
+            checkpoint_service.save_item_ids(task_id, item_ids)
         
-        if not item_ids:
-            progress_manager.complete_task(task_id, success=False, message='レポートにアクティブな商品データが見つかりません。商品が存在するか、報告条件を満たしているかご確認ください。')
-            return
+        # 3. 批量获取商品详情，跳过检查点中已获取的商品
+        fetched_records = checkpoint_service.load_records(
+            task_id,
+            record_factory=lambda data: ItemRecord.from_dict(data, xml_service.specific_names)
+        )
+        remaining_ids = [item_id for item_id in item_ids if item_id not in fetched_records]
+        resumed_count = len(item_ids) - len(remaining_ids)
         
-        logger.info(f"提取到 {len(item_ids)} 个ItemID")
-        progress_manager.update_progress(task_id, TaskStatus.PROCESSING, current_step=3, total_items=len(item_ids), message=f'{len(item_ids)}個のアイテム詳細を取得中...')
+        logger.info(f"提取到 {len(item_ids)} 个ItemID，检查点中已获取 {resumed_count} 个")
+        progress_manager.update_progress(
+            task_id,
+            TaskStatus.PROCESSING,
+            current_step=3,
+            current_item=resumed_count,
+            total_items=len(item_ids),
+            message_template='アイテム詳細取得中... ({current_item}/{total_items})'
+        )
         
-        # 3. 批量获取商品详情
-        def progress_callback(completed, total):
-            progress_manager.update_progress(
-                task_id, 
-                TaskStatus.PROCESSING, 
-                current_item=completed,
-                message=f'アイテム詳細取得中... ({completed}/{total})'
-            )
+        # 进度按时间/数量阈值合并上报，消息在读取时格式化
+        progress_callback = progress_manager.create_reporter(
+            task_id,
+            min_interval=config.get('PROGRESS_UPDATE_INTERVAL', 0.5),
+            min_items=config.get('PROGRESS_UPDATE_MIN_ITEMS', 50),
+            offset=resumed_count
+        )
         
-        enhanced_data = xml_service.get_item_details_batch(item_ids, access_token, task_id, progress_callback)
+        enhanced_data = [
+            fetched_records[item_id] for item_id in item_ids
+            if item_id in fetched_records and xml_service.is_supported_item(fetched_records[item_id])
+        ]
+        unfetched_ids = []
+        if remaining_ids:
+            with checkpoint_service.open_writer(task_id) as checkpoint_writer, pipeline_stage_seconds.time(stage='fetch'), \
+                    tracer.span('items.fetch', item_count=len(remaining_ids), resumed=resumed_count) as span:
+                fetch_result = xml_service.fetch_item_details(
+                    remaining_ids, access_token, task_id, progress_callback,
+                    item_callback=checkpoint_writer
+                )
+                span.set_attribute('fetched', len(fetch_result.items))
+                span.set_attribute('failed', len(fetch_result.failed_item_ids))
+                span.set_attribute('unfetched', len(fetch_result.unfetched_item_ids))
+            enhanced_data.extend(fetch_result.items)
+            unfetched_ids = fetch_result.unfetched_item_ids
         
         if not enhanced_data:
             progress_manager.complete_task(task_id, success=False, message='商品の詳細情報を取得できませんでした')
@@ -279,15 +556,30 @@ def _process_enhanced_csv_async(task_id, token_info, config):
         progress_manager.update_progress(task_id, TaskStatus.GENERATING, current_step=4, message='CSVファイルを生成中...')
         
         csv_service = CSVService(config)
-        temp_file_path = csv_service.generate_enhanced_csv(enhanced_data, task_id)
+        with pipeline_stage_seconds.time(stage='generate'), tracer.span('csv.write', rows=len(enhanced_data)) as span:
+            temp_file_path = csv_service.generate_enhanced_csv(enhanced_data, task_id, marketplace.marketplace_id)
+            if temp_file_path:
+                span.set_attribute('bytes', os.path.getsize(temp_file_path))
         
         if not temp_file_path:
             progress_manager.complete_task(task_id, success=False, message='CSVファイルの生成に失敗しました')
             return
         
-        logger.info(f"增强CSV生成完成，成功处理 {len(enhanced_data)} 条记录")
-        progress_manager.complete_task(task_id, success=True, message=f'CSV生成完了 - {len(enhanced_data)}件のUSアイテムが処理されました')
+        if unfetched_ids:
+            # 保留检查点，再次请求同一任务时只获取剩余商品
+            logger.warning(f"时间预算用尽，部分CSV生成完成，成功处理 {len(enhanced_data)} 条记录，未获取 {len(unfetched_ids)} 个ItemID")
+            progress_manager.complete_task(
+                task_id,
+                success=True,
+                message=f'時間制限により一部のみ処理されました - {len(enhanced_data)}件の{marketplace.site_code}アイテム（未取得: {len(unfetched_ids)}件）。再実行すると残りのアイテムを取得します',
+                unfetched_item_ids=unfetched_ids
+            )
+            return
         
+        checkpoint_service.clear(task_id)
+        logger.info(f"增强CSV生成完成，成功处理 {len(enhanced_data)} 条记录")
+        progress_manager.complete_task(task_id, success=True, message=f'CSV生成完了 - {len(enhanced_data)}件の{marketplace.site_code}アイテムが処理されました')
+    
     except Exception as e:
         logger.error(f"增强CSV生成过程中出错: {e}")
         progress_manager.complete_task(task_id, success=False, message=f'処理中にエラーが発生しました: {str(e)}')
@@ -1,8 +1,10 @@
 """
 eBay相关数据模型
 """
+import sys
+import threading
 from dataclasses import dataclass
-from typing import Dict, List, Optional
+from typing import Dict, Iterator, List, Optional, Tuple
 from datetime import datetime
 
 
@@ -16,6 +18,40 @@ class EbayToken:
     debug_mode: bool = False
 
 
+@dataclass(frozen=True)
+class Marketplace:
+    """eBay站点模型"""
+    marketplace_id: str  # REST API的X-EBAY-C-MARKETPLACE-ID
+    site_id: int  # Trading API的X-EBAY-API-SITEID
+    currency: str  # 该站点输出的商品货币
+    site_code: str  # File Exchange模板名后缀
+    listing_site: str  # File Exchange的Listing site列
+
+
+MARKETPLACES = {
+    marketplace.marketplace_id: marketplace for marketplace in (
+        Marketplace('EBAY_US', 0, 'USD', 'US', 'US'),
+        Marketplace('EBAY_GB', 3, 'GBP', 'UK', 'UK'),
+        Marketplace('EBAY_DE', 77, 'EUR', 'DE', 'Germany'),
+        Marketplace('EBAY_AU', 15, 'AUD', 'AU', 'Australia'),
+        Marketplace('EBAY_CA', 2, 'CAD', 'CA', 'Canada'),
+        Marketplace('EBAY_FR', 71, 'EUR', 'FR', 'France'),
+        Marketplace('EBAY_IT', 101, 'EUR', 'IT', 'Italy'),
+        Marketplace('EBAY_ES', 186, 'EUR', 'ES', 'Spain'),
+    )
+}
+
+DEFAULT_MARKETPLACE_ID = 'EBAY_US'
+
+
+def get_marketplace(marketplace_id: Optional[str] = None) -> Marketplace:
+    """按ID获取站点，未指定时返回美国站"""
+    marketplace = MARKETPLACES.get(marketplace_id or DEFAULT_MARKETPLACE_ID)
+    if marketplace is None:
+        raise ValueError(f'未知的站点: {marketplace_id}')
+    return marketplace
+
+
 @dataclass
 class InventoryTask:
     """库存任务模型"""
@@ -56,6 +92,147 @@ class ItemDetails:
         }
 
 
+class SpecificNameTable:
+    """Item Specifics名称字典编码表
+    
+    同一任务内的商品共享名称表，每条记录只保存名称的整数编号，
+    避免数万条记录重复持有相同的名称字符串。
+    """
+    
+    def __init__(self):
+        self._names: List[str] = []
+        self._index: Dict[str, int] = {}
+        self._lock = threading.Lock()
+    
+    def encode(self, name: str) -> int:
+        index = self._index.get(name)
+        if index is None:
+            with self._lock:
+                index = self._index.get(name)
+                if index is None:
+                    index = len(self._names)
+                    self._names.append(sys.intern(name))
+                    self._index[self._names[index]] = index
+        return index
+    
+    def decode(self, index: int) -> str:
+        return self._names[index]
+    
+    @property
+    def names(self) -> List[str]:
+        """按首次出现顺序排列的名称"""
+        return list(self._names)
+    
+    def __len__(self) -> int:
+        return len(self._names)
+
+
+class ItemRecord:
+    """紧凑的商品详情记录（__slots__，Item Specifics按名称表编码）
+    
+    同时支持 get()/[] 按GetItem字段名访问，兼容原有的字典格式数据。
+    """
+    
+    __slots__ = (
+        'item_id', 'title', 'sku', 'current_price', 'currency', 'quantity',
+        'category_id', 'category_name', 'names', 'specific_keys', 'specific_values'
+    )
+    
+    FIELD_MAP = {
+        'ItemID': 'item_id',
+        'Title': 'title',
+        'SKU': 'sku',
+        'CurrentPrice': 'current_price',
+        'Currency': 'currency',
+        'Quantity': 'quantity',
+        'CategoryID': 'category_id',
+        'CategoryName': 'category_name'
+    }
+    
+    # 值较短的Item Specifics（如Brand、Color）在商品间大量重复，做驻留处理
+    INTERN_VALUE_MAX_LENGTH = 32
+    
+    def __init__(self, item_id: str = '', title: str = '', sku: str = '',
+                 current_price: str = '', currency: str = '', quantity: str = '',
+                 category_id: str = '', category_name: str = '',
+                 item_specifics: Optional[Dict[str, str]] = None,
+                 names: Optional[SpecificNameTable] = None):
+        self.item_id = item_id
+        self.title = title
+        self.sku = sku
+        self.current_price = current_price
+        self.currency = sys.intern(currency) if currency else ''
+        self.quantity = quantity
+        self.category_id = sys.intern(category_id) if category_id else ''
+        self.category_name = sys.intern(category_name) if category_name else ''
+        self.names = names if names is not None else SpecificNameTable()
+        self.specific_keys: Tuple[int, ...] = ()
+        self.specific_values: Tuple[str, ...] = ()
+        if item_specifics:
+            self.set_specifics(item_specifics.items())
+    
+    def set_specifics(self, pairs) -> None:
+        """设置Item Specifics（名称编码，短值驻留）"""
+        keys = []
+        values = []
+        for name, value in pairs:
+            keys.append(self.names.encode(name))
+            if value and len(value) <= self.INTERN_VALUE_MAX_LENGTH:
+                value = sys.intern(value)
+            values.append(value)
+        self.specific_keys = tuple(keys)
+        self.specific_values = tuple(values)
+    
+    def iter_specifics(self) -> Iterator[Tuple[str, str]]:
+        """遍历Item Specifics（名称, 值）"""
+        decode = self.names.decode
+        for key, value in zip(self.specific_keys, self.specific_values):
+            yield decode(key), value
+    
+    @property
+    def item_specifics(self) -> Dict[str, str]:
+        return dict(self.iter_specifics())
+    
+    def get(self, key: str, default=None):
+        """按GetItem字段名读取（兼容字典格式）"""
+        if key == 'ItemSpecifics':
+            return self.item_specifics
+        attr = self.FIELD_MAP.get(key)
+        if attr is None:
+            return default
+        return getattr(self, attr)
+    
+    def __getitem__(self, key: str):
+        if key != 'ItemSpecifics' and key not in self.FIELD_MAP:
+            raise KeyError(key)
+        return self.get(key)
+    
+    def to_dict(self) -> Dict:
+        """转换为字典格式"""
+        data = {key: getattr(self, attr) for key, attr in self.FIELD_MAP.items()}
+        data['ItemSpecifics'] = self.item_specifics
+        return data
+    
+    @classmethod
+    def from_dict(cls, data: Dict, names: Optional[SpecificNameTable] = None) -> 'ItemRecord':
+        """从字典格式创建记录"""
+        return cls(
+            item_id=data.get('ItemID', ''),
+            title=data.get('Title', ''),
+            sku=data.get('SKU', ''),
+            current_price=data.get('CurrentPrice', ''),
+            currency=data.get('Currency', ''),
+            quantity=data.get('Quantity', ''),
+            category_id=data.get('CategoryID', ''),
+            category_name=data.get('CategoryName', ''),
+            item_specifics=data.get('ItemSpecifics'),
+            names=names
+        )
+    
+    def __repr__(self) -> str:
+        return f'ItemRecord(item_id={self.item_id!r}, title={self.title!r})'
+
+
 @dataclass
 class EbayTemplateRow:
     """eBay模板行数据模型"""
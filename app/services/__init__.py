@@ -4,5 +4,8 @@
 from .ebay_service import EbayService
 from .xml_service import XMLService
 from .csv_service import CSVService
+from .checkpoint_service import CheckpointService
+from .token_service import TokenManager, AccessToken, token_manager
 
-__all__ = ['EbayService', 'XMLService', 'CSVService']
+__all__ = ['EbayService', 'XMLService', 'CSVService', 'CheckpointService',
+           'TokenManager', 'AccessToken', 'token_manager']
@@ -0,0 +1,146 @@
+"""
+任务检查点服务层 - 长时间运行的增强CSV任务的断点续传
+"""
+import os
+import json
+import tempfile
+import logging
+from typing import Callable, Dict, List, Optional
+from flask import current_app
+
+logger = logging.getLogger(__name__)
+
+
+class CheckpointWriter:
+    """增量写入已获取的商品记录（JSON Lines）"""
+    
+    def __init__(self, file_path: str, flush_every: int = 50):
+        self.file_path = file_path
+        self.flush_every = max(1, flush_every)
+        self._file = open(file_path, 'a', encoding='utf-8')
+        self._pending = 0
+        self.written = 0
+    
+    def __call__(self, item_id: str, record: Dict) -> None:
+        if hasattr(record, 'to_dict'):
+            record = record.to_dict()
+        self._file.write(json.dumps({'item_id': item_id, 'record': record}, ensure_ascii=False))
+        self._file.write('\n')
+        self._pending += 1
+        self.written += 1
+        if self._pending >= self.flush_every:
+            self.flush()
+    
+    def flush(self) -> None:
+        self._file.flush()
+        os.fsync(self._file.fileno())
+        self._pending = 0
+    
+    def close(self) -> None:
+        if not self._file.closed:
+            self.flush()
+            self._file.close()
+    
+    def __enter__(self):
+        return self
+    
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self.close()
+
+
+class CheckpointService:
+    """检查点服务类
+    
+    每个任务在TEMP_FOLDER中保存三类检查点：
+      - enhanced_csv_<task_id>.report.zip   下载的报告
+      - enhanced_csv_<task_id>.items.json   提取的ItemID列表
+      - enhanced_csv_<task_id>.records.jsonl 已获取的商品记录（逐条追加）
+    """
+    
+    def __init__(self, config=None):
+        if config:
+            self.temp_folder = config.get('TEMP_FOLDER', tempfile.gettempdir())
+            self.flush_every = config.get('CHECKPOINT_FLUSH_ITEMS', 50)
+        else:
+            self.temp_folder = current_app.config.get('TEMP_FOLDER', tempfile.gettempdir())
+            self.flush_every = current_app.config.get('CHECKPOINT_FLUSH_ITEMS', 50)
+    
+    def _path(self, task_id: str, suffix: str) -> str:
+        return os.path.join(self.temp_folder, f'enhanced_csv_{task_id}{suffix}')
+    
+    def _write_atomic(self, path: str, data: bytes) -> None:
+        os.makedirs(self.temp_folder, exist_ok=True)
+        tmp_path = f'{path}.tmp'
+        with open(tmp_path, 'wb') as f:
+            f.write(data)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp_path, path)
+    
+    def save_report(self, task_id: str, zip_content: bytes) -> None:
+        """保存下载的报告"""
+        try:
+            self._write_atomic(self._path(task_id, '.report.zip'), zip_content)
+        except OSError as e:
+            logger.warning(f"保存报告检查点失败: {e}")
+    
+    def load_report(self, task_id: str) -> Optional[bytes]:
+        """读取报告检查点"""
+        path = self._path(task_id, '.report.zip')
+        if not os.path.exists(path):
+            return None
+        with open(path, 'rb') as f:
+            return f.read()
+    
+    def save_item_ids(self, task_id: str, item_ids: List[str]) -> None:
+        """保存ItemID列表"""
+        try:
+            self._write_atomic(self._path(task_id, '.items.json'), json.dumps(item_ids).encode('utf-8'))
+        except OSError as e:
+            logger.warning(f"保存ItemID检查点失败: {e}")
+    
+    def load_item_ids(self, task_id: str) -> Optional[List[str]]:
+        """读取ItemID列表检查点"""
+        path = self._path(task_id, '.items.json')
+        if not os.path.exists(path):
+            return None
+        try:
+            with open(path, 'r', encoding='utf-8') as f:
+                return json.load(f)
+        except (OSError, ValueError) as e:
+            logger.warning(f"读取ItemID检查点失败: {e}")
+            return None
+    
+    def load_records(self, task_id: str, record_factory: Callable = None) -> Dict[str, Dict]:
+        """读取已获取的商品记录（忽略中断时写了一半的行）
+        
+        record_factory 用于把每条字典记录转换为紧凑记录类型（如ItemRecord.from_dict）。
+        """
+        path = self._path(task_id, '.records.jsonl')
+        records = {}
+        if not os.path.exists(path):
+            return records
+        with open(path, 'r', encoding='utf-8') as f:
+            for line in f:
+                try:
+                    entry = json.loads(line)
+                    record = entry['record']
+                    records[entry['item_id']] = record_factory(record) if record_factory else record
+                except (ValueError, KeyError):
+                    continue
+        return records
+    
+    def open_writer(self, task_id: str) -> CheckpointWriter:
+        """打开记录写入器"""
+        os.makedirs(self.temp_folder, exist_ok=True)
+        return CheckpointWriter(self._path(task_id, '.records.jsonl'), self.flush_every)
+    
+    def clear(self, task_id: str) -> None:
+        """任务完成后删除检查点"""
+        for suffix in ('.report.zip', '.items.json', '.records.jsonl'):
+            path = self._path(task_id, suffix)
+            try:
+                if os.path.exists(path):
+                    os.remove(path)
+            except OSError as e:
+                logger.warning(f"删除检查点失败: {e}")
@@ -2,6 +2,7 @@
 CSV生成服务层
 """
 import os
+import csv
 import pandas as pd
 import tempfile
 import logging
@@ -9,9 +10,29 @@ from io import BytesIO
 from datetime import datetime
 from typing import List, Dict, Optional
 from flask import current_app
+from app.models.ebay_models import get_marketplace
+from app.utils.artifact_cache import artifact_cache, fingerprint
 
 logger = logging.getLogger(__name__)
 
+INFO_HEADER_TEMPLATE = "#INFO,Version=1.0.0,Template= eBay-active-revise-price-quantity-download_{site_code}\n"
+INFO_HEADER = INFO_HEADER_TEMPLATE.format(site_code='US')
+
+TEMPLATE_BASE_COLUMNS = [
+    'Action',
+    'Category name',
+    'Item number',
+    'Title',
+    'Listing site',
+    'Currency',
+    'Start price',
+    'Buy It Now price',
+    'Available quantity',
+    'Relationship',
+    'Relationship details',
+    'Custom label (SKU)'
+]
+
 
 class CSVService:
     """CSV生成服务类"""
@@ -22,26 +43,23 @@ class CSVService:
         else:
             self.temp_folder = current_app.config.get('TEMP_FOLDER', tempfile.gettempdir())
     
-    def generate_enhanced_csv(self, item_data_list: List[Dict], task_id: str) -> Optional[str]:
-        """生成增强CSV文件"""
+    def generate_enhanced_csv(self, item_data_list: List[Dict], task_id: str,
+                              marketplace_id: str = None) -> Optional[str]:
+        """生成增强CSV文件（按站点填写模板名和Listing site列）"""
         try:
             if not item_data_list:
                 logger.error("没有数据可生成CSV")
                 return None
             
-            # 转换数据为eBay File Exchange格式
-            ebay_template_data = self._convert_to_ebay_template(item_data_list)
-            
-            # 生成CSV内容
-            csv_content = self._create_csv_content(ebay_template_data)
-            
             # 确保临时目录存在
             os.makedirs(self.temp_folder, exist_ok=True)
             
-            # 保存到临时文件
+            # 逐行写入eBay File Exchange格式，不为每行构建中间字典
             temp_file_path = os.path.join(self.temp_folder, f'enhanced_csv_{task_id}.csv')
-            with open(temp_file_path, 'wb') as f:
-                f.write(csv_content)
+            partial_path = f'{temp_file_path}.tmp'
+            with open(partial_path, 'w', encoding='utf-8', newline='') as f:
+                self._write_ebay_template_csv(item_data_list, f, get_marketplace(marketplace_id))
+            os.replace(partial_path, temp_file_path)
             
             logger.info(f"增强CSV生成完成: {temp_file_path}, 包含 {len(item_data_list)} 条记录")
             return temp_file_path
@@ -51,11 +69,17 @@ class CSVService:
             return None
     
     def generate_basic_csv(self, listings_data: List[Dict]) -> BytesIO:
-        """生成基础CSV文件"""
+        """生成基础CSV文件（相同数据直接返回缓存）"""
         try:
+            cache_key = fingerprint('csv', listings_data, encoding='utf-8-sig')
+            cached = artifact_cache.get(cache_key)
+            if cached is not None:
+                return BytesIO(cached)
+            
             df = pd.DataFrame(listings_data)
             output = BytesIO()
             df.to_csv(output, index=False, encoding='utf-8-sig')
+            artifact_cache.put(cache_key, output.getvalue())
             output.seek(0)
             return output
         except Exception as e:
@@ -63,8 +87,13 @@ class CSVService:
             raise
     
     def generate_excel(self, listings_data: List[Dict]) -> BytesIO:
-        """生成Excel文件"""
+        """生成Excel文件（相同数据直接返回缓存）"""
         try:
+            cache_key = fingerprint('xlsx', listings_data, sheet='eBay Listings')
+            cached = artifact_cache.get(cache_key)
+            if cached is not None:
+                return BytesIO(cached)
+            
             df = pd.DataFrame(listings_data)
             output = BytesIO()
             
@@ -85,6 +114,7 @@ class CSVService:
                     adjusted_width = min(max_length + 2, 50)
                     worksheet.column_dimensions[column_letter].width = adjusted_width
             
+            artifact_cache.put(cache_key, output.getvalue())
             output.seek(0)
             return output
             
@@ -92,30 +122,41 @@ class CSVService:
             logger.error(f"生成Excel时出错: {e}")
             raise
     
+    @staticmethod
+    def _iter_item_specifics(item):
+        """遍历商品的Item Specifics（兼容ItemRecord和字典格式）"""
+        if hasattr(item, 'iter_specifics'):
+            return item.iter_specifics()
+        return (item.get('ItemSpecifics') or {}).items()
+    
+    @staticmethod
+    def _template_base_values(item, listing_site: str = 'US') -> List:
+        """eBay模板基本列的值，顺序与TEMPLATE_BASE_COLUMNS一致"""
+        return [
+            'Revise',
+            item.get('CategoryName', ''),
+            item.get('ItemID', ''),
+            item.get('Title', ''),
+            listing_site,
+            item.get('Currency', 'USD'),
+            item.get('CurrentPrice', ''),
+            '',
+            item.get('Quantity', ''),
+            '',
+            '',
+            item.get('SKU', '')
+        ]
+    
     def _convert_to_ebay_template(self, item_data_list: List[Dict]) -> List[Dict]:
         """转换数据为eBay模板格式"""
         ebay_template_data = []
         
         for item in item_data_list:
             # 基本eBay模板行数据
-            row = {
-                'Action': 'Revise',
-                'Category name': item.get('CategoryName', ''),
-                'Item number': item.get('ItemID', ''),
-                'Title': item.get('Title', ''),
-                'Listing site': 'US',
-                'Currency': item.get('Currency', 'USD'),
-                'Start price': item.get('CurrentPrice', ''),
-                'Buy It Now price': '',
-                'Available quantity': item.get('Quantity', ''),
-                'Relationship': '',
-                'Relationship details': '',
-                'Custom label (SKU)': item.get('SKU', '')
-            }
+            row = dict(zip(TEMPLATE_BASE_COLUMNS, self._template_base_values(item)))
             
             # 添加Item Specifics为C:格式列
-            item_specifics = item.get('ItemSpecifics', {})
-            for spec_name, spec_value in item_specifics.items():
+            for spec_name, spec_value in self._iter_item_specifics(item):
                 column_name = f"C:{spec_name}"
                 row[column_name] = spec_value
             
@@ -123,13 +164,35 @@ class CSVService:
         
         return ebay_template_data
     
+    def _write_ebay_template_csv(self, item_data_list: List[Dict], output, marketplace=None) -> None:
+        """直接写出eBay模板CSV（INFO头部 + 表头 + 数据行）
+        
+        列顺序与按行构建DataFrame时相同：基本列在前，C:列按首次出现顺序排列。
+        """
+        spec_columns = {}
+        for item in item_data_list:
+            for spec_name, _ in self._iter_item_specifics(item):
+                if spec_name not in spec_columns:
+                    spec_columns[spec_name] = len(spec_columns)
+        
+        marketplace = marketplace or get_marketplace()
+        output.write('\ufeff' + INFO_HEADER_TEMPLATE.format(site_code=marketplace.site_code))
+        writer = csv.writer(output, lineterminator='\n')
+        writer.writerow(TEMPLATE_BASE_COLUMNS + [f'C:{name}' for name in spec_columns])
+        
+        spec_count = len(spec_columns)
+        for item in item_data_list:
+            spec_values = [''] * spec_count
+            for spec_name, spec_value in self._iter_item_specifics(item):
+                spec_values[spec_columns[spec_name]] = spec_value if spec_value is not None else ''
+            writer.writerow(self._template_base_values(item, marketplace.listing_site) + spec_values)
+    
     def _create_csv_content(self, data: List[Dict]) -> bytes:
         """创建CSV内容"""
         output = BytesIO()
         
         # 写入INFO头部
-        info_header = "#INFO,Version=1.0.0,Template= eBay-active-revise-price-quantity-download_US\n"
-        output.write(info_header.encode('utf-8-sig'))
+        output.write(INFO_HEADER.encode('utf-8-sig'))
         
         # 写入数据
         df = pd.DataFrame(data)
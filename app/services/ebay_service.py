@@ -4,25 +4,66 @@ eBay API服务层
 import os
 import requests
 import base64
+import hashlib
+import time
 import logging
 from datetime import datetime
-from typing import Dict, Optional, List
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, Iterator, Optional, List
 from flask import current_app
-from app.utils.ssl_utils import create_ssl_session
+from app.utils.http_pool import http_pool
+from app.utils.response_cache import feed_cache
+from app.utils.metrics import record_ebay_call
+from app.models.ebay_models import get_marketplace
+from app.utils.log_pipeline import item_logger
 
 logger = logging.getLogger(__name__)
+item_log = item_logger(__name__)
+
+# 不会再变化的Feed任务状态
+FINAL_TASK_STATUSES = ('COMPLETED', 'COMPLETED_WITH_ERROR', 'FAILED', 'PARTIALLY_PROCESSED')
+
+# Trading API调用次数超限的错误码
+TRADING_THROTTLE_ERROR_CODES = ('518',)
+
+
+def trading_call_outcome(xml_response: Optional[str]) -> str:
+    """Trading API响应的结果分类: success / failure / throttled"""
+    if not xml_response:
+        return 'failure'
+    if '<Ack>Failure</Ack>' not in xml_response:
+        return 'success'
+    if any(f'<ErrorCode>{code}</ErrorCode>' in xml_response for code in TRADING_THROTTLE_ERROR_CODES):
+        return 'throttled'
+    return 'failure'
 
 
 class EbayService:
     """eBay API服务类"""
     
-    def __init__(self, config=None):
-        self.ssl_session = create_ssl_session()
+    def __init__(self, config=None, marketplace_id: str = None):
+        # 复用进程级共享连接池，避免每个请求都重新建立TCP+TLS连接
+        self.ssl_session = http_pool.get_session()
         if config:
             self.config = config
         else:
             from flask import current_app
             self.config = current_app.config
+        self.marketplace = get_marketplace(marketplace_id or self.config.get('EBAY_MARKETPLACE_ID'))
+    
+    def _send(self, method: str, url: str, api: str, call: str, **kwargs) -> requests.Response:
+        """发送请求并记录调用耗时和结果"""
+        start = time.perf_counter()
+        outcome = 'failure'
+        try:
+            response = self.ssl_session.request(method, url, **kwargs)
+            if response.status_code == 429:
+                outcome = 'throttled'
+            elif response.status_code < 400:
+                outcome = trading_call_outcome(response.text) if api == 'trading' else 'success'
+            return response
+        finally:
+            record_ebay_call(api, call, time.perf_counter() - start, outcome)
     
     def exchange_code_for_token(self, code: str, redirect_uri: str) -> Optional[Dict]:
         """交换授权码获取访问令牌"""
@@ -45,13 +86,39 @@ class EbayService:
         }
         
         try:
-            response = self.ssl_session.post(token_url, headers=headers, data=data)
+            response = self._send('POST', token_url, 'oauth', 'exchange_code', headers=headers, data=data)
             response.raise_for_status()
             return response.json()
         except requests.RequestException as e:
             logger.error(f"Token exchange failed: {e}")
             return None
     
+    def refresh_access_token(self, refresh_token: str) -> Optional[Dict]:
+        """使用刷新令牌获取新的用户访问令牌"""
+        return self._request_token({
+            'grant_type': 'refresh_token',
+            'refresh_token': refresh_token,
+            'scope': ' '.join(self.config['EBAY_SCOPES'])
+        })
+    
+    def _request_token(self, data: Dict) -> Optional[Dict]:
+        """调用OAuth令牌端点"""
+        credentials = f"{self.config['EBAY_APP_ID']}:{self.config['EBAY_CERT_ID']}"
+        encoded_credentials = base64.b64encode(credentials.encode()).decode()
+        
+        headers = {
+            'Content-Type': 'application/x-www-form-urlencoded',
+            'Authorization': f'Basic {encoded_credentials}'
+        }
+        
+        try:
+            response = self._send('POST', self.config['EBAY_TOKEN_URL'], 'oauth', data.get('grant_type', 'token'), headers=headers, data=data)
+            response.raise_for_status()
+            return response.json()
+        except requests.RequestException as e:
+            logger.error(f"Token request ({data.get('grant_type')}) failed: {e}")
+            return None
+    
     def create_inventory_task(self, access_token: str) -> Optional[Dict]:
         """创建库存报告任务"""
         inventory_report_url = f"{self.config['EBAY_FEED_API_BASE_URL']}/inventory_task"
@@ -60,7 +127,7 @@ class EbayService:
             'Authorization': f'Bearer {access_token}',
             'Content-Type': 'application/json',
             'Accept': 'application/json',
-            'X-EBAY-C-MARKETPLACE-ID': 'EBAY_US'
+            'X-EBAY-C-MARKETPLACE-ID': self.marketplace.marketplace_id
         }
         
         payload = {
@@ -69,10 +136,13 @@ class EbayService:
         }
         
         try:
-            response = self.ssl_session.post(inventory_report_url, headers=headers, json=payload)
+            response = self._send('POST', inventory_report_url, 'feed', 'create_inventory_task', headers=headers, json=payload)
             logger.info(f"Inventory task creation response: {response.status_code}")
             
             if response.status_code == 202:
+                # 新任务创建后最近任务列表及其分页缓存失效
+                user_key = self._user_key(access_token)
+                feed_cache.invalidate(lambda key: key[0] in ('recent', 'recent_page') and key[1] == user_key)
                 location = response.headers.get('Location', '')
                 if location:
                     task_id = location.split('/')[-1]
@@ -89,7 +159,26 @@ class EbayService:
             logger.error(f"Inventory task creation failed: {e}")
             return None
     
+    @staticmethod
+    def _user_key(access_token: str) -> str:
+        """缓存使用的用户标识（不直接保存令牌）"""
+        return hashlib.sha256(access_token.encode('utf-8')).hexdigest()[:32]
+    
+    def _status_cache_ttl(self, task_info: Dict) -> float:
+        """已结束的任务状态不会再变化，缓存更久"""
+        if task_info.get('status') in FINAL_TASK_STATUSES:
+            return self.config.get('FEED_FINAL_STATUS_CACHE_TTL', 3600)
+        return self.config.get('FEED_STATUS_CACHE_TTL', 5)
+    
     def get_inventory_task_status(self, access_token: str, task_id: str) -> Optional[Dict]:
+        """获取库存任务状态（短TTL缓存，合并相同的并发请求）"""
+        return feed_cache.get_or_load(
+            ('status', self._user_key(access_token), task_id),
+            lambda: self._fetch_inventory_task_status(access_token, task_id),
+            self._status_cache_ttl
+        )
+    
+    def _fetch_inventory_task_status(self, access_token: str, task_id: str) -> Optional[Dict]:
         """获取库存任务状态"""
         inventory_report_url = f"{self.config['EBAY_FEED_API_BASE_URL']}/inventory_task"
         url = f'{inventory_report_url}/{task_id}'
@@ -98,11 +187,11 @@ class EbayService:
             'Authorization': f'Bearer {access_token}',
             'Content-Type': 'application/json',
             'Accept': 'application/json',
-            'X-EBAY-C-MARKETPLACE-ID': 'EBAY_US'
+            'X-EBAY-C-MARKETPLACE-ID': self.marketplace.marketplace_id
         }
         
         try:
-            response = self.ssl_session.get(url, headers=headers)
+            response = self._send('GET', url, 'feed', 'get_inventory_task', headers=headers)
             response.raise_for_status()
             return response.json()
         except requests.RequestException as e:
@@ -110,31 +199,101 @@ class EbayService:
             return None
     
     def get_recent_inventory_tasks(self, access_token: str, days: int = 7) -> Optional[Dict]:
-        """获取最近的库存任务列表"""
+        """获取最近的库存任务列表（包含所有分页，短TTL缓存）"""
+        return feed_cache.get_or_load(
+            ('recent', self._user_key(access_token), days, self.marketplace.marketplace_id),
+            lambda: self._collect_recent_inventory_tasks(access_token, days),
+            self.config.get('FEED_RECENT_CACHE_TTL', 15)
+        )
+    
+    def _collect_recent_inventory_tasks(self, access_token: str, days: int) -> Optional[Dict]:
+        """收集所有分页；中途某页获取失败时返回None，不把不完整的列表当作结果缓存"""
+        tasks = []
+        last_page = None
+        for page in self.iter_inventory_task_pages(access_token, self.recent_date_range(days)):
+            tasks.extend(page.get('tasks') or [])
+            last_page = page
+        if last_page is None:
+            return None
+        if self._has_more_pages(last_page, len(tasks)):
+            logger.warning(f"库存任务列表分页获取中断 (已获取 {len(tasks)} 条)")
+            return None
+        return {'tasks': tasks, 'total': len(tasks)}
+    
+    @staticmethod
+    def _has_more_pages(page: Dict, offset: int) -> bool:
+        """按页面的next/total判断offset之后是否还有任务"""
+        total = page.get('total')
+        return bool(page.get('tasks')) and (bool(page.get('next')) or (total is not None and offset < int(total)))
+    
+    @staticmethod
+    def recent_date_range(days: int) -> str:
+        """最近N天的date_range参数
+        
+        结束时间向上取整到下一分钟：同一分钟内的请求得到相同的date_range，
+        分页缓存才能命中，且不会漏掉刚创建的任务。
+        """
+        from datetime import datetime, timedelta
+        end_date = (datetime.now() + timedelta(minutes=1)).replace(second=0, microsecond=0)
+        start_date = end_date - timedelta(days=days)
+        
+        date_from = start_date.strftime('%Y-%m-%dT%H:%M:%S') + f'.{start_date.microsecond // 1000:03d}Z'
+        date_to = end_date.strftime('%Y-%m-%dT%H:%M:%S') + f'.{end_date.microsecond // 1000:03d}Z'
+        return f'{date_from}..{date_to}'
+    
+    def iter_recent_inventory_tasks(self, access_token: str, days: int = 7,
+                                    page_size: int = None) -> Iterator[Dict]:
+        """逐条遍历最近的库存任务（跨所有分页）"""
+        for page in self.iter_inventory_task_pages(access_token, self.recent_date_range(days), page_size):
+            yield from page.get('tasks') or []
+    
+    def iter_inventory_task_pages(self, access_token: str, date_range: str,
+                                  page_size: int = None, offset: int = 0) -> Iterator[Dict]:
+        """逐页遍历库存任务，在调用方处理当前页时预取下一页"""
+        page_size = page_size or self.config.get('FEED_TASK_PAGE_SIZE', 200)
+        with ThreadPoolExecutor(max_workers=1) as executor:
+            future = executor.submit(self.get_inventory_task_page, access_token, date_range, offset, page_size)
+            while future is not None:
+                page = future.result()
+                if page is None:
+                    return
+                offset += len(page.get('tasks') or [])
+                has_more = self._has_more_pages(page, offset)
+                future = executor.submit(
+                    self.get_inventory_task_page, access_token, date_range, offset, page_size
+                ) if has_more else None
+                yield page
+    
+    def get_inventory_task_page(self, access_token: str, date_range: str,
+                                offset: int = 0, limit: int = 200) -> Optional[Dict]:
+        """获取一页库存任务（短TTL缓存）"""
+        return feed_cache.get_or_load(
+            ('recent_page', self._user_key(access_token), date_range, offset, limit, self.marketplace.marketplace_id),
+            lambda: self._fetch_inventory_task_page(access_token, date_range, offset, limit),
+            self.config.get('FEED_RECENT_CACHE_TTL', 15)
+        )
+    
+    def _fetch_inventory_task_page(self, access_token: str, date_range: str,
+                                   offset: int = 0, limit: int = 200) -> Optional[Dict]:
+        """获取一页库存任务"""
         inventory_report_url = f"{self.config['EBAY_FEED_API_BASE_URL']}/inventory_task"
         
         headers = {
             'Authorization': f'Bearer {access_token}',
             'Content-Type': 'application/json',
             'Accept': 'application/json',
-            'X-EBAY-C-MARKETPLACE-ID': 'EBAY_US'
+            'X-EBAY-C-MARKETPLACE-ID': self.marketplace.marketplace_id
         }
         
-        from datetime import datetime, timedelta
-        end_date = datetime.now()
-        start_date = end_date - timedelta(days=days)
-        
-        date_from = start_date.strftime('%Y-%m-%dT%H:%M:%S') + f'.{start_date.microsecond // 1000:03d}Z'
-        date_to = end_date.strftime('%Y-%m-%dT%H:%M:%S') + f'.{end_date.microsecond // 1000:03d}Z'
-        
         params = {
-            'date_range': f'{date_from}..{date_to}',
+            'date_range': date_range,
             'feed_type': 'LMS_ACTIVE_INVENTORY_REPORT',
-            'limit': '200'
+            'limit': str(limit),
+            'offset': str(offset)
         }
         
         try:
-            response = self.ssl_session.get(inventory_report_url, headers=headers, params=params)
+            response = self._send('GET', inventory_report_url, 'feed', 'get_inventory_tasks', headers=headers, params=params)
             response.raise_for_status()
             return response.json()
         except requests.RequestException as e:
@@ -149,11 +308,11 @@ class EbayService:
         headers = {
             'Authorization': f'Bearer {access_token}',
             'Accept': 'application/octet-stream',
-            'X-EBAY-C-MARKETPLACE-ID': 'EBAY_US'
+            'X-EBAY-C-MARKETPLACE-ID': self.marketplace.marketplace_id
         }
         
         try:
-            response = self.ssl_session.get(download_url, headers=headers)
+            response = self._send('GET', download_url, 'feed', 'download_result_file', headers=headers)
             response.raise_for_status()
             return response.content
         except requests.RequestException as e:
@@ -179,16 +338,16 @@ class EbayService:
             'X-EBAY-API-CERT-NAME': cert_id,
             'X-EBAY-API-CALL-NAME': 'GetItem',
             'X-EBAY-API-IAF-TOKEN': auth_token,
-            'X-EBAY-API-SITEID': '0',
+            'X-EBAY-API-SITEID': str(self.marketplace.site_id),
             'Content-Type': 'text/xml'
         }
         
         try:
-            response = self.ssl_session.post(trading_api_url, headers=headers, data=xml_request)
+            response = self._send('POST', trading_api_url, 'trading', 'GetItem', headers=headers, data=xml_request)
             response.raise_for_status()
             return response.text
         except requests.RequestException as e:
-            logger.error(f"Trading API GetItem failed for ItemID {item_id}: {e}")
+            item_log.error("Trading API GetItem failed for ItemID %s: %s", item_id, e)
             return None
     
     def build_oauth_url(self, redirect_uri: str) -> str:
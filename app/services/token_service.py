@@ -0,0 +1,156 @@
+"""
+OAuth令牌管理服务层 - 长时间任务和请求中主动刷新用户令牌
+"""
+import time
+import hashlib
+import threading
+import logging
+from typing import Callable, Dict, Optional
+from app.services.ebay_service import EbayService
+
+logger = logging.getLogger(__name__)
+
+# Trading API中表示令牌过期/失效的错误码
+EXPIRED_TOKEN_ERROR_CODES = ('21917053', '932', '16110')
+
+
+class AccessToken:
+    """可共享的访问令牌
+    
+    任务的所有抓取线程共享同一个实例。热路径上的 current() 只做一次时间比较
+    和属性读取；到达刷新时间后，只有一个线程持锁刷新，其余线程直接读取新令牌。
+    """
+    
+    def __init__(self, access_token: str, refresh_token: str = None,
+                 expires_at: float = None, refresher: Callable[[str], Optional[Dict]] = None,
+                 refresh_margin: float = 300):
+        self.access_token = access_token
+        self.refresh_token = refresh_token
+        self.expires_at = expires_at
+        self.refresh_margin = refresh_margin
+        self.refresh_count = 0
+        self._refresher = refresher
+        self._refresh_at = expires_at - refresh_margin if expires_at else None
+        self._lock = threading.Lock()
+    
+    @property
+    def can_refresh(self) -> bool:
+        return bool(self.refresh_token and self._refresher)
+    
+    def current(self) -> str:
+        """获取当前有效令牌（临近过期时主动刷新）"""
+        refresh_at = self._refresh_at
+        if refresh_at is not None and time.time() >= refresh_at:
+            self._refresh(self.access_token)
+        return self.access_token
+    
+    def invalidate(self, stale_token: str) -> str:
+        """API报告令牌过期时调用，强制刷新并返回新令牌"""
+        self._refresh(stale_token, force=True)
+        return self.access_token
+    
+    def _refresh(self, stale_token: str, force: bool = False) -> None:
+        if not self.can_refresh:
+            return
+        with self._lock:
+            # 其他线程已经完成刷新
+            if self.access_token != stale_token:
+                return
+            if not force and self._refresh_at is not None and time.time() < self._refresh_at:
+                return
+            
+            token_data = self._refresher(self.refresh_token)
+            if not token_data or not token_data.get('access_token'):
+                # 刷新失败时稍后重试，避免每次调用都请求令牌端点
+                self._refresh_at = time.time() + 30
+                logger.warning("访问令牌刷新失败，30秒后重试")
+                return
+            
+            expires_in = token_data.get('expires_in')
+            self.expires_at = time.time() + int(expires_in) if expires_in else None
+            self._refresh_at = self.expires_at - self.refresh_margin if self.expires_at else None
+            if token_data.get('refresh_token'):
+                self.refresh_token = token_data['refresh_token']
+            self.refresh_count += 1
+            self.access_token = token_data['access_token']
+            logger.info(f"访问令牌已刷新 (第{self.refresh_count}次)")
+    
+    def to_session(self) -> Dict:
+        """转换为session中保存的令牌格式"""
+        return {
+            'access_token': self.access_token,
+            'refresh_token': self.refresh_token,
+            'token_type': 'Bearer',
+            'expires_at': self.expires_at
+        }
+
+
+def resolve_token(token) -> str:
+    """获取令牌字符串（兼容普通字符串和AccessToken）"""
+    if isinstance(token, AccessToken):
+        return token.current()
+    return token
+
+
+def is_expired_token_response(xml_response: str) -> bool:
+    """检查Trading API响应是否为令牌过期错误"""
+    if not xml_response or '<ErrorCode>' not in xml_response:
+        return False
+    return any(f'<ErrorCode>{code}</ErrorCode>' in xml_response for code in EXPIRED_TOKEN_ERROR_CODES)
+
+
+class TokenManager:
+    """令牌管理器
+    
+    同一用户（同一刷新令牌）的多个任务共享一个AccessToken，
+    任何一个任务刷新后其他任务立即使用新令牌。
+    """
+    
+    def __init__(self, refresh_margin: float = 300):
+        self.refresh_margin = refresh_margin
+        self._user_tokens: Dict[str, AccessToken] = {}
+        self._lock = threading.Lock()
+    
+    def init_app(self, app) -> None:
+        self.refresh_margin = app.config.get('TOKEN_REFRESH_MARGIN', 300)
+    
+    @staticmethod
+    def _key(refresh_token: str) -> str:
+        return hashlib.sha256(refresh_token.encode('utf-8')).hexdigest()
+    
+    def for_session_token(self, token_info: Dict, config) -> AccessToken:
+        """根据session中的令牌信息获取共享令牌"""
+        access_token = token_info.get('access_token')
+        refresh_token = token_info.get('refresh_token')
+        expires_at = token_info.get('expires_at')
+        
+        if not refresh_token:
+            # 调试令牌等无法刷新的令牌
+            return AccessToken(access_token, expires_at=expires_at)
+        
+        key = self._key(refresh_token)
+        with self._lock:
+            self._drop_expired_locked()
+            token = self._user_tokens.get(key)
+            if token is None or (expires_at and token.expires_at and expires_at > token.expires_at):
+                ebay_service = EbayService(config)
+                token = AccessToken(
+                    access_token,
+                    refresh_token=refresh_token,
+                    expires_at=expires_at,
+                    refresher=ebay_service.refresh_access_token,
+                    refresh_margin=self.refresh_margin
+                )
+                self._user_tokens[key] = token
+            return token
+    
+    def _drop_expired_locked(self) -> None:
+        now = time.time()
+        expired = [key for key, token in self._user_tokens.items()
+                   if token.expires_at and token.expires_at < now - 3600]
+        for key in expired:
+            del self._user_tokens[key]
+
+
+# 全局令牌管理器
+token_manager = TokenManager()
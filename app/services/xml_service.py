@@ -2,31 +2,105 @@
 XML处理服务层
 """
 import os
+import sys
 import xml.etree.ElementTree as ET
 import zipfile
 import subprocess
 import logging
 from io import BytesIO
-from concurrent.futures import ThreadPoolExecutor, as_completed
+from dataclasses import dataclass, field
 from typing import List, Dict, Optional
 import time
+import threading
 from flask import current_app
+from app.models.ebay_models import ItemRecord, SpecificNameTable, get_marketplace
+from app.services.ebay_service import EbayService, trading_call_outcome
+from app.services.token_service import AccessToken, resolve_token, is_expired_token_response
+from app.utils.metrics import record_ebay_call
+from app.utils.profiler import task_profiler
+from app.utils.tracing import tracer
+from app.utils.concurrency import concurrency
+from app.utils.log_pipeline import item_logger
 
 logger = logging.getLogger(__name__)
+# 逐商品日志（%风格参数延迟格式化，同一模板按窗口限流）
+item_log = item_logger(__name__)
+
+
+@dataclass
+class BatchFetchResult:
+    """批量获取结果"""
+    items: List[Dict] = field(default_factory=list)
+    failed_item_ids: List[str] = field(default_factory=list)
+    unfetched_item_ids: List[str] = field(default_factory=list)  # 因时间预算用尽未派发的ItemID
+    elapsed_time: float = 0.0
+    
+    @property
+    def partial(self) -> bool:
+        return bool(self.unfetched_item_ids)
+
+
+class ItemFetchLimiter:
+    """进程内所有抓取作业共用的GetItem并发上限
+    
+    每个作业的执行器只限制自身的并发数，多站点导出时各站点作业同时运行，
+    这里保证同一进程中进行中的GetItem调用总数不超过limit（与传输方式无关）。
+    """
+    
+    def __init__(self, limit: int = 8):
+        self.limit = limit
+        self._semaphore = None
+        self._generation: Optional[int] = None
+        self._guard = threading.Lock()
+    
+    def init_app(self, app) -> None:
+        self.configure(app.config.get('ITEM_FETCH_MAX_CONCURRENCY', 8))
+    
+    def configure(self, limit: int) -> None:
+        with self._guard:
+            self.limit = max(1, int(limit))
+            self._semaphore = None
+            self._generation = None
+    
+    @property
+    def slot(self):
+        """由并发后端创建的信号量（切换后端或fork后重新创建）"""
+        generation = concurrency.generation
+        if self._generation != generation:
+            with self._guard:
+                if self._generation != generation:
+                    self._semaphore = concurrency.semaphore(self.limit)
+                    self._generation = generation
+        return self._semaphore
+
+
+# 全局GetItem并发上限
+item_fetch_limiter = ItemFetchLimiter()
 
 
 class XMLService:
     """XML处理服务类"""
     
-    def __init__(self, config=None):
+    def __init__(self, config=None, marketplace_id: str = None):
         if config:
             self.max_workers = config.get('MAX_WORKERS', 4)
             self.timeout = config.get('TASK_TIMEOUT', 300)
+            self.request_delay = config.get('ITEM_REQUEST_DELAY', 0.1)
             self.config = config
         else:
             self.max_workers = current_app.config.get('MAX_WORKERS', 4)
             self.timeout = current_app.config.get('TASK_TIMEOUT', 300)
+            self.request_delay = current_app.config.get('ITEM_REQUEST_DELAY', 0.1)
             self.config = current_app.config
+        self.time_budget = self.config.get('FETCH_TIME_BUDGET', self.timeout)
+        # curl: 每次调用启动子进程；pooled: 复用进程级共享连接池
+        self.transport = self.config.get('ITEM_FETCH_TRANSPORT', 'curl')
+        self._ebay_service = None
+        # 同一服务实例（即同一任务）解析的商品共享Item Specifics名称表
+        self.specific_names = SpecificNameTable()
+        self.budget_margin = self.config.get('FETCH_BUDGET_MARGIN', 20)
+        # 请求的Trading API站点，同时决定输出哪种货币的商品
+        self.marketplace = get_marketplace(marketplace_id or self.config.get('EBAY_MARKETPLACE_ID'))
     
     def extract_item_ids_from_zip(self, zip_content: bytes) -> List[str]:
         """从ZIP文件中提取ItemID列表"""
@@ -79,65 +153,145 @@ class XMLService:
             logger.error(f"从ZIP文件提取ItemID时出错: {e}")
             return []
     
+    def is_supported_item(self, item_data: Dict) -> bool:
+        """是否为需要输出的商品（只处理站点货币的商品）"""
+        return item_data.get('Currency') == self.marketplace.currency
+    
     def get_item_details_batch(self, item_ids: List[str], access_token: str, 
-                              task_id: str = None, progress_callback=None) -> List[Dict]:
+                              task_id: str = None, progress_callback=None,
+                              item_callback=None) -> List[Dict]:
         """批量获取商品详情"""
+        return self.fetch_item_details(
+            item_ids, access_token, task_id, progress_callback, item_callback
+        ).items
+    
+    def fetch_item_details(self, item_ids: List[str], access_token,
+                           task_id: str = None, progress_callback=None,
+                           item_callback=None, time_budget: float = None) -> BatchFetchResult:
+        """按时间预算批量获取商品详情
+        
+        请求按并发数分批派发而不是一次性全部提交。接近截止时间时停止派发，
+        等待已派发的请求完成后返回已获取的结果和未派发的ItemID，
+        而不是超时后丢弃全部结果。
+        
+        item_callback(item_id, item_data) 在每个商品解析成功后调用（过滤货币前），
+        用于写入检查点。access_token 可以是令牌字符串或AccessToken，
+        后者在长时间任务中会被主动刷新。
+        """
         results = []
         failed_items = []
         
+        if time_budget is None:
+            time_budget = self.time_budget
+        # 预留已派发请求完成所需的时间
+        deadline = time.monotonic() + max(0.0, time_budget - self.budget_margin) if time_budget else None
+        max_in_flight = self.max_workers * 2
+        # 线程池中的线程不继承上下文，逐商品span需显式指定父span
+        parent_span = tracer.current_span()
+        
         logger.info(f"开始批量处理 {len(item_ids)} 个ItemID，并发数: {self.max_workers}")
         
         def fetch_single_item(item_id: str) -> Optional[Dict]:
             """获取单个商品详情"""
             try:
-                time.sleep(0.1)  # 避免API限制
-                xml_response = self._get_item_details_with_curl(item_id, access_token)
-                if xml_response:
-                    parsed_result = self._parse_get_item_response(xml_response)
-                    if parsed_result:
-                        return parsed_result
-                return None
+                with task_profiler.track(task_id), \
+                        tracer.item_span('ebay.GetItem', parent=parent_span, item_id=item_id) as span:
+                    # 与同一进程中其他作业（如多站点导出的各站点）共享并发上限
+                    with item_fetch_limiter.slot:
+                        if self.request_delay:
+                            concurrency.sleep(self.request_delay)  # 避免API限制
+                        token = resolve_token(access_token)
+                        xml_response = self._get_item_details(item_id, token)
+                        if isinstance(access_token, AccessToken) and is_expired_token_response(xml_response):
+                            # 令牌已失效：刷新一次（所有线程共享新令牌）后重试
+                            span.set_attribute('token_refreshed', True)
+                            xml_response = self._get_item_details(item_id, access_token.invalidate(token))
+                    if xml_response:
+                        span.set_attribute('response_bytes', len(xml_response))
+                        with tracer.span('item.parse', parent=span):
+                            parsed_result = self._parse_get_item_response(xml_response)
+                        if parsed_result:
+                            return parsed_result
+                    span.set_attribute('failed', True)
+                    return None
             except Exception as e:
-                logger.error(f"ItemID {item_id} 获取失败: {e}")
+                item_log.error("ItemID %s 获取失败: %s", item_id, e)
                 return None
         
         # 并行处理
         start_time = time.time()
-        with ThreadPoolExecutor(max_workers=self.max_workers) as executor:
-            future_to_item_id = {
-                executor.submit(fetch_single_item, item_id): item_id 
-                for item_id in item_ids
-            }
+        next_index = 0
+        budget_exhausted = False
+        with concurrency.executor(self.max_workers) as executor:
+            future_to_item_id = {}
             
             completed_count = 0
             total_count = len(item_ids)
             
-            for future in as_completed(future_to_item_id, timeout=self.timeout):
-                item_id = future_to_item_id[future]
-                completed_count += 1
+            while True:
+                # 派发新请求，直到达到在途上限或预算用尽
+                while len(future_to_item_id) < max_in_flight and next_index < total_count:
+                    if deadline is not None and time.monotonic() >= deadline:
+                        if not budget_exhausted:
+                            budget_exhausted = True
+                            logger.warning(f"时间预算即将用尽，停止派发新请求 (剩余 {total_count - next_index} 个ItemID)")
+                        break
+                    item_id = item_ids[next_index]
+                    future_to_item_id[executor.submit(fetch_single_item, item_id)] = item_id
+                    next_index += 1
                 
-                try:
-                    result = future.result()
-                    if result:
-                        # 只处理USD货币的商品
-                        if result.get('Currency') == 'USD':
-                            results.append(result)
-                            logger.debug(f"ItemID {item_id} (USD) 处理完成 ({completed_count}/{total_count})")
+                if not future_to_item_id:
+                    break
+                
+                done = executor.wait_any(future_to_item_id)
+                for future in done:
+                    item_id = future_to_item_id.pop(future)
+                    completed_count += 1
+                    
+                    try:
+                        result = future.result()
+                        if result:
+                            if item_callback:
+                                item_callback(item_id, result)
+                            if self.is_supported_item(result):
+                                results.append(result)
+                                item_log.debug("ItemID %s (%s) 处理完成 (%d/%d)", item_id, self.marketplace.currency, completed_count, total_count)
+                            else:
+                                item_log.debug("ItemID %s 跳过 (货币: %s)", item_id, result.get('Currency', 'N/A'))
                         else:
-                            logger.debug(f"ItemID {item_id} 跳过 (货币: {result.get('Currency', 'N/A')})")
-                    else:
+                            failed_items.append(item_id)
+                    except Exception as e:
+                        item_log.error("ItemID %s 处理错误: %s", item_id, e)
                         failed_items.append(item_id)
-                except Exception as e:
-                    logger.error(f"ItemID {item_id} 处理错误: {e}")
-                    failed_items.append(item_id)
-                
-                # 进度回调
-                if progress_callback:
-                    progress_callback(completed_count, total_count)
+                    
+                    # 进度回调
+                    if progress_callback:
+                        progress_callback(completed_count, total_count)
         
+        unfetched_items = list(item_ids[next_index:])
         elapsed_time = time.time() - start_time
-        logger.info(f"批量处理完成 - 成功: {len(results)}, 失败: {len(failed_items)}, 耗时: {elapsed_time:.2f}秒")
-        return results
+        logger.info(f"批量处理完成 - 成功: {len(results)}, 失败: {len(failed_items)}, 未获取: {len(unfetched_items)}, 耗时: {elapsed_time:.2f}秒")
+        return BatchFetchResult(
+            items=results,
+            failed_item_ids=failed_items,
+            unfetched_item_ids=unfetched_items,
+            elapsed_time=elapsed_time
+        )
+    
+    def _get_item_details(self, item_id: str, auth_token: str) -> Optional[str]:
+        """按配置的传输方式获取GetItem响应"""
+        if self.transport == 'pooled':
+            # 共享连接池的调用在EbayService中记录指标
+            return self._get_ebay_service().get_item_details_trading_api(item_id, auth_token)
+        start = time.perf_counter()
+        xml_response = self._get_item_details_with_curl(item_id, auth_token)
+        record_ebay_call('trading', 'GetItem', time.perf_counter() - start, trading_call_outcome(xml_response))
+        return xml_response
+    
+    def _get_ebay_service(self) -> EbayService:
+        if self._ebay_service is None:
+            self._ebay_service = EbayService(self.config, self.marketplace.marketplace_id)
+        return self._ebay_service
     
     def _get_item_details_with_curl(self, item_id: str, auth_token: str) -> Optional[str]:
         """使用curl获取商品详情（避免SSL问题）"""
@@ -158,28 +312,28 @@ class XMLService:
                 '-H', f'X-EBAY-API-CERT-NAME: {self.config["EBAY_CERT_ID"]}',
                 '-H', 'X-EBAY-API-CALL-NAME: GetItem',
                 '-H', f'X-EBAY-API-IAF-TOKEN: {auth_token}',
-                '-H', 'X-EBAY-API-SITEID: 0',
+                '-H', f'X-EBAY-API-SITEID: {self.marketplace.site_id}',
                 '-H', 'Content-Type: text/xml',
                 '--data-raw', xml_request,
                 self.config['EBAY_TRADING_API_URL']
             ]
             
-            result = subprocess.run(cmd, capture_output=True, text=True, timeout=15)
+            result = concurrency.run_subprocess(cmd, capture_output=True, text=True, timeout=15)
             
             if result.returncode == 0:
                 return result.stdout
             else:
-                logger.error(f"curl failed for ItemID {item_id}, return code: {result.returncode}")
+                item_log.error("curl failed for ItemID %s, return code: %s", item_id, result.returncode)
                 return None
                 
         except subprocess.TimeoutExpired:
-            logger.error(f"Trading API timeout for ItemID {item_id}")
+            item_log.error("Trading API timeout for ItemID %s", item_id)
             return None
         except Exception as e:
-            logger.error(f"Trading API call failed for ItemID {item_id}: {e}")
+            item_log.error("Trading API call failed for ItemID %s: %s", item_id, e)
             return None
     
-    def _parse_get_item_response(self, xml_response: str) -> Optional[Dict]:
+    def _parse_get_item_response(self, xml_response: str) -> Optional[ItemRecord]:
         """解析GetItem响应XML"""
         try:
             parser = ET.XMLParser(encoding='utf-8')
@@ -187,52 +341,47 @@ class XMLService:
             
             ns = {'ebay': 'urn:ebay:apis:eBLBaseComponents'}
             
-            item_data = {}
-            
-            # 基本信息提取
-            elements_to_extract = {
-                'ItemID': './/ebay:ItemID',
-                'Title': './/ebay:Title',
-                'SKU': './/ebay:SKU',
-                'Quantity': './/ebay:Quantity'
-            }
+            def text_of(parent, path):
+                elem = parent.find(path, ns)
+                return (elem.text or '') if elem is not None else ''
             
-            for key, xpath in elements_to_extract.items():
-                elem = root.find(xpath, ns)
-                item_data[key] = elem.text if elem is not None else ''
+            record = ItemRecord(
+                item_id=text_of(root, './/ebay:ItemID'),
+                title=text_of(root, './/ebay:Title'),
+                sku=text_of(root, './/ebay:SKU'),
+                quantity=text_of(root, './/ebay:Quantity'),
+                names=self.specific_names
+            )
             
             # 价格信息
             current_price = root.find('.//ebay:CurrentPrice', ns)
             if current_price is not None:
-                item_data['CurrentPrice'] = current_price.text
-                item_data['Currency'] = current_price.get('currencyID', '')
-            else:
-                item_data['CurrentPrice'] = ''
-                item_data['Currency'] = ''
+                record.current_price = current_price.text or ''
+                record.currency = sys.intern(current_price.get('currencyID', ''))
             
             # 类别信息
             primary_category = root.find('.//ebay:PrimaryCategory', ns)
             if primary_category is not None:
-                category_id = primary_category.find('ebay:CategoryID', ns)
-                category_name = primary_category.find('ebay:CategoryName', ns)
-                item_data['CategoryID'] = category_id.text if category_id is not None else ''
-                item_data['CategoryName'] = category_name.text if category_name is not None else ''
+                record.category_id = sys.intern(text_of(primary_category, 'ebay:CategoryID'))
+                record.category_name = sys.intern(text_of(primary_category, 'ebay:CategoryName'))
             
-            # Item Specifics
-            specifics_dict = {}
+            # Item Specifics（名称在整个任务内共享编码）
+            specifics = []
             for specific in root.findall('.//ebay:ItemSpecifics/ebay:NameValueList', ns):
                 name_elem = specific.find('ebay:Name', ns)
                 value_elem = specific.find('ebay:Value', ns)
-                if name_elem is not None and value_elem is not None:
-                    specifics_dict[name_elem.text] = value_elem.text
+                # 空的<Name/>无法作为列名，跳过该项而不是丢弃整个商品
+                if name_elem is not None and name_elem.text and value_elem is not None:
+                    specifics.append((name_elem.text, value_elem.text))
             
-            item_data['ItemSpecifics'] = specifics_dict
+            # 同名字段以最后一个为准（与原字典行为一致）
+            record.set_specifics(dict(specifics).items())
             
-            return item_data
+            return record
             
         except ET.ParseError as e:
-            logger.error(f"XML解析错误: {e}")
+            item_log.error("XML解析错误: %s", e)
             return None
         except Exception as e:
-            logger.error(f"GetItem响应解析错误: {e}")
+            item_log.error("GetItem响应解析错误: %s", e)
             return None
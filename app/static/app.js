@@ -138,6 +138,107 @@ document.addEventListener('DOMContentLoaded', function() {
         });
     }
     
+    // 一键导出：服务端创建报告、等待完成并生成CSV，前端只订阅进度
+    const exportBtn = document.getElementById('export-csv-btn');
+    
+    if (exportBtn) {
+        exportBtn.addEventListener('click', function() {
+            if (isGeneratingCSV) {
+                alert('CSV生成中です。しばらくお待ちください...');
+                return;
+            }
+            
+            const marketplaces = Array.from(
+                document.querySelectorAll('input[name="export-marketplace"]:checked')
+            ).map(input => input.value);
+            if (marketplaces.length === 0) {
+                statusDiv.innerHTML = `
+                    <div class="status-message status-error">
+                        <p>出力サイトを選択してください</p>
+                    </div>
+                `;
+                return;
+            }
+            
+            statusDiv.innerHTML = '<p>レポート作成中...</p>';
+            exportBtn.disabled = true;
+            
+            fetch('/api/tasks/export', {
+                method: 'POST',
+                headers: {
+                    'Content-Type': 'application/json',
+                },
+                body: JSON.stringify({marketplaces: marketplaces})
+            })
+            .then(response => response.json())
+            .then(data => {
+                if (data.status === 'accepted') {
+                    // 每个站点一个作业，可分别查看进度
+                    const jobRows = data.jobs.map(job => `
+                        <p>
+                            <strong>${job.marketplace_id}:</strong> ${job.job_id}
+                            <span class="job-progress" data-job-id="${job.job_id}">待機中</span>
+                            <button class="btn btn-secondary job-progress-btn" data-job-id="${job.job_id}">進捗を表示</button>
+                        </p>
+                    `).join('');
+                    const failedRow = data.failed_marketplaces.length > 0 ?
+                        `<p>作成に失敗したサイト: ${data.failed_marketplaces.join(', ')}</p>` : '';
+                    statusDiv.innerHTML = `
+                        <div class="status-message status-info">
+                            <p>${data.message}</p>
+                            ${jobRows}
+                            ${failedRow}
+                        </div>
+                    `;
+                    statusDiv.querySelectorAll('.job-progress-btn').forEach(button => {
+                        button.addEventListener('click', function() {
+                            if (isGeneratingCSV) {
+                                alert('CSV生成中です。しばらくお待ちください...');
+                                return;
+                            }
+                            isGeneratingCSV = true;
+                            showProgressModal(button.dataset.jobId, false);
+                        });
+                    });
+                    // 所有站点的进度通过一个批量长轮询请求更新，任务结束后取消订阅
+                    statusDiv.querySelectorAll('.job-progress').forEach(label => {
+                        const unsubscribe = progressPoller.subscribe(label.dataset.jobId, progress => {
+                            if (!document.body.contains(label) || (progress && progress.error)) {
+                                unsubscribe();
+                                return;
+                            }
+                            if (!progress) return;
+                            label.textContent = `${progress.message} (${Math.round(progress.progress_percentage || 0)}%)`;
+                            if (progress.status === 'completed' || progress.status === 'failed') {
+                                unsubscribe();
+                            }
+                        });
+                    });
+                    if (data.jobs.length === 1) {
+                        isGeneratingCSV = true;
+                        showProgressModal(data.job_id, false);
+                    }
+                } else {
+                    statusDiv.innerHTML = `
+                        <div class="status-message status-error">
+                            <p>エラー: ${data.error}</p>
+                        </div>
+                    `;
+                }
+            })
+            .catch(error => {
+                statusDiv.innerHTML = `
+                    <div class="status-message status-error">
+                        <p>リクエスト失敗: ${error.message}</p>
+                    </div>
+                `;
+            })
+            .finally(() => {
+                exportBtn.disabled = false;
+            });
+        });
+    }
+    
     // 通过任务ID查询功能
     const queryTaskBtn = document.getElementById('query-task-btn');
     const taskIdInput = document.getElementById('task-id-input');
@@ -223,14 +324,36 @@ document.addEventListener('DOMContentLoaded', function() {
     const recentReportsList = document.getElementById('recent-reports-list');
     
     if (getRecentReportsBtn && daysInput && recentReportsList) {
-        getRecentReportsBtn.addEventListener('click', function() {
-            const days = daysInput.value || 7;
+        const RECENT_PAGE_SIZE = 50;
+        
+        function renderRecentTask(task) {
+            const downloadButton = task.status === 'COMPLETED' ? 
+                `<div class="action-group" style="margin-top: 15px;">
+                    <p>タスクIDをコピーして、タスク検索ボックスに貼り付けてください</p>
+                 </div>` : '';
             
-            recentReportsList.innerHTML = '<p>最近のリポートを取得中...</p>';
-            getRecentReportsBtn.disabled = true;
-            getRecentReportsBtn.textContent = '取得中...';
+            return `
+                <div class="report-item">
+                    <div class="report-meta">
+                        <strong>タスクID: ${task.task_id}</strong>
+                        <span class="report-status status-${task.status.toLowerCase()}">${task.status}</span>
+                    </div>
+                    <p><strong>作成時間:</strong> ${task.creation_date || 'N/A'}</p>
+                    <p><strong>完了時間:</strong> ${task.completion_date || 'N/A'}</p>
+                    <p><strong>Feedタイプ:</strong> ${task.feed_type}</p>
+                    ${downloadButton}
+                </div>
+            `;
+        }
+        
+        // 按页加载最近的报告，cursor为空时加载第一页
+        function loadRecentReports(days, cursor) {
+            const params = new URLSearchParams({days: days, page_size: RECENT_PAGE_SIZE});
+            if (cursor) {
+                params.set('cursor', cursor);
+            }
             
-            fetch(`/api/reports/recent?days=${days}`, {
+            return fetch(`/api/reports/recent?${params.toString()}`, {
                 method: 'GET',
                 headers: {
                     'Content-Type': 'application/json',
@@ -238,56 +361,65 @@ document.addEventListener('DOMContentLoaded', function() {
             })
             .then(response => response.json())
             .then(data => {
-                if (data.status === 'success') {
-                    if (data.tasks && data.tasks.length > 0) {
-                        let tasksHtml = `
-                            <div class="status-message status-success">
-                                <h4>📋 ${data.total_count} 個のタスクが見つかりました</h4>
-                            </div>
-                            <div class="reports-grid" style="max-height: 400px; overflow-y: auto;">
-                        `;
-                        
-                        data.tasks.forEach(task => {
-                            const downloadButton = task.status === 'COMPLETED' ? 
-                                `<div class="action-group" style="margin-top: 15px;">
-                                    <p>タスクIDをコピーして、タスク検索ボックスに貼り付けてください</p>
-                                 </div>` : '';
-                            
-                            tasksHtml += `
-                                <div class="report-item">
-                                    <div class="report-meta">
-                                        <strong>タスクID: ${task.task_id}</strong>
-                                        <span class="report-status status-${task.status.toLowerCase()}">${task.status}</span>
-                                    </div>
-                                    <p><strong>作成時間:</strong> ${task.creation_date || 'N/A'}</p>
-                                    <p><strong>完了時間:</strong> ${task.completion_date || 'N/A'}</p>
-                                    <p><strong>Feedタイプ:</strong> ${task.feed_type}</p>
-                                    ${downloadButton}
-                                </div>
-                            `;
-                        });
-                        
-                        tasksHtml += '</div>';
-                        recentReportsList.innerHTML = tasksHtml;
-                    } else {
+                if (data.status !== 'success') {
+                    throw new Error(data.error || 'unknown');
+                }
+                
+                if (!cursor) {
+                    if (!data.tasks || data.tasks.length === 0) {
                         recentReportsList.innerHTML = `
                             <div class="status-message status-info">
                                 <p>📭 タスクが見つかりません</p>
                             </div>
                         `;
+                        return;
                     }
-                } else {
                     recentReportsList.innerHTML = `
-                        <div class="status-message status-error">
-                            <p>タスク取得失敗: ${data.error}</p>
+                        <div class="status-message status-success">
+                            <h4>📋 ${data.total_count} 個のタスクが見つかりました</h4>
                         </div>
+                        <div class="reports-grid" id="recent-reports-grid" style="max-height: 400px; overflow-y: auto;"></div>
                     `;
                 }
-            })
+                
+                const grid = document.getElementById('recent-reports-grid');
+                grid.insertAdjacentHTML('beforeend', data.tasks.map(renderRecentTask).join(''));
+                
+                const oldMoreBtn = document.getElementById('recent-reports-more-btn');
+                if (oldMoreBtn) {
+                    oldMoreBtn.remove();
+                }
+                if (data.next_cursor) {
+                    const moreBtn = document.createElement('button');
+                    moreBtn.id = 'recent-reports-more-btn';
+                    moreBtn.className = 'btn btn-secondary';
+                    moreBtn.textContent = 'さらに読み込む';
+                    moreBtn.addEventListener('click', function() {
+                        moreBtn.disabled = true;
+                        moreBtn.textContent = '読み込み中...';
+                        loadRecentReports(days, data.next_cursor).catch(error => {
+                            moreBtn.disabled = false;
+                            moreBtn.textContent = 'さらに読み込む';
+                            alert('タスク取得失敗: ' + error.message);
+                        });
+                    });
+                    recentReportsList.appendChild(moreBtn);
+                }
+            });
+        }
+        
+        getRecentReportsBtn.addEventListener('click', function() {
+            const days = daysInput.value || 7;
+            
+            recentReportsList.innerHTML = '<p>最近のリポートを取得中...</p>';
+            getRecentReportsBtn.disabled = true;
+            getRecentReportsBtn.textContent = '取得中...';
+            
+            loadRecentReports(days, null)
             .catch(error => {
                 recentReportsList.innerHTML = `
                     <div class="status-message status-error">
-                        <p>リクエスト失敗: ${error.message}</p>
+                        <p>タスク取得失敗: ${error.message}</p>
                     </div>
                 `;
             })
@@ -299,8 +431,107 @@ document.addEventListener('DOMContentLoaded', function() {
     }
 });
 
+// 多任务进度批量长轮询：所有订阅的任务共用一个请求，带If-None-Match时状态不变服务端返回304
+const progressPoller = {
+    subscribers: new Map(),
+    etag: null,
+    running: false,
+    controller: null,
+    waitSeconds: 25,
+    retryDelay: 3000,
+    
+    // 订阅任务进度，callback(data)在进度变化时调用（任务不存在时data为null），返回取消订阅函数
+    subscribe(taskId, callback) {
+        if (!this.subscribers.has(taskId)) {
+            this.subscribers.set(taskId, new Set());
+        }
+        this.subscribers.get(taskId).add(callback);
+        // 立即获取一次完整结果，让新订阅者拿到当前进度
+        this.restart();
+        return () => {
+            const current = this.subscribers.get(taskId);
+            if (current && current.delete(callback) && current.size === 0) {
+                this.subscribers.delete(taskId);
+                this.restart();
+            }
+        };
+    },
+    
+    // 订阅的任务变化后需要重新获取完整结果
+    restart() {
+        this.etag = null;
+        if (this.controller) {
+            this.controller.abort();
+        } else if (!this.running) {
+            this.loop();
+        }
+    },
+    
+    loop() {
+        if (this.subscribers.size === 0) {
+            this.running = false;
+            return;
+        }
+        this.running = true;
+        
+        const ids = Array.from(this.subscribers.keys());
+        const controller = new AbortController();
+        const headers = {};
+        if (this.etag) {
+            headers['If-None-Match'] = this.etag;
+        }
+        this.controller = controller;
+        
+        fetch(`/api/tasks/progress-batch?ids=${encodeURIComponent(ids.join(','))}&wait=${this.waitSeconds}`, {
+            headers: headers,
+            cache: 'no-store',
+            signal: controller.signal
+        })
+        .then(response => {
+            if (response.status === 304) {
+                return null;
+            }
+            if (response.status === 401) {
+                ids.forEach(id => this.notify(id, {error: '認証エラー。再度ログインしてください。'}));
+                return null;
+            }
+            if (!response.ok) {
+                throw new Error(`HTTP ${response.status}`);
+            }
+            return response.json().then(result => {
+                if (controller.signal.aborted) return null;
+                this.etag = response.headers.get('ETag');
+                return result;
+            });
+        })
+        .then(result => {
+            this.controller = null;
+            if (result && result.status === 'success') {
+                ids.forEach(id => this.notify(id, result.data[id] || null));
+            }
+            this.loop();
+        })
+        .catch(error => {
+            this.controller = null;
+            if (error.name === 'AbortError') {
+                this.loop();
+                return;
+            }
+            console.error('批量进度轮询错误:', error);
+            setTimeout(() => this.loop(), this.retryDelay);
+        });
+    },
+    
+    notify(taskId, data) {
+        const callbacks = this.subscribers.get(taskId);
+        if (callbacks) {
+            Array.from(callbacks).forEach(callback => callback(data));
+        }
+    }
+};
+
 // 实时进度显示功能
-function showProgressModal(taskId) {
+function showProgressModal(taskId, triggerProcessing = true) {
     // 创建进度模态框
     const modal = document.createElement('div');
     modal.id = 'progressModal';
@@ -328,6 +559,8 @@ function showProgressModal(taskId) {
                         <div>ステップ: <span id="currentStep">0</span>/<span id="totalSteps">5</span></div>
                         <div>出品数: <span id="currentItem">0</span>/<span id="totalItems">0</span></div>
                         <div>経過時間: <span id="elapsedTime">0</span>秒</div>
+                        <div>処理速度: <span id="itemsPerSecond">-</span>件/秒</div>
+                        <div>残り時間: <span id="etaTime">-</span></div>
                     </div>
                 </div>
                 <button id="closeProgress" style="display:none;" onclick="closeProgressModal()">閉じる</button>
@@ -446,65 +679,46 @@ function showProgressModal(taskId) {
     
     let downloadTriggered = false;
     let usePolling = false;
-    let pollingInterval = null;
+    let stopPolling = null; // 取消批量进度订阅的函数
     let taskStarted = false;
-    let pollAttempts = 0;
-    const maxPollAttempts = 30; // 最多轮询30次（30秒）
+    const pollStartTimeout = 90000; // 任务未开始时最多等待90秒
     
-    // 轮询函数
-    function pollProgress() {
-        pollAttempts++;
-        
-        fetch(`/api/tasks/progress-poll/${taskId}`)
-        .then(response => {
-            // 检查401认证错误
-            if (response.status === 401) {
-                console.error('认证失败，停止轮询');
-                if (pollingInterval) {
-                    clearInterval(pollingInterval);
-                    pollingInterval = null;
-                }
-                updateProgress({error: '認証エラー。再度ログインしてください。'});
-                return Promise.reject('Authentication failed');
-            }
-            return response.json();
-        })
-        .then(data => {
-            if (data.status === 'success') {
-                // 任务已开始，切换到进度显示
-                if (!taskStarted) {
-                    taskStarted = true;
-                    switchToProgressView();
-                }
-                updateProgress(data.data);
-            } else {
-                // 如果轮询次数超过限制，显示错误
-                if (pollAttempts >= maxPollAttempts) {
-                    updateProgress({error: 'タスクの開始がタイムアウトしました'});
-                }
-                // 否则继续等待，不显示错误
-                console.warn(`轮询获取进度失败 (${pollAttempts}/${maxPollAttempts}):`, data.error);
-            }
-        })
-        .catch(error => {
-            console.error('轮询错误:', error);
-            if (error === 'Authentication failed') {
-                return; // 认证失败时不继续处理
-            }
-            // 检查是否是网络错误或404
-            if (error.message && error.message.includes('404')) {
-                console.log('任务不存在，停止轮询');
-                if (pollingInterval) {
-                    clearInterval(pollingInterval);
-                    pollingInterval = null;
-                }
-                updateProgress({error: 'タスクが見つかりません。ページを更新してください。'});
-                return;
-            }
-            if (pollAttempts >= maxPollAttempts) {
-                updateProgress({error: '接続エラー'});
+    // 订阅批量进度长轮询（多个任务共用一个请求，状态不变时服务端不返回数据）
+    function startPolling() {
+        if (stopPolling) return;
+        stopPolling = progressPoller.subscribe(taskId, handlePolledProgress);
+        setTimeout(() => {
+            if (stopPolling && !taskStarted) {
+                cancelPolling();
+                updateProgress({error: 'タスクの開始がタイムアウトしました'});
             }
-        });
+        }, pollStartTimeout);
+    }
+    
+    function cancelPolling() {
+        if (stopPolling) {
+            stopPolling();
+            stopPolling = null;
+        }
+    }
+    
+    function handlePolledProgress(data) {
+        if (data && data.error) {
+            // 认证失败等错误，停止轮询
+            cancelPolling();
+            updateProgress(data);
+            return;
+        }
+        if (!data) {
+            // 任务尚未开始，继续等待
+            console.warn('任务进度尚不可用，继续等待');
+            return;
+        }
+        if (!taskStarted) {
+            taskStarted = true;
+            switchToProgressView();
+        }
+        updateProgress(data);
     }
     
     // 切换到进度显示视图
@@ -522,7 +736,7 @@ function showProgressModal(taskId) {
         // 延迟启动轮询，给任务时间启动
         setTimeout(() => {
             if (!downloadTriggered && usePolling) {
-                pollingInterval = setInterval(pollProgress, 3000);
+                startPolling();
             }
         }, 2000);
     } else {
@@ -547,9 +761,8 @@ function showProgressModal(taskId) {
         updateProgress(data);
         
         // 如果SSE正常工作，确保不启动轮询
-        if (pollingInterval) {
-            clearInterval(pollingInterval);
-            pollingInterval = null;
+        if (stopPolling) {
+            cancelPolling();
             usePolling = false;
         }
     };
@@ -579,7 +792,7 @@ function showProgressModal(taskId) {
                         usePolling = true;
                         setTimeout(() => {
                             if (!downloadTriggered && usePolling) {
-                                pollingInterval = setInterval(pollProgress, 3000);
+                                startPolling();
                             }
                         }, 2000);
                     }
@@ -594,14 +807,14 @@ function showProgressModal(taskId) {
             usePolling = true;
             setTimeout(() => {
                 if (!downloadTriggered && usePolling) {
-                    pollingInterval = setInterval(pollProgress, 3000);
+                    startPolling();
                 }
             }, 2000);
         }
     };
     
-    // 延迟触发后端处理，确保连接已建立
-    setTimeout(() => {
+    // 延迟触发后端处理，确保连接已建立（服务端编排的任务已在运行，无需触发）
+    if (triggerProcessing) setTimeout(() => {
         fetch(`/api/tasks/enhanced-csv/${taskId}`, {
             method: 'HEAD'  // 使用HEAD请求只触发处理，不等待响应
         }).then(response => {
@@ -623,13 +836,13 @@ function showProgressModal(taskId) {
         if (!sseConnected && !usePolling && !downloadTriggered) {
             console.log('SSE连接超时，启动备用轮询');
             usePolling = true;
-            pollingInterval = setInterval(pollProgress, 3000);
+            startPolling();
         }
     }, 3000);
     }
     
-    // 延迟触发后端处理，确保连接已建立
-    setTimeout(() => {
+    // 延迟触发后端处理，确保连接已建立（服务端编排的任务已在运行，无需触发）
+    if (triggerProcessing) setTimeout(() => {
         fetch(`/api/tasks/enhanced-csv/${taskId}`, {
             method: 'HEAD'  // 使用HEAD请求只触发处理，不等待响应
         }).then(response => {
@@ -651,9 +864,7 @@ function showProgressModal(taskId) {
         // 检查模态框是否还存在
         if (!document.getElementById('progressModal')) {
             console.log('Progress modal not found, stopping updates');
-            if (pollingInterval) {
-                clearInterval(pollingInterval);
-            }
+            cancelPolling();
             return;
         }
         
@@ -690,6 +901,8 @@ function showProgressModal(taskId) {
         const itemEl = document.getElementById('currentItem');
         const totalItemsEl = document.getElementById('totalItems');
         const timeEl = document.getElementById('elapsedTime');
+        const rateEl = document.getElementById('itemsPerSecond');
+        const etaEl = document.getElementById('etaTime');
         
         if (fillEl) fillEl.style.width = percentage + '%';
         if (percentageEl) percentageEl.textContent = percentage + '%';
@@ -699,6 +912,8 @@ function showProgressModal(taskId) {
         if (itemEl) itemEl.textContent = data.current_item || 0;
         if (totalItemsEl) totalItemsEl.textContent = data.total_items || 0;
         if (timeEl) timeEl.textContent = data.elapsed_time || 0;
+        if (rateEl) rateEl.textContent = data.items_per_second ? data.items_per_second : '-';
+        if (etaEl) etaEl.textContent = formatEta(data.eta_seconds);
         
         // 如果完成，触发下载 - 检查多种完成状态
         if ((data.status === 'completed' || percentage >= 100) && !downloadTriggered) {
@@ -706,10 +921,7 @@ function showProgressModal(taskId) {
             downloadTriggered = true;
             
             // 停止所有轮询和SSE连接
-            if (pollingInterval) {
-                clearInterval(pollingInterval);
-                pollingInterval = null;
-            }
+            cancelPolling();
             
             const closeEl = document.getElementById('closeProgress');
             if (closeEl) closeEl.style.display = 'block';
@@ -755,14 +967,19 @@ function showProgressModal(taskId) {
             const closeEl = document.getElementById('closeProgress');
             if (closeEl) closeEl.style.display = 'block';
             isGeneratingCSV = false;
-            if (pollingInterval) {
-                clearInterval(pollingInterval);
-                pollingInterval = null;
-            }
+            cancelPolling();
         }
     }
 }
 
+// 剩余秒数格式化为「X分Y秒」
+function formatEta(seconds) {
+    if (seconds === null || seconds === undefined) return '-';
+    const minutes = Math.floor(seconds / 60);
+    const rest = Math.round(seconds % 60);
+    return minutes > 0 ? `${minutes}分${rest}秒` : `${rest}秒`;
+}
+
 function closeProgressModal() {
     const modal = document.getElementById('progressModal');
     if (modal) {
@@ -2,14 +2,24 @@
 工具类模块
 """
 from .ssl_utils import create_ssl_session
-from .progress_manager import progress_manager, TaskStatus, ProgressInfo
+from .http_pool import http_pool, SharedHTTPPool
+from .progress_manager import progress_manager, TaskStatus, ProgressInfo, ProgressReporter
 from .decorators import login_required, handle_api_errors
+from .temp_janitor import temp_janitor, TempFileJanitor
+from .single_flight import single_flight, SingleFlight
 
 __all__ = [
     'create_ssl_session', 
+    'http_pool',
+    'SharedHTTPPool',
     'progress_manager', 
     'TaskStatus', 
     'ProgressInfo',
+    'ProgressReporter',
     'login_required',
-    'handle_api_errors'
+    'handle_api_errors',
+    'temp_janitor',
+    'TempFileJanitor',
+    'single_flight',
+    'SingleFlight'
 ]
@@ -0,0 +1,104 @@
+"""
+导出文件缓存 - 按输入数据指纹缓存生成好的CSV/XLSX，重复下载时直接返回
+"""
+import json
+import hashlib
+import threading
+import logging
+from collections import OrderedDict
+from typing import Any, Dict, Iterable, Optional
+
+logger = logging.getLogger(__name__)
+
+
+def fingerprint(kind: str, rows: Iterable, **options) -> str:
+    """输入数据和格式选项的SHA-256指纹（ItemRecord按to_dict计算）"""
+    digest = hashlib.sha256(kind.encode('utf-8'))
+    digest.update(json.dumps(options, sort_keys=True, default=str).encode('utf-8'))
+    for row in rows:
+        if hasattr(row, 'to_dict'):
+            row = row.to_dict()
+        digest.update(json.dumps(row, sort_keys=True, ensure_ascii=False, default=str).encode('utf-8'))
+        digest.update(b'\n')
+    return digest.hexdigest()
+
+
+class ArtifactCache:
+    """按总字节数上限LRU淘汰的导出文件缓存"""
+    
+    def __init__(self, max_bytes: int = 128 * 1024 * 1024, enabled: bool = True):
+        self.max_bytes = max_bytes
+        self.enabled = enabled
+        # 键 -> (值, 计入上限的字节数)
+        self._entries: 'OrderedDict[str, tuple]' = OrderedDict()
+        self._bytes = 0
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+    
+    def configure(self, max_bytes: int = None, enabled: bool = None) -> None:
+        if max_bytes is not None:
+            self.max_bytes = max_bytes
+        if enabled is not None:
+            self.enabled = enabled
+        if not self.enabled:
+            self.clear()
+    
+    def get(self, key: str) -> Optional[Any]:
+        if not self.enabled:
+            return None
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return entry[0]
+    
+    def put(self, key: str, value: Any, size: int = None) -> bool:
+        """保存值（bytes按长度计入上限），超过上限的单个值不缓存"""
+        if not self.enabled:
+            return False
+        if size is None:
+            size = len(value)
+        if size > self.max_bytes:
+            logger.debug(f"导出文件过大，不缓存: {size} bytes")
+            return False
+        with self._lock:
+            old = self._entries.pop(key, None)
+            if old is not None:
+                self._bytes -= old[1]
+            self._entries[key] = (value, size)
+            self._bytes += size
+            while self._bytes > self.max_bytes and self._entries:
+                _, (_, evicted_size) = self._entries.popitem(last=False)
+                self._bytes -= evicted_size
+                self.evictions += 1
+        return True
+    
+    def discard(self, key: str) -> None:
+        with self._lock:
+            old = self._entries.pop(key, None)
+            if old is not None:
+                self._bytes -= old[1]
+    
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+            self._bytes = 0
+    
+    def stats(self) -> Dict:
+        with self._lock:
+            return {
+                'entries': len(self._entries),
+                'bytes': self._bytes,
+                'hits': self.hits,
+                'misses': self.misses,
+                'evictions': self.evictions
+            }
+
+
+# 导出文件缓存（每个工作进程一份）
+artifact_cache = ArtifactCache()
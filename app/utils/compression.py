@@ -0,0 +1,89 @@
+"""
+HTTP响应压缩 - 超过阈值的JSON/HTML等文本响应按Accept-Encoding进行br/gzip压缩
+
+文件下载（send_file）和SSE等流式响应不压缩；静态文件由static_assets提供预压缩版本。
+"""
+import gzip
+import logging
+
+try:
+    import brotli
+except ImportError:  # 未安装Brotli时只使用gzip
+    brotli = None
+
+from flask import request
+
+logger = logging.getLogger(__name__)
+
+COMPRESSIBLE_MIMETYPES = frozenset({
+    'application/json',
+    'text/html',
+    'text/plain',
+    'text/css',
+    'text/javascript',
+    'application/javascript'
+})
+
+
+def available_encodings() -> list:
+    """本进程支持的压缩方式（按优先顺序）"""
+    return ['br', 'gzip'] if brotli is not None else ['gzip']
+
+
+def compress_bytes(data: bytes, encoding: str, level: int = 6, brotli_quality: int = 4) -> bytes:
+    if encoding == 'br':
+        return brotli.compress(data, quality=brotli_quality)
+    return gzip.compress(data, compresslevel=level, mtime=0)
+
+
+class ResponseCompressor:
+    """after_request钩子，对可压缩的响应进行压缩"""
+    
+    def __init__(self, min_size: int = 1024, level: int = 6, brotli_quality: int = 4, enabled: bool = True):
+        self.min_size = min_size
+        self.level = level
+        self.brotli_quality = brotli_quality
+        self.enabled = enabled
+    
+    def init_app(self, app) -> None:
+        config = app.config
+        self.enabled = config.get('COMPRESS_ENABLED', True)
+        self.min_size = config.get('COMPRESS_MIN_SIZE', 1024)
+        self.level = config.get('COMPRESS_LEVEL', 6)
+        self.brotli_quality = config.get('COMPRESS_BROTLI_QUALITY', 4)
+        app.after_request(self.compress)
+    
+    def _should_compress(self, response) -> bool:
+        return (
+            self.enabled
+            and 200 <= response.status_code < 300
+            and response.status_code != 204
+            and not response.direct_passthrough
+            and not response.is_streamed
+            and 'Content-Encoding' not in response.headers
+            and response.mimetype in COMPRESSIBLE_MIMETYPES
+        )
+    
+    def compress(self, response):
+        if not self._should_compress(response):
+            return response
+        data = response.get_data()
+        if len(data) < self.min_size:
+            return response
+        
+        response.vary.add('Accept-Encoding')
+        encoding = request.accept_encodings.best_match(available_encodings())
+        if encoding is None:
+            return response
+        
+        response.set_data(compress_bytes(data, encoding, self.level, self.brotli_quality))
+        response.headers['Content-Encoding'] = encoding
+        # 压缩后字节不同，强ETag改为弱ETag（If-None-Match按弱比较）
+        etag, weak = response.get_etag()
+        if etag and not weak:
+            response.set_etag(etag, weak=True)
+        return response
+
+
+# 全局响应压缩器
+response_compressor = ResponseCompressor()
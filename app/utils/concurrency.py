@@ -0,0 +1,300 @@
+"""
+并发后端 - 按gunicorn工作进程类型选择gevent、线程或asyncio实现
+
+XMLService的并发抓取、tasks.py的后台作业和ProgressManager的锁都通过
+这里的后端创建，避免在gevent工作进程中混用真实OS线程、阻塞sleep和
+阻塞子进程调用。
+
+  - thread:  ThreadPoolExecutor / threading.Thread / time.sleep
+  - gevent:  greenlet + 信号量限流 / gevent.sleep / gevent.subprocess
+  - asyncio: 每个进程一个事件循环线程，协程函数原生运行，
+             阻塞函数在受限的线程池中运行
+  - auto:    socket已被gevent monkey patch（gunicorn gevent工作进程）时用gevent，否则用thread
+
+gunicorn预加载应用后才fork并打补丁，因此后端在每个进程首次使用时才确定。
+"""
+import os
+import time
+import asyncio
+import threading
+import subprocess
+import logging
+from concurrent.futures import ThreadPoolExecutor, wait as wait_futures, FIRST_COMPLETED
+from typing import Callable, Iterable, List, Optional, Set
+
+logger = logging.getLogger(__name__)
+
+BACKENDS = ('thread', 'gevent', 'asyncio')
+
+
+class _ThreadExecutor:
+    """线程池执行器"""
+    
+    def __init__(self, max_workers: int):
+        self._pool = ThreadPoolExecutor(max_workers=max_workers)
+    
+    def submit(self, fn: Callable, *args):
+        return self._pool.submit(fn, *args)
+    
+    def wait_any(self, futures: Iterable) -> Set:
+        """等待至少一个任务完成，返回已完成的集合"""
+        done, _ = wait_futures(futures, return_when=FIRST_COMPLETED)
+        return done
+    
+    def map(self, fn: Callable, iterable: Iterable) -> List:
+        return list(self._pool.map(fn, iterable))
+    
+    def shutdown(self) -> None:
+        self._pool.shutdown(wait=True)
+    
+    def __enter__(self):
+        return self
+    
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self.shutdown()
+
+
+class ThreadBackend:
+    """真实OS线程"""
+    
+    name = 'thread'
+    
+    def spawn(self, fn: Callable, *args, **kwargs):
+        thread = threading.Thread(target=fn, args=args, kwargs=kwargs, daemon=True)
+        thread.start()
+        return thread
+    
+    def executor(self, max_workers: int) -> _ThreadExecutor:
+        return _ThreadExecutor(max_workers)
+    
+    def sleep(self, seconds: float) -> None:
+        time.sleep(seconds)
+    
+    def lock(self):
+        return threading.Lock()
+    
+    def semaphore(self, value: int):
+        return threading.BoundedSemaphore(value)
+    
+    def run_subprocess(self, args, **kwargs) -> subprocess.CompletedProcess:
+        return subprocess.run(args, **kwargs)
+
+
+class _GreenletFuture:
+    """让greenlet提供与concurrent.futures.Future相同的result()/done()接口"""
+    
+    __slots__ = ('greenlet',)
+    
+    def __init__(self, greenlet):
+        self.greenlet = greenlet
+    
+    def result(self):
+        return self.greenlet.get()
+    
+    def done(self) -> bool:
+        return self.greenlet.ready()
+
+
+class _GeventExecutor:
+    """greenlet执行器，用信号量限制同时运行的数量"""
+    
+    def __init__(self, gevent, max_workers: int):
+        self._gevent = gevent
+        self._semaphore = gevent.lock.BoundedSemaphore(max_workers)
+        self._greenlets = []
+    
+    def _run(self, fn: Callable, args):
+        with self._semaphore:
+            return fn(*args)
+    
+    def submit(self, fn: Callable, *args) -> _GreenletFuture:
+        greenlet = self._gevent.spawn(self._run, fn, args)
+        self._greenlets.append(greenlet)
+        return _GreenletFuture(greenlet)
+    
+    def wait_any(self, futures: Iterable) -> Set:
+        by_greenlet = {future.greenlet: future for future in futures}
+        self._gevent.wait(list(by_greenlet), count=1)
+        return {future for greenlet, future in by_greenlet.items() if greenlet.ready()}
+    
+    def map(self, fn: Callable, iterable: Iterable) -> List:
+        return [future.result() for future in [self.submit(fn, item) for item in iterable]]
+    
+    def shutdown(self) -> None:
+        self._gevent.joinall(self._greenlets)
+        self._greenlets = []
+    
+    def __enter__(self):
+        return self
+    
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self.shutdown()
+
+
+class GeventBackend:
+    """gevent协程（gunicorn gevent工作进程）"""
+    
+    name = 'gevent'
+    
+    def __init__(self):
+        import gevent
+        import gevent.lock
+        import gevent.subprocess
+        self._gevent = gevent
+    
+    def spawn(self, fn: Callable, *args, **kwargs):
+        return self._gevent.spawn(fn, *args, **kwargs)
+    
+    def executor(self, max_workers: int) -> _GeventExecutor:
+        return _GeventExecutor(self._gevent, max_workers)
+    
+    def sleep(self, seconds: float) -> None:
+        self._gevent.sleep(seconds)
+    
+    def lock(self):
+        return self._gevent.lock.BoundedSemaphore(1)
+    
+    def semaphore(self, value: int):
+        return self._gevent.lock.BoundedSemaphore(value)
+    
+    def run_subprocess(self, args, **kwargs) -> subprocess.CompletedProcess:
+        return self._gevent.subprocess.run(args, **kwargs)
+
+
+class _AsyncioExecutor:
+    """在事件循环中调度的执行器，返回concurrent.futures.Future"""
+    
+    def __init__(self, loop: asyncio.AbstractEventLoop, max_workers: int):
+        self._loop = loop
+        self._max_workers = max_workers
+        self._semaphore: Optional[asyncio.Semaphore] = None
+        self._threads = ThreadPoolExecutor(max_workers=max_workers)
+    
+    async def _run(self, fn: Callable, args):
+        if self._semaphore is None:
+            self._semaphore = asyncio.Semaphore(self._max_workers)
+        async with self._semaphore:
+            if asyncio.iscoroutinefunction(fn):
+                return await fn(*args)
+            return await self._loop.run_in_executor(self._threads, fn, *args)
+    
+    def submit(self, fn: Callable, *args):
+        return asyncio.run_coroutine_threadsafe(self._run(fn, args), self._loop)
+    
+    def wait_any(self, futures: Iterable) -> Set:
+        done, _ = wait_futures(futures, return_when=FIRST_COMPLETED)
+        return done
+    
+    def map(self, fn: Callable, iterable: Iterable) -> List:
+        return [future.result() for future in [self.submit(fn, item) for item in iterable]]
+    
+    def shutdown(self) -> None:
+        self._threads.shutdown(wait=True)
+    
+    def __enter__(self):
+        return self
+    
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self.shutdown()
+
+
+class AsyncioBackend(ThreadBackend):
+    """每个进程一个后台事件循环
+    
+    与线程后端的区别只在于协程函数的调度和等待方式：协程函数提交到事件循环，
+    执行器的任务在事件循环中排队限流。阻塞函数、sleep、锁和子进程调用
+    都运行在真实OS线程上，直接沿用ThreadBackend的实现。
+    """
+    
+    name = 'asyncio'
+    
+    def __init__(self):
+        self._loop = asyncio.new_event_loop()
+        self._thread = threading.Thread(target=self._loop.run_forever, name='asyncio-backend', daemon=True)
+        self._thread.start()
+    
+    def spawn(self, fn: Callable, *args, **kwargs):
+        if asyncio.iscoroutinefunction(fn):
+            return asyncio.run_coroutine_threadsafe(fn(*args, **kwargs), self._loop)
+        # 长时间运行的阻塞作业使用独立线程，避免占满事件循环的默认线程池
+        return super().spawn(fn, *args, **kwargs)
+    
+    def executor(self, max_workers: int) -> _AsyncioExecutor:
+        return _AsyncioExecutor(self._loop, max_workers)
+
+
+def detect_backend() -> str:
+    """当前进程已被gevent monkey patch时返回gevent，否则返回thread"""
+    try:
+        from gevent import monkey
+    except ImportError:
+        return 'thread'
+    return 'gevent' if monkey.is_module_patched('socket') else 'thread'
+
+
+class Concurrency:
+    """按配置在每个进程中延迟创建并发后端"""
+    
+    def __init__(self, backend_name: str = 'auto'):
+        self.backend_name = backend_name
+        self._backend = None
+        self._pid: Optional[int] = None
+        self._generation = 0
+        self._guard = threading.Lock()
+    
+    def init_app(self, app) -> None:
+        self.configure(app.config.get('CONCURRENCY_BACKEND', 'auto'))
+    
+    def configure(self, backend_name: str) -> None:
+        backend_name = (backend_name or 'auto').lower()
+        if backend_name != 'auto' and backend_name not in BACKENDS:
+            raise ValueError(f'不支持的并发后端: {backend_name}')
+        with self._guard:
+            self.backend_name = backend_name
+            self._backend = None
+            self._generation += 1
+    
+    @property
+    def backend(self):
+        if self._backend is not None and self._pid == os.getpid():
+            return self._backend
+        with self._guard:
+            if self._backend is None or self._pid != os.getpid():
+                name = detect_backend() if self.backend_name == 'auto' else self.backend_name
+                self._backend = {'thread': ThreadBackend, 'gevent': GeventBackend, 'asyncio': AsyncioBackend}[name]()
+                self._pid = os.getpid()
+                self._generation += 1
+                logger.info(f"并发后端: {name} (pid {self._pid})")
+            return self._backend
+    
+    @property
+    def generation(self) -> int:
+        """后端代数：切换后端或fork后重新创建后端时递增，用于使缓存的锁失效"""
+        self.backend
+        return self._generation
+    
+    @property
+    def name(self) -> str:
+        return self.backend.name
+    
+    def spawn(self, fn: Callable, *args, **kwargs):
+        return self.backend.spawn(fn, *args, **kwargs)
+    
+    def executor(self, max_workers: int):
+        return self.backend.executor(max_workers)
+    
+    def sleep(self, seconds: float) -> None:
+        self.backend.sleep(seconds)
+    
+    def lock(self):
+        return self.backend.lock()
+    
+    def semaphore(self, value: int):
+        return self.backend.semaphore(value)
+    
+    def run_subprocess(self, args, **kwargs) -> subprocess.CompletedProcess:
+        return self.backend.run_subprocess(args, **kwargs)
+
+
+# 全局并发后端
+concurrency = Concurrency()
@@ -1,9 +1,11 @@
 """
 装饰器工具
 """
+import hmac
 import functools
+import ipaddress
 import logging
-from flask import session, jsonify, request
+from flask import session, jsonify, request, current_app
 from typing import Callable, Any
 
 logger = logging.getLogger(__name__)
@@ -17,10 +19,78 @@ def login_required(f: Callable) -> Callable:
             if request.is_json:
                 return jsonify({'error': 'ログインが必要です'}), 401
             return jsonify({'error': 'Authentication required'}), 401
+        _refresh_session_token()
         return f(*args, **kwargs)
     return decorated_function
 
 
+def _refresh_session_token() -> None:
+    """session中的用户令牌临近过期时刷新，并把新令牌写回session
+    
+    与后台任务共享TokenManager中的AccessToken，任务中已刷新的令牌也会写回，
+    之后的请求不再重复刷新。
+    """
+    token_info = session['ebay_token']
+    if not token_info.get('refresh_token'):
+        return
+    from app.services.token_service import token_manager
+    token = token_manager.for_session_token(token_info, current_app.config)
+    token.current()
+    if token.access_token != token_info.get('access_token'):
+        session['ebay_token'] = {**token_info, **token.to_session()}
+
+
+def admin_required(f: Callable) -> Callable:
+    """管理员验证装饰器（X-Admin-Token请求头，未配置ADMIN_TOKEN时接口不可用）"""
+    @functools.wraps(f)
+    def decorated_function(*args, **kwargs):
+        admin_token = current_app.config.get('ADMIN_TOKEN')
+        if not admin_token:
+            return jsonify({'error': 'Not found'}), 404
+        provided = request.headers.get('X-Admin-Token', '')
+        if not hmac.compare_digest(provided.encode(), admin_token.encode()):
+            logger.warning(f"管理接口认证失败: {request.path}")
+            return jsonify({'error': 'アクセスが拒否されました'}), 403
+        return f(*args, **kwargs)
+    return decorated_function
+
+
+def metrics_access_required(f: Callable) -> Callable:
+    """指标接口访问控制
+    
+    请求带有与METRICS_TOKEN一致的Bearer令牌，或来源地址在METRICS_ALLOWED_NETWORKS
+    （逗号分隔的CIDR）内时允许访问，默认只允许本机。
+    """
+    @functools.wraps(f)
+    def decorated_function(*args, **kwargs):
+        metrics_token = current_app.config.get('METRICS_TOKEN')
+        if metrics_token:
+            provided = request.headers.get('Authorization', '')
+            if hmac.compare_digest(provided.encode(), f'Bearer {metrics_token}'.encode()):
+                return f(*args, **kwargs)
+        if _address_allowed(request.remote_addr, current_app.config.get('METRICS_ALLOWED_NETWORKS', '')):
+            return f(*args, **kwargs)
+        logger.warning(f"指标接口访问被拒绝: {request.remote_addr}")
+        return jsonify({'error': 'アクセスが拒否されました'}), 403
+    return decorated_function
+
+
+def _address_allowed(remote_addr: str, networks: str) -> bool:
+    try:
+        address = ipaddress.ip_address(remote_addr or '')
+    except ValueError:
+        return False
+    for network in (n.strip() for n in networks.split(',')):
+        if not network:
+            continue
+        try:
+            if address in ipaddress.ip_network(network, strict=False):
+                return True
+        except ValueError:
+            logger.warning(f"METRICS_ALLOWED_NETWORKS中的网段无效: {network}")
+    return False
+
+
 def handle_api_errors(f: Callable) -> Callable:
     """API错误处理装饰器"""
     @functools.wraps(f)
@@ -42,12 +112,19 @@ def handle_api_errors(f: Callable) -> Callable:
     return decorated_function
 
 
+def is_valid_task_id(task_id: Any) -> bool:
+    """任务ID检查（用作缓存和临时文件名的键，不允许路径分隔符）"""
+    if not task_id or not isinstance(task_id, str) or len(task_id.strip()) == 0:
+        return False
+    return '/' not in task_id and '\\' not in task_id
+
+
 def validate_task_id(f: Callable) -> Callable:
     """任务ID验证装饰器"""
     @functools.wraps(f)
     def decorated_function(*args, **kwargs):
         task_id = kwargs.get('task_id') or request.view_args.get('task_id')
-        if not task_id or not isinstance(task_id, str) or len(task_id.strip()) == 0:
+        if not is_valid_task_id(task_id):
             return jsonify({'error': '有効なタスクIDが必要です'}), 400
         return f(*args, **kwargs)
     return decorated_function
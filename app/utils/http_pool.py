@@ -0,0 +1,137 @@
+"""
+进程级共享HTTP连接池 - 所有EbayService实例复用同一组TCP/TLS连接
+"""
+import os
+import socket
+import threading
+import itertools
+import logging
+from typing import Dict, Optional
+
+import requests
+from urllib3.connection import HTTPConnection
+
+from app.utils.ssl_utils import NoSSLAdapter
+
+logger = logging.getLogger(__name__)
+
+
+class PooledSession(requests.Session):
+    """带默认超时和请求计数的会话"""
+    
+    def __init__(self, timeout=None):
+        super().__init__()
+        self.default_timeout = timeout
+        self._request_counter = itertools.count()
+        self.request_count = 0
+    
+    def request(self, method, url, **kwargs):
+        kwargs.setdefault('timeout', self.default_timeout)
+        # itertools.count的next()是原子操作，热路径上不需要加锁
+        self.request_count = next(self._request_counter) + 1
+        return super().request(method, url, **kwargs)
+
+
+class SharedHTTPPool:
+    """共享连接池
+    
+    会话在每个进程内首次使用时创建（gunicorn预加载后fork的工作进程不会共享父进程的套接字）。
+    urllib3连接池本身是线程安全的，在gevent下线程锁会被monkey patch为协程锁。
+    """
+    
+    DEFAULTS = {
+        'HTTP_POOL_CONNECTIONS': 10,
+        'HTTP_POOL_MAXSIZE': 20,
+        'HTTP_POOL_BLOCK': False,
+        'HTTP_CONNECT_TIMEOUT': 5,
+        'HTTP_READ_TIMEOUT': 60,
+        'HTTP_TCP_KEEPALIVE': True,
+        'HTTP_MAX_RETRIES': 0
+    }
+    
+    def __init__(self):
+        self.settings = dict(self.DEFAULTS)
+        self._session: Optional[PooledSession] = None
+        self._adapter: Optional[NoSSLAdapter] = None
+        self._pid: Optional[int] = None
+        self._lock = threading.Lock()
+    
+    def init_app(self, app) -> None:
+        self.configure(app.config)
+    
+    def configure(self, config) -> None:
+        """更新连接池配置（已创建的会话会在下次使用时重建）"""
+        for key in self.DEFAULTS:
+            if config.get(key) is not None:
+                self.settings[key] = config.get(key)
+        self.close()
+    
+    @property
+    def timeout(self):
+        return (self.settings['HTTP_CONNECT_TIMEOUT'], self.settings['HTTP_READ_TIMEOUT'])
+    
+    def get_session(self) -> PooledSession:
+        """获取当前进程的共享会话"""
+        session = self._session
+        if session is not None and self._pid == os.getpid():
+            return session
+        with self._lock:
+            if self._session is None or self._pid != os.getpid():
+                self._session, self._adapter = self._create_session()
+                self._pid = os.getpid()
+            return self._session
+    
+    def _create_session(self):
+        socket_options = None
+        if self.settings['HTTP_TCP_KEEPALIVE']:
+            socket_options = HTTPConnection.default_socket_options + [
+                (socket.SOL_SOCKET, socket.SO_KEEPALIVE, 1)
+            ]
+        adapter = NoSSLAdapter(
+            socket_options=socket_options,
+            pool_connections=int(self.settings['HTTP_POOL_CONNECTIONS']),
+            pool_maxsize=int(self.settings['HTTP_POOL_MAXSIZE']),
+            pool_block=bool(self.settings['HTTP_POOL_BLOCK']),
+            max_retries=int(self.settings['HTTP_MAX_RETRIES'])
+        )
+        session = PooledSession(timeout=self.timeout)
+        session.verify = False
+        session.mount('https://', adapter)
+        session.mount('http://', adapter)
+        logger.info(f"创建共享HTTP连接池 (pid={os.getpid()}, maxsize={self.settings['HTTP_POOL_MAXSIZE']})")
+        return session, adapter
+    
+    def stats(self) -> Dict:
+        """连接复用统计"""
+        session, adapter = self._session, self._adapter
+        if session is None or adapter is None or self._pid != os.getpid():
+            return {'requests': 0, 'connections_opened': 0, 'connections_reused': 0, 'pools': 0}
+        
+        pools = adapter.poolmanager.pools
+        connections_opened = 0
+        pool_count = 0
+        for key in list(pools.keys()):
+            pool = pools.get(key)
+            if pool is None:
+                continue
+            pool_count += 1
+            connections_opened += getattr(pool, 'num_connections', 0)
+        
+        return {
+            'requests': session.request_count,
+            'connections_opened': connections_opened,
+            'connections_reused': max(0, session.request_count - connections_opened),
+            'pools': pool_count
+        }
+    
+    def close(self) -> None:
+        with self._lock:
+            if self._session is not None and self._pid == os.getpid():
+                self._session.close()
+            self._session = None
+            self._adapter = None
+            self._pid = None
+
+
+# 全局共享连接池
+http_pool = SharedHTTPPool()
@@ -0,0 +1,97 @@
+"""
+任务摘要 - 任务结束时持久化各阶段耗时、处理速度和结果
+
+摘要保存在TEMP_FOLDER/job_summaries下，临时文件清理器只清理TEMP_FOLDER
+顶层的文件，因此进度记录被回收后仍可查询。
+"""
+import os
+import json
+import logging
+from typing import Dict, Optional
+
+from app.utils.progress_manager import progress_manager, ProgressInfo, TaskStatus
+
+logger = logging.getLogger(__name__)
+
+
+def build_summary(progress: ProgressInfo) -> Dict:
+    """根据结束的任务进度生成摘要"""
+    stages = progress.stage_breakdown()
+    processing = next((stage for stage in stages if stage['stage'] == TaskStatus.PROCESSING.value), None)
+    items_per_second = None
+    if processing and processing['duration'] > 0:
+        items_per_second = round(progress.current_item / processing['duration'], 2)
+    
+    return {
+        'task_id': progress.task_id,
+        'status': progress.status.value,
+        'message': progress.formatted_message,
+        'started_at': progress.start_time,
+        'finished_at': progress.end_time,
+        'elapsed_time': round(progress.elapsed_time, 1),
+        'total_items': progress.total_items,
+        'processed_items': progress.current_item,
+        'unfetched_count': len(progress.unfetched_item_ids),
+        'items_per_second': items_per_second,
+        'stages': stages
+    }
+
+
+class JobSummaryStore:
+    """任务摘要的保存和读取"""
+    
+    def __init__(self, folder: str = None):
+        self.folder = folder
+    
+    def init_app(self, app) -> None:
+        temp_folder = app.config.get('TEMP_FOLDER')
+        self.folder = os.path.join(temp_folder, 'job_summaries') if temp_folder else None
+        progress_manager.add_listener(self._on_progress)
+    
+    def _path(self, task_id: str) -> Optional[str]:
+        if not self.folder:
+            return None
+        return os.path.join(self.folder, f'{task_id}.json')
+    
+    def _on_progress(self, progress: ProgressInfo) -> None:
+        if progress.is_finished:
+            self.save(progress)
+    
+    def save(self, progress: ProgressInfo) -> Optional[str]:
+        """写入摘要，返回文件路径"""
+        path = self._path(progress.task_id)
+        if path is None:
+            return None
+        summary = build_summary(progress)
+        tmp_path = f'{path}.{os.getpid()}.tmp'
+        try:
+            os.makedirs(self.folder, exist_ok=True)
+            with open(tmp_path, 'w', encoding='utf-8') as f:
+                json.dump(summary, f, ensure_ascii=False)
+            os.replace(tmp_path, path)
+        except OSError as e:
+            logger.warning(f"写入任务摘要失败: {e}")
+            return None
+        
+        logger.info(
+            f"任务摘要 {progress.task_id}: {summary['status']}, 耗时 {summary['elapsed_time']}s, "
+            f"处理 {summary['processed_items']}/{summary['total_items']}件, "
+            f"速度 {summary['items_per_second']}件/秒"
+        )
+        return path
+    
+    def load(self, task_id: str) -> Optional[Dict]:
+        """读取摘要，不存在时返回None"""
+        path = self._path(task_id)
+        if path is None or not os.path.exists(path):
+            return None
+        try:
+            with open(path, 'r', encoding='utf-8') as f:
+                return json.load(f)
+        except (OSError, ValueError) as e:
+            logger.warning(f"读取任务摘要失败: {e}")
+            return None
+
+
+# 全局任务摘要实例
+job_summary_store = JobSummaryStore()
@@ -0,0 +1,170 @@
+"""
+服务端商品数据存储 - 替代在cookie会话中保存整个商品列表
+
+会话中只保存一个随机键，数据写入TEMP_FOLDER/listings下的JSON文件，
+所有gunicorn工作进程共享；每个进程另有一份按内存上限LRU淘汰的缓存。
+超过TTL的条目在读取或写入时清理，磁盘总量超过上限时删除最旧的条目。
+"""
+import os
+import re
+import json
+import time
+import secrets
+import threading
+import logging
+from collections import OrderedDict
+from typing import Any, List, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+_KEY_PATTERN = re.compile(r'^[A-Za-z0-9_-]{16,64}$')
+
+
+class ListingStore:
+    """带TTL和内存/磁盘上限的商品数据存储"""
+    
+    def __init__(self, folder: str = None, ttl: float = 3600,
+                 max_memory_bytes: int = 64 * 1024 * 1024, max_disk_bytes: int = 512 * 1024 * 1024):
+        self.folder = folder
+        self.ttl = ttl
+        self.max_memory_bytes = max_memory_bytes
+        self.max_disk_bytes = max_disk_bytes
+        # 键 -> (写入时间, 大小, 数据)
+        self._memory: 'OrderedDict[str, Tuple[float, int, Any]]' = OrderedDict()
+        self._memory_bytes = 0
+        self._lock = threading.Lock()
+    
+    def init_app(self, app) -> None:
+        config = app.config
+        temp_folder = config.get('TEMP_FOLDER')
+        self.folder = os.path.join(temp_folder, 'listings') if temp_folder else None
+        self.ttl = config.get('LISTING_STORE_TTL', 3600)
+        self.max_memory_bytes = int(config.get('LISTING_STORE_MEMORY_MB', 64)) * 1024 * 1024
+        self.max_disk_bytes = int(config.get('LISTING_STORE_DISK_MB', 512)) * 1024 * 1024
+    
+    def _path(self, key: str) -> Optional[str]:
+        if not self.folder or not key or not _KEY_PATTERN.match(key):
+            return None
+        return os.path.join(self.folder, f'{key}.json')
+    
+    def put(self, data: Any) -> str:
+        """保存数据，返回用于读取的新键"""
+        key = secrets.token_urlsafe(16)
+        path = self._path(key)
+        if path is None:
+            raise RuntimeError('ListingStoreが初期化されていません')
+        
+        payload = json.dumps(data, ensure_ascii=False, default=str).encode('utf-8')
+        if len(payload) > self.max_disk_bytes:
+            raise ValueError(f'データが大きすぎます ({len(payload) / 1024 / 1024:.1f}MB)')
+        
+        os.makedirs(self.folder, exist_ok=True)
+        tmp_path = f'{path}.{os.getpid()}.{threading.get_ident()}.tmp'
+        with open(tmp_path, 'wb') as f:
+            f.write(payload)
+        os.replace(tmp_path, path)
+        
+        self._remember(key, time.time(), len(payload), data)
+        self.sweep(keep=key)
+        logger.info(f"商品数据已保存: {key} ({len(payload)} bytes)")
+        return key
+    
+    def get(self, key: str) -> Optional[Any]:
+        """读取数据，不存在或已过期时返回None"""
+        path = self._path(key)
+        if path is None:
+            return None
+        now = time.time()
+        
+        with self._lock:
+            entry = self._memory.get(key)
+            if entry is not None and now - entry[0] <= self.ttl:
+                self._memory.move_to_end(key)
+                return entry[2]
+        
+        try:
+            stat = os.stat(path)
+            if now - stat.st_mtime > self.ttl:
+                self.delete(key)
+                return None
+            with open(path, 'rb') as f:
+                payload = f.read()
+            data = json.loads(payload)
+        except FileNotFoundError:
+            self._forget(key)
+            return None
+        except (OSError, ValueError) as e:
+            logger.warning(f"读取商品数据失败: {key} - {e}")
+            return None
+        
+        self._remember(key, stat.st_mtime, len(payload), data)
+        return data
+    
+    def delete(self, key: str) -> None:
+        self._forget(key)
+        path = self._path(key)
+        if path is None:
+            return
+        try:
+            os.remove(path)
+        except FileNotFoundError:
+            pass
+        except OSError as e:
+            logger.warning(f"删除商品数据失败: {key} - {e}")
+    
+    def _remember(self, key: str, stored_at: float, size: int, data: Any) -> None:
+        """放入进程内缓存，超过内存上限时按LRU淘汰（磁盘上的数据保留）"""
+        if size > self.max_memory_bytes:
+            self._forget(key)
+            return
+        with self._lock:
+            old = self._memory.pop(key, None)
+            if old is not None:
+                self._memory_bytes -= old[1]
+            self._memory[key] = (stored_at, size, data)
+            self._memory_bytes += size
+            while self._memory_bytes > self.max_memory_bytes and self._memory:
+                _, (_, evicted_size, _) = self._memory.popitem(last=False)
+                self._memory_bytes -= evicted_size
+    
+    def _forget(self, key: str) -> None:
+        with self._lock:
+            old = self._memory.pop(key, None)
+            if old is not None:
+                self._memory_bytes -= old[1]
+    
+    def sweep(self, now: float = None, keep: str = None) -> int:
+        """删除过期条目，磁盘总量超过上限时从最旧的开始删除，返回删除条数"""
+        if not self.folder or not os.path.isdir(self.folder):
+            return 0
+        now = now or time.time()
+        entries: List[Tuple[float, int, str]] = []
+        for entry in os.scandir(self.folder):
+            if not entry.name.endswith('.json'):
+                continue
+            try:
+                stat = entry.stat()
+            except OSError:
+                continue
+            entries.append((stat.st_mtime, stat.st_size, entry.name[:-len('.json')]))
+        
+        entries.sort()
+        total = sum(size for _, size, _ in entries)
+        removed = 0
+        for modified, size, key in entries:
+            if key == keep:
+                continue
+            if now - modified <= self.ttl and total <= self.max_disk_bytes:
+                continue
+            self.delete(key)
+            total -= size
+            removed += 1
+        return removed
+    
+    def stats(self) -> dict:
+        with self._lock:
+            return {'memory_entries': len(self._memory), 'memory_bytes': self._memory_bytes}
+
+
+# 全局商品数据存储实例
+listing_store = ListingStore()
@@ -0,0 +1,182 @@
+"""
+异步日志管道 - 调用线程只把日志记录放入队列，格式化和写文件在后台线程完成
+
+  - app logger只挂一个队列handler，文件和控制台handler由QueueListener在后台调用
+  - 入队时不格式化消息，%风格的参数在后台线程才拼接
+  - 队列满时丢弃并计数，不阻塞抓取循环
+  - 逐商品日志通过item_logger()获取，同一消息模板按时间窗口限流
+
+gunicorn预加载应用后fork，队列和后台线程在每个进程首次写日志时创建。
+"""
+import os
+import sys
+import time
+import queue
+import atexit
+import threading
+import logging
+from logging.handlers import QueueHandler, QueueListener, RotatingFileHandler
+from typing import Dict, List, Optional
+
+# 控制台输出沿用Flask默认handler的格式
+CONSOLE_FORMAT = '[%(asctime)s] %(levelname)s in %(module)s: %(message)s'
+
+
+class RateLimitFilter(logging.Filter):
+    """同一（logger, 级别, 消息模板）在window秒内最多放行burst条
+    
+    被抑制的条数附加在下一个窗口放行的第一条日志上。消息需使用%风格参数，
+    f-string会让每条消息的模板都不同而无法限流。
+    """
+    
+    MAX_KEYS = 1024
+    
+    def __init__(self, burst: int = 20, window: float = 10.0):
+        super().__init__()
+        self.burst = burst
+        self.window = window
+        # 键 -> [窗口开始时间, 窗口内条数, 被抑制条数]
+        self._counters: Dict[tuple, List] = {}
+        self._lock = threading.Lock()
+    
+    def filter(self, record: logging.LogRecord) -> bool:
+        key = (record.name, record.levelno, record.msg)
+        now = time.monotonic()
+        with self._lock:
+            counter = self._counters.get(key)
+            if counter is not None and now - counter[0] < self.window:
+                counter[1] += 1
+                if counter[1] > self.burst:
+                    counter[2] += 1
+                    return False
+                return True
+            suppressed = counter[2] if counter else 0
+            if len(self._counters) >= self.MAX_KEYS:
+                self._prune(now)
+            self._counters[key] = [now, 1, 0]
+        if suppressed:
+            record.msg = f'{record.msg} (前{self.window:g}秒内另有{suppressed}条相同日志被省略)'
+        return True
+    
+    def reset(self) -> None:
+        with self._lock:
+            self._counters.clear()
+    
+    def _prune(self, now: float) -> None:
+        for key in [key for key, counter in self._counters.items() if now - counter[0] >= self.window]:
+            del self._counters[key]
+
+
+class _ProcessQueueHandler(QueueHandler):
+    """把日志记录原样放入本进程的队列"""
+    
+    def __init__(self, pipeline: 'LogPipeline'):
+        super().__init__(None)
+        self.pipeline = pipeline
+    
+    def prepare(self, record: logging.LogRecord) -> logging.LogRecord:
+        # 同一进程内的队列无需序列化，消息留给后台线程格式化
+        return record
+    
+    def enqueue(self, record: logging.LogRecord) -> None:
+        try:
+            self.pipeline.queue_for_process().put_nowait(record)
+        except queue.Full:
+            self.pipeline.record_dropped()
+
+
+class LogPipeline:
+    """基于QueueHandler/QueueListener的日志管道"""
+    
+    def __init__(self, queue_size: int = 10000):
+        self.queue_size = queue_size
+        self.handlers: List[logging.Handler] = []
+        self.handler = _ProcessQueueHandler(self)
+        self.item_filter = RateLimitFilter()
+        self.dropped = 0
+        self._queue: Optional[queue.Queue] = None
+        self._listener: Optional[QueueListener] = None
+        self._pid: Optional[int] = None
+        self._lock = threading.Lock()
+        self._atexit_registered = False
+    
+    def init_app(self, app) -> None:
+        config = app.config
+        level = logging.getLevelName(str(config.get('LOG_LEVEL', 'INFO')).upper())
+        if not isinstance(level, int):
+            level = logging.INFO
+        self.stop()
+        self.queue_size = config.get('LOG_QUEUE_SIZE', 10000)
+        self.item_filter.burst = config.get('LOG_ITEM_BURST', 20)
+        self.item_filter.window = config.get('LOG_ITEM_WINDOW', 10.0)
+        
+        self.handlers = []
+        if config.get('LOG_CONSOLE', True):
+            console_handler = logging.StreamHandler(sys.stderr)
+            console_handler.setFormatter(logging.Formatter(CONSOLE_FORMAT))
+            self.handlers.append(console_handler)
+        log_file = config.get('LOG_FILE')
+        if log_file:
+            directory = os.path.dirname(log_file)
+            if directory:
+                os.makedirs(directory, exist_ok=True)
+            file_handler = RotatingFileHandler(
+                log_file,
+                maxBytes=config.get('LOG_FILE_MAX_BYTES', 10240000),
+                backupCount=config.get('LOG_FILE_BACKUP_COUNT', 10)
+            )
+            file_handler.setFormatter(logging.Formatter(config.get('LOG_FORMAT')))
+            self.handlers.append(file_handler)
+        
+        # 只保留队列handler（去掉Flask默认handler和其他同步handler）
+        for handler in list(app.logger.handlers):
+            app.logger.removeHandler(handler)
+        app.logger.addHandler(self.handler)
+        app.logger.setLevel(level)
+        
+        if not self._atexit_registered:
+            atexit.register(self.stop)
+            self._atexit_registered = True
+    
+    def queue_for_process(self) -> queue.Queue:
+        """返回本进程的队列，首次调用时启动后台线程"""
+        if self._queue is not None and self._pid == os.getpid():
+            return self._queue
+        with self._lock:
+            if self._queue is None or self._pid != os.getpid():
+                self._queue = queue.Queue(self.queue_size)
+                self._listener = QueueListener(self._queue, *self.handlers, respect_handler_level=True)
+                self._listener.start()
+                self._pid = os.getpid()
+            return self._queue
+    
+    def stop(self) -> None:
+        """写出队列中剩余的日志并停止后台线程"""
+        with self._lock:
+            listener = self._listener if self._pid == os.getpid() else None
+            self._listener = None
+            self._queue = None
+            self._pid = None
+        if listener is not None:
+            listener.stop()
+    
+    def record_dropped(self) -> None:
+        """队列满时由各调用线程计数（加锁，避免并发自增丢失计数）"""
+        with self._lock:
+            self.dropped += 1
+    
+    def stats(self) -> Dict:
+        current = self._queue if self._pid == os.getpid() else None
+        return {'queued': current.qsize() if current else 0, 'dropped': self.dropped}
+
+
+# 全局日志管道
+log_pipeline = LogPipeline()
+
+
+def item_logger(name: str) -> logging.Logger:
+    """逐商品日志使用的logger（<name>.items，按消息模板限流）"""
+    logger = logging.getLogger(f'{name}.items')
+    if log_pipeline.item_filter not in logger.filters:
+        logger.addFilter(log_pipeline.item_filter)
+    return logger
@@ -0,0 +1,271 @@
+"""
+Prometheus格式的进程内指标 - 计数器、仪表和直方图
+
+热路径上只做一次字典查找和加锁累加；文本格式在 /metrics 被请求时才生成。
+gunicorn多工作进程下每个进程各自统计，抓取时返回处理该请求的工作进程的数据。
+"""
+import time
+import bisect
+import threading
+import logging
+from contextlib import contextmanager
+from typing import Callable, Dict, Iterable, List, Optional, Sequence, Tuple
+
+logger = logging.getLogger(__name__)
+
+# 覆盖eBay API调用（数十毫秒到数十秒）和流水线各阶段
+DEFAULT_BUCKETS = (0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0, 120.0, 300.0)
+
+
+def _format_labels(labelnames: Sequence[str], labelvalues: Sequence[str], extra: str = '') -> str:
+    pairs = [f'{name}="{_escape(value)}"' for name, value in zip(labelnames, labelvalues)]
+    if extra:
+        pairs.append(extra)
+    return '{' + ','.join(pairs) + '}' if pairs else ''
+
+
+def _escape(value) -> str:
+    return str(value).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+
+
+def _format_value(value: float) -> str:
+    if value == float('inf'):
+        return '+Inf'
+    return repr(float(value))
+
+
+class _Metric:
+    """指标基类，按标签值分组保存数据"""
+    
+    type_name = 'untyped'
+    
+    def __init__(self, name: str, documentation: str, labelnames: Sequence[str] = (), registry=None):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self._lock = threading.Lock()
+        (registry if registry is not None else metrics_registry).register(self)
+    
+    def _key(self, labels: Dict[str, str]) -> Tuple[str, ...]:
+        return tuple(str(labels.get(name, '')) for name in self.labelnames)
+    
+    def collect(self) -> List[str]:
+        raise NotImplementedError
+
+
+class Counter(_Metric):
+    """只增不减的计数器"""
+    
+    type_name = 'counter'
+    
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self._values: Dict[Tuple[str, ...], float] = {}
+    
+    def inc(self, amount: float = 1, **labels) -> None:
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0.0) + amount
+    
+    def get(self, **labels) -> float:
+        return self._values.get(self._key(labels), 0.0)
+    
+    def collect(self) -> List[str]:
+        with self._lock:
+            values = list(self._values.items())
+        return [f'{self.name}{_format_labels(self.labelnames, key)} {_format_value(value)}' for key, value in values]
+
+
+class Gauge(_Metric):
+    """可增可减的当前值，也可以在抓取时由函数计算"""
+    
+    type_name = 'gauge'
+    
+    def __init__(self, *args, function: Optional[Callable[[], float]] = None, **kwargs):
+        super().__init__(*args, **kwargs)
+        self._values: Dict[Tuple[str, ...], float] = {}
+        self._function = function
+    
+    def set(self, value: float, **labels) -> None:
+        with self._lock:
+            self._values[self._key(labels)] = value
+    
+    def inc(self, amount: float = 1, **labels) -> None:
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0.0) + amount
+    
+    def dec(self, amount: float = 1, **labels) -> None:
+        self.inc(-amount, **labels)
+    
+    def get(self, **labels) -> float:
+        return self._values.get(self._key(labels), 0.0)
+    
+    @contextmanager
+    def track_inprogress(self, **labels):
+        """在代码块执行期间加一"""
+        self.inc(**labels)
+        try:
+            yield
+        finally:
+            self.dec(**labels)
+    
+    def collect(self) -> List[str]:
+        if self._function is not None:
+            return [f'{self.name} {_format_value(self._function())}']
+        with self._lock:
+            values = list(self._values.items())
+        return [f'{self.name}{_format_labels(self.labelnames, key)} {_format_value(value)}' for key, value in values]
+
+
+class Histogram(_Metric):
+    """累积分桶直方图"""
+    
+    type_name = 'histogram'
+    
+    def __init__(self, *args, buckets: Sequence[float] = DEFAULT_BUCKETS, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.buckets = tuple(sorted(buckets))
+        # 每组标签: [各桶计数..., +Inf计数, 总和]
+        self._values: Dict[Tuple[str, ...], List[float]] = {}
+    
+    def observe(self, value: float, **labels) -> None:
+        key = self._key(labels)
+        index = bisect.bisect_left(self.buckets, value)
+        with self._lock:
+            counts = self._values.get(key)
+            if counts is None:
+                counts = self._values[key] = [0] * (len(self.buckets) + 1) + [0.0]
+            counts[index] += 1
+            counts[-1] += value
+    
+    @contextmanager
+    def time(self, **labels):
+        """记录代码块的耗时"""
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(time.perf_counter() - start, **labels)
+    
+    def get_count(self, **labels) -> int:
+        counts = self._values.get(self._key(labels))
+        return int(sum(counts[:-1])) if counts else 0
+    
+    def collect(self) -> List[str]:
+        with self._lock:
+            values = [(key, list(counts)) for key, counts in self._values.items()]
+        lines = []
+        for key, counts in values:
+            cumulative = 0
+            for bound, count in zip(self.buckets + (float('inf'),), counts[:-1]):
+                cumulative += count
+                le = f'le="{_format_value(bound)}"'
+                lines.append(f'{self.name}_bucket{_format_labels(self.labelnames, key, le)} {_format_value(cumulative)}')
+            lines.append(f'{self.name}_sum{_format_labels(self.labelnames, key)} {_format_value(counts[-1])}')
+            lines.append(f'{self.name}_count{_format_labels(self.labelnames, key)} {_format_value(cumulative)}')
+        return lines
+
+
+class MetricsRegistry:
+    """指标注册表，负责生成Prometheus文本格式"""
+    
+    def __init__(self):
+        self._metrics: Dict[str, _Metric] = {}
+        self._collectors: List[Callable[[], Iterable[Tuple[str, str, str, Dict[str, str], float]]]] = []
+        self._lock = threading.Lock()
+        self.enabled = True
+    
+    def register(self, metric: _Metric) -> None:
+        with self._lock:
+            if metric.name in self._metrics:
+                raise ValueError(f'指标已注册: {metric.name}')
+            self._metrics[metric.name] = metric
+    
+    def add_collector(self, collector) -> None:
+        """注册抓取时调用的采集函数，返回 (名称, 类型, 说明, 标签, 值) 序列"""
+        with self._lock:
+            if collector not in self._collectors:
+                self._collectors.append(collector)
+    
+    def init_app(self, app) -> None:
+        self.enabled = app.config.get('METRICS_ENABLED', True)
+        # 缓存、连接池和进度管理器已有统计接口，抓取时读取即可
+        self.add_collector(_collect_runtime_stats)
+    
+    def render(self) -> str:
+        """生成Prometheus文本格式（0.0.4）"""
+        lines = []
+        for metric in list(self._metrics.values()):
+            lines.append(f'# HELP {metric.name} {metric.documentation}')
+            lines.append(f'# TYPE {metric.name} {metric.type_name}')
+            lines.extend(metric.collect())
+        
+        grouped: Dict[str, Tuple[str, str, List[str]]] = {}
+        for collector in list(self._collectors):
+            try:
+                samples = list(collector())
+            except Exception as e:
+                logger.warning(f"指标采集失败: {e}")
+                continue
+            for name, type_name, documentation, labels, value in samples:
+                entry = grouped.setdefault(name, (type_name, documentation, []))
+                entry[2].append(f'{name}{_format_labels(tuple(labels), tuple(labels.values()))} {_format_value(value)}')
+        for name, (type_name, documentation, samples) in grouped.items():
+            lines.append(f'# HELP {name} {documentation}')
+            lines.append(f'# TYPE {name} {type_name}')
+            lines.extend(samples)
+        return '\n'.join(lines) + '\n'
+
+
+def _collect_runtime_stats():
+    """进度管理器、Feed缓存、导出文件缓存和HTTP连接池的当前统计"""
+    from app.utils.progress_manager import progress_manager
+    from app.utils.response_cache import feed_cache
+    from app.utils.http_pool import http_pool
+    from app.utils.artifact_cache import artifact_cache
+    
+    yield 'wood_progress_tasks', 'gauge', 'ProgressManager中跟踪的任务数', {}, len(progress_manager)
+    
+    cache_stats = feed_cache.stats()
+    yield 'wood_feed_cache_entries', 'gauge', 'Feed API响应缓存条目数', {}, cache_stats['entries']
+    for event in ('hits', 'misses', 'coalesced', 'evictions'):
+        yield 'wood_feed_cache_events_total', 'counter', 'Feed API响应缓存事件数', {'event': event}, cache_stats[event]
+    
+    artifact_stats = artifact_cache.stats()
+    yield 'wood_artifact_cache_bytes', 'gauge', '导出文件缓存占用字节数', {}, artifact_stats['bytes']
+    for event in ('hits', 'misses', 'evictions'):
+        yield 'wood_artifact_cache_events_total', 'counter', '导出文件缓存事件数', {'event': event}, artifact_stats[event]
+    
+    pool_stats = http_pool.stats()
+    yield 'wood_http_pool_requests_total', 'counter', '共享HTTP连接池发出的请求数', {}, pool_stats['requests']
+    yield 'wood_http_pool_connections_opened', 'gauge', '共享HTTP连接池打开过的连接数', {}, pool_stats['connections_opened']
+
+
+# 全局注册表
+metrics_registry = MetricsRegistry()
+
+# eBay API调用
+ebay_request_seconds = Histogram(
+    'wood_ebay_request_duration_seconds', 'eBay API调用耗时', ['api', 'call']
+)
+ebay_requests_total = Counter(
+    'wood_ebay_requests_total', 'eBay API调用次数（按结果: success/failure/throttled）', ['api', 'call', 'outcome']
+)
+
+# 增强CSV流水线
+pipeline_stage_seconds = Histogram(
+    'wood_pipeline_stage_duration_seconds', '增强CSV生成各阶段耗时（download/extract/fetch/generate）', ['stage']
+)
+background_jobs = Gauge(
+    'wood_background_jobs', '正在运行的后台作业数', ['kind']
+)
+sse_streams = Gauge(
+    'wood_sse_active_streams', '当前打开的SSE进度推送连接数'
+)
+
+
+def record_ebay_call(api: str, call: str, seconds: float, outcome: str) -> None:
+    """记录一次eBay API调用的耗时和结果"""
+    ebay_request_seconds.observe(seconds, api=api, call=call)
+    ebay_requests_total.inc(api=api, call=call, outcome=outcome)
@@ -0,0 +1,203 @@
+"""
+任务级按需性能分析 - 采样分析运行中的任务，或对下一次运行启用cProfile
+
+- 采样：在指定秒数内定期读取任务所属线程（gevent下为greenlet）的调用栈，
+  输出flamegraph.pl / speedscope可读的折叠栈（collapsed stack）文本
+- cProfile：标记任务后，下一次运行该任务的工作进程在作业线程和抓取线程中
+  分别启用cProfile，合并后保存为.prof文件（可用snakeviz、flameprof等工具查看）
+
+未进行分析时，每个作业/商品只有一次字典增减和一次文件存在检查。
+采样只能看到本工作进程中的线程；标记通过TEMP_FOLDER中的文件跨进程共享。
+"""
+import os
+import sys
+import time
+import pstats
+import cProfile
+import threading
+import logging
+from collections import Counter
+from contextlib import contextmanager
+from typing import Dict, Optional, Tuple
+
+from app.utils.concurrency import concurrency
+
+try:
+    from greenlet import getcurrent as _current_greenlet
+except ImportError:  # 未安装greenlet时只按线程采样
+    _current_greenlet = None
+
+logger = logging.getLogger(__name__)
+
+
+def _collapse(frame) -> str:
+    """把调用栈转换为折叠栈格式（根在前，以分号分隔）"""
+    names = []
+    while frame is not None:
+        code = frame.f_code
+        names.append(f'{code.co_name} ({os.path.basename(code.co_filename)}:{code.co_firstlineno})')
+        frame = frame.f_back
+    return ';'.join(reversed(names))
+
+
+def render_collapsed(stacks: Counter) -> str:
+    """折叠栈文本，每行为「栈 次数」"""
+    return ''.join(f'{stack} {count}\n' for stack, count in stacks.most_common())
+
+
+class TaskProfiler:
+    """按任务ID对后台作业进行性能分析"""
+    
+    def __init__(self, output_dir: str = None):
+        self.output_dir = output_dir
+        # task_id -> {线程ID: [嵌套计数, greenlet]}
+        self._threads: Dict[str, Dict[int, list]] = {}
+        # 正在cProfile的任务 -> (作业线程ID, {抓取线程ID: Profile}，gevent下为None)
+        self._profiling: Dict[str, Tuple[int, Optional[Dict[int, cProfile.Profile]]]] = {}
+        self._lock = threading.Lock()
+    
+    def init_app(self, app) -> None:
+        temp_folder = app.config.get('TEMP_FOLDER')
+        self.output_dir = os.path.join(temp_folder, 'profiles') if temp_folder else None
+    
+    @contextmanager
+    def track(self, task_id: Optional[str]):
+        """在代码块执行期间把当前线程登记为任务的线程"""
+        if not task_id:
+            yield
+            return
+        ident = threading.get_ident()
+        greenlet = _current_greenlet() if _current_greenlet else None
+        with self._lock:
+            entry = self._threads.setdefault(task_id, {}).setdefault(ident, [0, greenlet])
+            entry[0] += 1
+            worker_profile = self._worker_profile_locked(task_id, ident) if entry[0] == 1 else None
+        if worker_profile is not None:
+            try:
+                worker_profile.enable()
+            except ValueError:
+                # Python 3.12起cProfile对所有线程生效，且同时只能启用一个
+                worker_profile = None
+        try:
+            yield
+        finally:
+            if worker_profile is not None:
+                worker_profile.disable()
+            with self._lock:
+                threads = self._threads.get(task_id, {})
+                entry = threads.get(ident)
+                if entry is not None:
+                    entry[0] -= 1
+                    if entry[0] <= 0:
+                        del threads[ident]
+                if not threads:
+                    self._threads.pop(task_id, None)
+    
+    def _worker_profile_locked(self, task_id: str, ident: int) -> Optional[cProfile.Profile]:
+        """任务正在cProfile时返回抓取线程自己的Profile（cProfile只记录启用它的线程）
+        
+        gevent下所有greenlet共用一个OS线程，作业的Profile已经覆盖全部greenlet，
+        再启用/停止抓取greenlet的Profile会替换并清除作业的Profile，因此不创建。
+        """
+        session = self._profiling.get(task_id)
+        if session is None or session[1] is None or session[0] == ident:
+            return None
+        return session[1].setdefault(ident, cProfile.Profile())
+    
+    def is_tracking(self, task_id: str) -> bool:
+        return task_id in self._threads
+    
+    def _task_threads(self, task_id: str) -> Dict[int, object]:
+        with self._lock:
+            return {ident: entry[1] for ident, entry in self._threads.get(task_id, {}).items()}
+    
+    def sample(self, task_id: str, seconds: float, interval: float = 0.01) -> Tuple[Counter, int]:
+        """在指定秒数内采样任务线程的调用栈，返回 (折叠栈计数, 采样轮数)"""
+        stacks = Counter()
+        rounds = 0
+        me = threading.get_ident()
+        deadline = time.monotonic() + seconds
+        while time.monotonic() < deadline:
+            threads = self._task_threads(task_id)
+            if threads:
+                frames = sys._current_frames()
+                for ident, greenlet in threads.items():
+                    if ident == me:
+                        continue
+                    # gevent下线程是greenlet，挂起中的greenlet通过gr_frame取得调用栈
+                    frame = getattr(greenlet, 'gr_frame', None) or frames.get(ident)
+                    if frame is not None:
+                        stacks[_collapse(frame)] += 1
+                rounds += 1
+            time.sleep(interval)
+        return stacks, rounds
+    
+    def _arm_path(self, task_id: str) -> Optional[str]:
+        if not self.output_dir:
+            return None
+        return os.path.join(self.output_dir, f'{task_id}.arm')
+    
+    def result_path(self, task_id: str) -> Optional[str]:
+        if not self.output_dir:
+            return None
+        return os.path.join(self.output_dir, f'{task_id}.prof')
+    
+    def arm(self, task_id: str) -> bool:
+        """标记任务，下一次运行时启用cProfile"""
+        path = self._arm_path(task_id)
+        if path is None:
+            return False
+        os.makedirs(self.output_dir, exist_ok=True)
+        with open(path, 'w', encoding='utf-8') as f:
+            f.write(str(time.time()))
+        return True
+    
+    @contextmanager
+    def profile_run(self, task_id: str):
+        """任务已被标记时，在代码块执行期间启用cProfile"""
+        path = self._arm_path(task_id)
+        if path is None or not os.path.exists(path):
+            yield
+            return
+        try:
+            os.remove(path)
+        except FileNotFoundError:
+            # 其他进程已经领取了这次标记
+            yield
+            return
+        
+        profile = cProfile.Profile()
+        try:
+            profile.enable()
+        except ValueError:
+            # Python 3.12起同时只能启用一个分析器，放弃本次分析而不是让任务失败
+            profile = None
+        if profile is None:
+            logger.warning(f"任务 {task_id} 无法启用cProfile（已有其他分析器在运行）")
+            yield
+            return
+        
+        logger.info(f"任务 {task_id} 启用cProfile")
+        # 只有抓取运行在真实OS线程上时才需要各线程自己的Profile
+        workers: Optional[Dict[int, cProfile.Profile]] = {} if concurrency.name != 'gevent' else None
+        with self._lock:
+            self._profiling[task_id] = (threading.get_ident(), workers)
+        try:
+            yield
+        finally:
+            profile.disable()
+            with self._lock:
+                self._profiling.pop(task_id, None)
+                worker_profiles = list(workers.values()) if workers else []
+            try:
+                stats = pstats.Stats(profile)
+                for worker_profile in worker_profiles:
+                    stats.add(worker_profile)
+                stats.dump_stats(self.result_path(task_id))
+                logger.info(f"任务 {task_id} 的cProfile结果已保存 (抓取线程 {len(worker_profiles)} 个)")
+            except (OSError, TypeError) as e:
+                logger.warning(f"保存cProfile结果失败: {e}")
+
+
+# 全局任务分析器实例
+task_profiler = TaskProfiler()
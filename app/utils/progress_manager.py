@@ -1,12 +1,21 @@
 import threading
 import time
-from typing import Dict, Optional
-from dataclasses import dataclass
+import logging
+from collections import deque
+from typing import Callable, Deque, Dict, List, Optional, Tuple
+from dataclasses import dataclass, field
 from enum import Enum
+from app.utils.concurrency import concurrency
+
+logger = logging.getLogger(__name__)
+
+# 计算处理速度的滑动窗口（进度上报次数）
+THROUGHPUT_WINDOW = 20
 
 
 class TaskStatus(Enum):
     PENDING = "pending"
+    WAITING_REPORT = "waiting_report"  # 等待eBay生成库存报告
     DOWNLOADING = "downloading"
     EXTRACTING = "extracting"
     PROCESSING = "processing"
@@ -25,6 +34,14 @@ class ProgressInfo:
     total_items: int
     message: str
     start_time: float
+    message_template: Optional[str] = None  # 延迟格式化的消息模板，读取时才渲染
+    end_time: Optional[float] = None
+    unfetched_item_ids: List[str] = field(default_factory=list)  # 时间预算用尽时未获取的ItemID
+    stages: List[Dict] = field(default_factory=list)  # 各阶段的开始/结束时间
+    items_per_second: float = 0.0  # 最近窗口内的平均处理速度
+    _samples: Deque[Tuple[float, int]] = field(
+        default_factory=lambda: deque(maxlen=THROUGHPUT_WINDOW), repr=False, compare=False
+    )
     
     @property
     def progress_percentage(self) -> float:
@@ -34,20 +51,172 @@ class ProgressInfo:
     
     @property
     def elapsed_time(self) -> float:
-        return time.time() - self.start_time
+        return (self.end_time or time.time()) - self.start_time
+    
+    @property
+    def is_finished(self) -> bool:
+        return self.status in (TaskStatus.COMPLETED, TaskStatus.FAILED)
+    
+    @property
+    def partial(self) -> bool:
+        return bool(self.unfetched_item_ids)
+    
+    @property
+    def eta_seconds(self) -> Optional[float]:
+        """按当前处理速度估算的剩余时间（仅在获取商品详情阶段）"""
+        if self.status != TaskStatus.PROCESSING or self.items_per_second <= 0:
+            return None
+        return max(0, self.total_items - self.current_item) / self.items_per_second
+    
+    def enter_stage(self, stage: str, now: float) -> None:
+        """进入新阶段，同时结束上一阶段"""
+        if self.stages and self.stages[-1]['stage'] == stage:
+            return
+        self.close_stage(now)
+        self.stages.append({'stage': stage, 'started_at': now, 'ended_at': None})
+        self._samples.clear()
+    
+    def close_stage(self, now: float) -> None:
+        if self.stages and self.stages[-1]['ended_at'] is None:
+            self.stages[-1]['ended_at'] = now
+    
+    def record_throughput(self, now: float) -> None:
+        """记录一次计数采样，更新窗口内的平均处理速度"""
+        samples = self._samples
+        samples.append((now, self.current_item))
+        if len(samples) < 2:
+            return
+        elapsed = samples[-1][0] - samples[0][0]
+        if elapsed > 0:
+            self.items_per_second = max(0.0, (samples[-1][1] - samples[0][1]) / elapsed)
+    
+    def stage_breakdown(self) -> List[Dict]:
+        """各阶段耗时（进行中的阶段按当前时间计算）"""
+        now = time.time()
+        return [
+            {
+                'stage': stage['stage'],
+                'started_at': stage['started_at'],
+                'ended_at': stage['ended_at'],
+                'duration': round((stage['ended_at'] or now) - stage['started_at'], 1)
+            }
+            for stage in self.stages
+        ]
+    
+    @property
+    def formatted_message(self) -> str:
+        """渲染消息（模板仅在读取进度时格式化）"""
+        if self.message_template:
+            return self.message_template.format(
+                current_item=self.current_item,
+                total_items=self.total_items
+            )
+        return self.message
+    
+    def to_dict(self) -> Dict:
+        """转换为API响应格式"""
+        return {
+            'task_id': self.task_id,
+            'status': self.status.value,
+            'current_step': self.current_step,
+            'total_steps': self.total_steps,
+            'current_item': self.current_item,
+            'total_items': self.total_items,
+            'progress_percentage': self.progress_percentage,
+            'message': self.formatted_message,
+            'elapsed_time': round(self.elapsed_time, 1),
+            'partial': self.partial,
+            'unfetched_count': len(self.unfetched_item_ids),
+            'stages': self.stage_breakdown(),
+            'items_per_second': round(self.items_per_second, 2),
+            'eta_seconds': None if self.eta_seconds is None else round(self.eta_seconds)
+        }
+
+
+class ProgressReporter:
+    """节流进度回调 - 按时间/数量阈值合并抓取循环中的进度更新"""
+    
+    def __init__(self, manager: 'ProgressManager', task_id: str,
+                 min_interval: float = 0.5, min_items: int = 50, offset: int = 0):
+        self._manager = manager
+        self._offset = offset  # 续传时已完成的条目数
+        self._task_id = task_id
+        self._min_interval = min_interval
+        self._min_items = max(1, int(min_items))
+        self._completed = 0
+        self._last_reported = 0
+        self._last_flush = time.monotonic()
+        self.flush_count = 0
+    
+    def __call__(self, completed: int, total: int) -> None:
+        self._completed = completed
+        if (completed >= total
+                or completed - self._last_reported >= self._min_items
+                or time.monotonic() - self._last_flush >= self._min_interval):
+            self.flush()
+    
+    def flush(self) -> None:
+        """将最新计数写入进度管理器"""
+        self._manager.set_current_item(self._task_id, self._offset + self._completed)
+        self._last_reported = self._completed
+        self._last_flush = time.monotonic()
+        self.flush_count += 1
 
 
 class ProgressManager:
     """进度管理器 - 跟踪CSV生成进度"""
     
-    def __init__(self):
+    def __init__(self, finished_ttl: float = 3600, max_tasks: int = 500):
         self._progress_data: Dict[str, ProgressInfo] = {}
-        self._lock = threading.Lock()
+        self._lock_obj = None
+        self._lock_generation: Optional[int] = None
+        self._lock_guard = threading.Lock()
+        self.finished_ttl = finished_ttl
+        self.max_tasks = max_tasks
+        self._listeners: List[Callable[[ProgressInfo], None]] = []
+    
+    @property
+    def _lock(self):
+        """由并发后端创建的锁（切换后端或gunicorn fork后重新创建）"""
+        generation = concurrency.generation
+        if self._lock_generation != generation:
+            with self._lock_guard:
+                if self._lock_generation != generation:
+                    self._lock_obj = concurrency.lock()
+                    self._lock_generation = generation
+        return self._lock_obj
+    
+    def add_listener(self, listener: Callable[[ProgressInfo], None]) -> None:
+        """注册进度变更监听器（在锁外调用）"""
+        if listener not in self._listeners:
+            self._listeners.append(listener)
+    
+    def remove_listener(self, listener: Callable[[ProgressInfo], None]) -> None:
+        if listener in self._listeners:
+            self._listeners.remove(listener)
+    
+    def _notify(self, progress: Optional[ProgressInfo]) -> None:
+        if progress is None:
+            return
+        for listener in self._listeners:
+            try:
+                listener(progress)
+            except Exception as e:
+                logger.warning(f"进度监听器执行失败: {e}")
+    
+    def configure(self, finished_ttl: float = None, max_tasks: int = None) -> None:
+        """设置已完成任务的保留时间和最大任务数"""
+        if finished_ttl is not None:
+            self.finished_ttl = finished_ttl
+        if max_tasks is not None:
+            self.max_tasks = max_tasks
     
     def start_task(self, task_id: str, total_items: int = 0) -> None:
         """开始新任务"""
         with self._lock:
-            self._progress_data[task_id] = ProgressInfo(
+            if len(self._progress_data) >= self.max_tasks:
+                self._evict_locked(time.time(), reserve=1)
+            progress = ProgressInfo(
                 task_id=task_id,
                 status=TaskStatus.PENDING,
                 current_step=0,
@@ -57,10 +226,14 @@ class ProgressManager:
                 message="任务开始",
                 start_time=time.time()
             )
+            progress.enter_stage(TaskStatus.PENDING.value, progress.start_time)
+            self._progress_data[task_id] = progress
+        self._notify(progress)
     
     def update_progress(self, task_id: str, status: TaskStatus, 
                        current_step: int = None, current_item: int = None, 
-                       total_items: int = None, message: str = None) -> None:
+                       total_items: int = None, message: str = None,
+                       message_template: str = None) -> None:
         """更新任务进度"""
         with self._lock:
             if task_id not in self._progress_data:
@@ -68,23 +241,52 @@ class ProgressManager:
             
             progress = self._progress_data[task_id]
             progress.status = status
+            now = time.time()
+            progress.enter_stage(status.value, now)
             
             if current_step is not None:
                 progress.current_step = current_step
             if current_item is not None:
                 progress.current_item = current_item
+                progress.record_throughput(now)
             if total_items is not None:
                 progress.total_items = total_items
             if message is not None:
                 progress.message = message
+                progress.message_template = None
+            if message_template is not None:
+                progress.message_template = message_template
+        self._notify(progress)
+    
+    def set_current_item(self, task_id: str, current_item: int) -> None:
+        """更新已处理条目数（由ProgressReporter节流后调用）
+        
+        速度采样窗口是deque，与enter_stage的清空和update_progress的采样
+        并发修改会出错，因此计数和采样都在锁内更新；调用已被节流，锁开销可忽略。
+        """
+        with self._lock:
+            progress = self._progress_data.get(task_id)
+            if progress is None:
+                return
+            progress.current_item = current_item
+            progress.record_throughput(time.time())
+        if self._listeners:
+            self._notify(progress)
+    
+    def create_reporter(self, task_id: str, min_interval: float = 0.5,
+                        min_items: int = 50, offset: int = 0) -> ProgressReporter:
+        """创建节流进度回调"""
+        return ProgressReporter(self, task_id, min_interval=min_interval,
+                                min_items=min_items, offset=offset)
     
     def get_progress(self, task_id: str) -> Optional[ProgressInfo]:
         """获取任务进度"""
         with self._lock:
             return self._progress_data.get(task_id)
     
-    def complete_task(self, task_id: str, success: bool = True, message: str = None) -> None:
-        """完成任务"""
+    def complete_task(self, task_id: str, success: bool = True, message: str = None,
+                      unfetched_item_ids: List[str] = None) -> None:
+        """完成任务（传入unfetched_item_ids时标记为部分完成）"""
         with self._lock:
             if task_id not in self._progress_data:
                 return
@@ -92,15 +294,48 @@ class ProgressManager:
             progress = self._progress_data[task_id]
             progress.status = TaskStatus.COMPLETED if success else TaskStatus.FAILED
             progress.current_step = progress.total_steps
-            progress.current_item = progress.total_items
+            progress.unfetched_item_ids = list(unfetched_item_ids or [])
+            progress.current_item = progress.total_items - len(progress.unfetched_item_ids)
+            progress.end_time = time.time()
+            progress.close_stage(progress.end_time)
             if message:
                 progress.message = message
+                progress.message_template = None
+        self._notify(progress)
     
     def cleanup_task(self, task_id: str) -> None:
         """清理完成的任务（可选，用于内存管理）"""
         with self._lock:
             self._progress_data.pop(task_id, None)
     
+    def evict_expired(self) -> int:
+        """按保留时间和数量上限清理已完成的任务，返回清理条数"""
+        with self._lock:
+            return self._evict_locked(time.time())
+    
+    def _evict_locked(self, now: float, reserve: int = 0) -> int:
+        """清理已完成任务（调用方需持有锁）
+        
+        运行中的任务从不清理；超过保留时间的已完成任务先被清理，
+        若仍超过数量上限，则按完成时间从旧到新继续清理。
+        """
+        finished = sorted(
+            (progress for progress in self._progress_data.values() if progress.is_finished),
+            key=lambda progress: progress.end_time or progress.start_time
+        )
+        overflow = len(self._progress_data) + reserve - self.max_tasks
+        evicted = 0
+        for progress in finished:
+            expired = now - (progress.end_time or progress.start_time) > self.finished_ttl
+            if not expired and evicted >= overflow:
+                break
+            del self._progress_data[progress.task_id]
+            evicted += 1
+        return evicted
+    
+    def __len__(self) -> int:
+        return len(self._progress_data)
+    
     def get_all_tasks(self) -> Dict[str, ProgressInfo]:
         """获取所有任务状态"""
         with self._lock:
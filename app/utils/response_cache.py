@@ -0,0 +1,127 @@
+"""
+短TTL响应缓存 - 合并相同的并发请求并统计命中率
+"""
+import time
+import threading
+import logging
+from collections import OrderedDict
+from typing import Any, Callable, Dict, Hashable, Optional, Union
+
+logger = logging.getLogger(__name__)
+
+
+class _InflightCall:
+    """进行中的加载调用，相同键的并发请求等待其结果"""
+    
+    def __init__(self):
+        self.event = threading.Event()
+        self.result = None
+        self.error: Optional[BaseException] = None
+
+
+class ResponseCache:
+    """带TTL和LRU上限的响应缓存
+    
+    loader返回None时视为失败，不缓存。ttl可以是固定秒数，也可以是
+    根据结果计算秒数的函数（例如已完成的任务缓存更久）。
+    """
+    
+    def __init__(self, max_entries: int = 1024, enabled: bool = True):
+        self.max_entries = max_entries
+        self.enabled = enabled
+        self._entries: 'OrderedDict[Hashable, tuple]' = OrderedDict()
+        self._inflight: Dict[Hashable, _InflightCall] = {}
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.coalesced = 0
+        self.evictions = 0
+    
+    def configure(self, max_entries: int = None, enabled: bool = None) -> None:
+        if max_entries is not None:
+            self.max_entries = max_entries
+        if enabled is not None:
+            self.enabled = enabled
+    
+    def get_or_load(self, key: Hashable, loader: Callable[[], Any],
+                    ttl: Union[float, Callable[[Any], float]]) -> Any:
+        """读取缓存，未命中时调用loader（同一键同时只调用一次）"""
+        if not self.enabled:
+            return loader()
+        
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                value, expires_at = entry
+                if time.monotonic() < expires_at:
+                    self._entries.move_to_end(key)
+                    self.hits += 1
+                    return value
+                del self._entries[key]
+            
+            call = self._inflight.get(key)
+            if call is not None:
+                self.coalesced += 1
+                leader = False
+            else:
+                call = _InflightCall()
+                self._inflight[key] = call
+                self.misses += 1
+                leader = True
+        
+        if not leader:
+            call.event.wait()
+            if call.error is not None:
+                raise call.error
+            return call.result
+        
+        try:
+            call.result = loader()
+            if call.result is not None:
+                seconds = ttl(call.result) if callable(ttl) else ttl
+                if seconds and seconds > 0:
+                    self._store(key, call.result, seconds)
+            return call.result
+        except BaseException as e:
+            call.error = e
+            raise
+        finally:
+            with self._lock:
+                self._inflight.pop(key, None)
+            call.event.set()
+    
+    def _store(self, key: Hashable, value: Any, seconds: float) -> None:
+        with self._lock:
+            self._entries[key] = (value, time.monotonic() + seconds)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+                self.evictions += 1
+    
+    def invalidate(self, predicate: Callable[[Hashable], bool]) -> int:
+        """删除满足条件的缓存键"""
+        with self._lock:
+            keys = [key for key in self._entries if predicate(key)]
+            for key in keys:
+                del self._entries[key]
+            return len(keys)
+    
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+    
+    def stats(self) -> Dict:
+        """缓存命中统计"""
+        lookups = self.hits + self.misses + self.coalesced
+        return {
+            'entries': len(self._entries),
+            'hits': self.hits,
+            'misses': self.misses,
+            'coalesced': self.coalesced,
+            'evictions': self.evictions,
+            'hit_ratio': round((self.hits + self.coalesced) / lookups, 3) if lookups else 0.0
+        }
+
+
+# Feed API响应缓存（任务状态、最近任务列表）
+feed_cache = ResponseCache()
@@ -0,0 +1,206 @@
+"""
+单飞（single-flight）任务去重 - 同一任务ID同时只运行一个处理流程
+
+进程内通过字典+锁保证原子性，跨gunicorn工作进程通过TEMP_FOLDER中的
+文件锁（fcntl.flock）保证。持有租约的进程会把进度快照写入共享文件，
+其他工作进程收到的轮询请求可以直接读取快照并共享同一个结果文件。
+快照在状态变化时立即写入，仅计数变化时按snapshot_interval合并写入，
+避免抓取循环每次进度上报都写文件。
+"""
+import os
+import time
+import json
+import threading
+import logging
+from typing import Dict, Optional, Tuple
+
+try:
+    import fcntl
+except ImportError:  # Windows等平台仅做进程内去重
+    fcntl = None
+
+from app.utils.progress_manager import progress_manager, ProgressInfo, TaskStatus
+
+logger = logging.getLogger(__name__)
+
+
+class FlightLease:
+    """任务租约 - 持有期间其他请求不会启动同一任务"""
+    
+    def __init__(self, owner: 'SingleFlight', key: str, lock_file=None):
+        self.owner = owner
+        self.key = key
+        self._lock_file = lock_file
+        self.released = False
+    
+    def release(self) -> None:
+        if not self.released:
+            self.released = True
+            self.owner._release(self)
+
+
+class SingleFlight:
+    """同一任务ID的处理流程去重"""
+    
+    def __init__(self, lock_dir: str = None, snapshot_interval: float = 1.0):
+        self.lock_dir = lock_dir
+        self.snapshot_interval = snapshot_interval
+        self._active: Dict[str, FlightLease] = {}
+        # 任务ID -> (上次写入快照时的状态, 写入时间)
+        self._published: Dict[str, Tuple[TaskStatus, float]] = {}
+        self._lock = threading.Lock()
+    
+    def init_app(self, app) -> None:
+        self.lock_dir = app.config.get('TEMP_FOLDER')
+        self.snapshot_interval = app.config.get('PROGRESS_SNAPSHOT_INTERVAL', 1.0)
+        progress_manager.add_listener(self._publish_progress)
+    
+    def _path(self, key: str, suffix: str) -> Optional[str]:
+        if not self.lock_dir:
+            return None
+        return os.path.join(self.lock_dir, f'enhanced_csv_{key}{suffix}')
+    
+    def acquire(self, key: str) -> Optional[FlightLease]:
+        """尝试获取租约，已有进行中的任务时返回None"""
+        with self._lock:
+            if key in self._active:
+                return None
+            lock_file = self._acquire_file_lock(key)
+            if lock_file is False:
+                return None
+            lease = FlightLease(self, key, lock_file)
+            self._active[key] = lease
+            return lease
+    
+    def is_running(self, key: str) -> bool:
+        """检查任务是否在任意工作进程中运行"""
+        with self._lock:
+            if key in self._active:
+                return True
+        lock_file = self._acquire_file_lock(key)
+        if lock_file is False:
+            return True
+        self._release_file_lock(key, lock_file)
+        return False
+    
+    def _acquire_file_lock(self, key: str):
+        """获取跨进程文件锁；不支持时返回None，被占用时返回False"""
+        path = self._path(key, '.lock')
+        if fcntl is None or path is None:
+            return None
+        os.makedirs(self.lock_dir, exist_ok=True)
+        while True:
+            lock_file = open(path, 'a+')
+            try:
+                fcntl.flock(lock_file.fileno(), fcntl.LOCK_EX | fcntl.LOCK_NB)
+            except OSError:
+                lock_file.close()
+                return False
+            # 加锁前文件可能已被上一个持有者删除，此时需重新打开
+            try:
+                if os.fstat(lock_file.fileno()).st_ino == os.stat(path).st_ino:
+                    return lock_file
+            except FileNotFoundError:
+                pass
+            lock_file.close()
+    
+    def _release_file_lock(self, key: str, lock_file) -> None:
+        if lock_file is None:
+            return
+        try:
+            os.remove(self._path(key, '.lock'))
+        except OSError:
+            pass
+        try:
+            fcntl.flock(lock_file.fileno(), fcntl.LOCK_UN)
+        finally:
+            lock_file.close()
+    
+    def _release(self, lease: FlightLease) -> None:
+        with self._lock:
+            if self._active.get(lease.key) is lease:
+                del self._active[lease.key]
+            self._published.pop(lease.key, None)
+            self._release_file_lock(lease.key, lease._lock_file)
+    
+    def _publish_progress(self, progress: ProgressInfo) -> None:
+        """把本进程持有任务的进度写入共享快照（仅计数变化时按间隔合并）"""
+        if progress.task_id not in self._active:
+            return
+        path = self._path(progress.task_id, '.progress.json')
+        if path is None:
+            return
+        now = time.monotonic()
+        with self._lock:
+            last = self._published.get(progress.task_id)
+            if (last is not None and last[0] == progress.status and not progress.is_finished
+                    and now - last[1] < self.snapshot_interval):
+                return
+            self._published[progress.task_id] = (progress.status, now)
+        snapshot = {
+            'task_id': progress.task_id,
+            'status': progress.status.value,
+            'current_step': progress.current_step,
+            'total_steps': progress.total_steps,
+            'current_item': progress.current_item,
+            'total_items': progress.total_items,
+            'message': progress.formatted_message,
+            'start_time': progress.start_time,
+            'end_time': progress.end_time,
+            'unfetched_item_ids': progress.unfetched_item_ids,
+            'stages': progress.stages,
+            'items_per_second': progress.items_per_second
+        }
+        tmp_path = f'{path}.{os.getpid()}.{threading.get_ident()}.tmp'
+        try:
+            with open(tmp_path, 'w', encoding='utf-8') as f:
+                json.dump(snapshot, f)
+            os.replace(tmp_path, path)
+        except OSError as e:
+            logger.warning(f"写入进度快照失败: {e}")
+    
+    def read_progress(self, key: str) -> Optional[ProgressInfo]:
+        """读取其他工作进程发布的进度快照"""
+        path = self._path(key, '.progress.json')
+        if path is None or not os.path.exists(path):
+            return None
+        try:
+            with open(path, 'r', encoding='utf-8') as f:
+                snapshot = json.load(f)
+            return ProgressInfo(
+                task_id=snapshot['task_id'],
+                status=TaskStatus(snapshot['status']),
+                current_step=snapshot['current_step'],
+                total_steps=snapshot['total_steps'],
+                current_item=snapshot['current_item'],
+                total_items=snapshot['total_items'],
+                message=snapshot['message'],
+                start_time=snapshot['start_time'],
+                end_time=snapshot.get('end_time'),
+                unfetched_item_ids=snapshot.get('unfetched_item_ids', []),
+                stages=snapshot.get('stages', []),
+                items_per_second=snapshot.get('items_per_second', 0.0)
+            )
+        except (OSError, ValueError, KeyError) as e:
+            logger.warning(f"读取进度快照失败: {e}")
+            return None
+    
+    def get_progress(self, key: str) -> Optional[ProgressInfo]:
+        """返回任务的最新进度
+        
+        本进程持有租约时本进程进度即为最新；否则本进程中可能只留有之前
+        运行的旧进度，与持有者发布的快照比较开始时间，返回较新的一份。
+        """
+        local = progress_manager.get_progress(key)
+        with self._lock:
+            holding = key in self._active
+        if holding and local is not None:
+            return local
+        shared = self.read_progress(key)
+        if local is None or shared is None:
+            return local or shared
+        return shared if shared.start_time > local.start_time else local
+
+
+# 全局单飞实例
+single_flight = SingleFlight()
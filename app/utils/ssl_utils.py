@@ -28,10 +28,16 @@ ssl_.create_urllib3_context = patched_create_urllib3_context
 class NoSSLAdapter(HTTPAdapter):
     """绕过SSL验证的HTTP适配器"""
     
+    def __init__(self, socket_options=None, **kwargs):
+        self.socket_options = socket_options
+        super().__init__(**kwargs)
+    
     def init_poolmanager(self, *args, **kwargs):
         kwargs['ssl_context'] = ssl.create_default_context()
         kwargs['ssl_context'].check_hostname = False
         kwargs['ssl_context'].verify_mode = ssl.CERT_NONE
+        if self.socket_options:
+            kwargs['socket_options'] = self.socket_options
         return super().init_poolmanager(*args, **kwargs)
 
 
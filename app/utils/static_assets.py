@@ -0,0 +1,139 @@
+"""
+静态资源 - 内容哈希URL、长期缓存和构建时预压缩
+
+url_for('static', filename=...) 自动附加 ?v=<内容哈希>，带当前哈希的请求返回
+Cache-Control: public, max-age=STATIC_MAX_AGE, immutable；文件变化后URL随之变化。
+构建镜像时运行 python -m app.utils.static_assets 生成 .gz/.br 文件，
+客户端支持时直接返回预压缩版本。
+"""
+import os
+import sys
+import gzip
+import hashlib
+import mimetypes
+import threading
+import logging
+from typing import Dict, List, Optional, Tuple
+
+from flask import abort, request, send_file
+from werkzeug.security import safe_join
+
+from app.utils.compression import brotli
+
+logger = logging.getLogger(__name__)
+
+PRECOMPRESSED_SUFFIXES = {'br': '.br', 'gzip': '.gz'}
+PRECOMPRESS_EXTENSIONS = ('.js', '.css', '.html', '.svg', '.json', '.txt')
+
+
+def build(folder: str) -> List[str]:
+    """为目录下的文本资源生成最高压缩率的.gz/.br文件，返回新生成的文件路径"""
+    written = []
+    for root, _, files in os.walk(folder):
+        for name in files:
+            if not name.endswith(PRECOMPRESS_EXTENSIONS):
+                continue
+            source = os.path.join(root, name)
+            with open(source, 'rb') as f:
+                data = f.read()
+            outputs = {'.gz': lambda: gzip.compress(data, compresslevel=9, mtime=0)}
+            if brotli is not None:
+                outputs['.br'] = lambda: brotli.compress(data, quality=11)
+            for suffix, encode in outputs.items():
+                target = source + suffix
+                if os.path.exists(target) and os.path.getmtime(target) >= os.path.getmtime(source):
+                    continue
+                with open(target, 'wb') as f:
+                    f.write(encode())
+                written.append(target)
+                logger.info(f"预压缩静态资源: {target} ({len(data)} -> {os.path.getsize(target)} bytes)")
+    return written
+
+
+class StaticAssets:
+    """替换Flask默认的static视图，提供哈希URL、缓存头和预压缩文件"""
+    
+    def __init__(self, folder: str = None, max_age: int = 31536000):
+        self.folder = folder
+        self.max_age = max_age
+        # 文件名 -> (修改时间, 内容哈希)
+        self._hashes: Dict[str, Tuple[float, str]] = {}
+        self._lock = threading.Lock()
+    
+    def init_app(self, app) -> None:
+        self.folder = app.static_folder
+        self.max_age = app.config.get('STATIC_MAX_AGE', 31536000)
+        app.url_defaults(self._add_version)
+        app.view_functions['static'] = self.serve
+    
+    def asset_hash(self, filename: str) -> Optional[str]:
+        """文件内容的短哈希（按修改时间缓存），文件不存在时返回None"""
+        path = safe_join(self.folder, filename) if self.folder and filename else None
+        if path is None:
+            return None
+        try:
+            modified = os.path.getmtime(path)
+        except OSError:
+            return None
+        with self._lock:
+            cached = self._hashes.get(filename)
+        if cached and cached[0] == modified:
+            return cached[1]
+        with open(path, 'rb') as f:
+            digest = hashlib.md5(f.read()).hexdigest()[:12]
+        with self._lock:
+            self._hashes[filename] = (modified, digest)
+        return digest
+    
+    def _add_version(self, endpoint: str, values: dict) -> None:
+        if endpoint != 'static' or 'v' in values:
+            return
+        digest = self.asset_hash(values.get('filename'))
+        if digest:
+            values['v'] = digest
+    
+    def _precompressed(self, path: str) -> Tuple[Optional[str], Optional[str]]:
+        """返回客户端可接受且不旧于原文件的预压缩文件（编码, 路径）"""
+        source_modified = os.path.getmtime(path)
+        candidates = {}
+        for encoding, suffix in PRECOMPRESSED_SUFFIXES.items():
+            compressed = path + suffix
+            if os.path.isfile(compressed) and os.path.getmtime(compressed) >= source_modified:
+                candidates[encoding] = compressed
+        encoding = request.accept_encodings.best_match(list(candidates)) if candidates else None
+        return encoding, candidates.get(encoding)
+    
+    def serve(self, filename: str):
+        path = safe_join(self.folder, filename)
+        if path is None or not os.path.isfile(path):
+            abort(404)
+        
+        encoding, compressed = self._precompressed(path)
+        mimetype = mimetypes.guess_type(filename)[0] or 'application/octet-stream'
+        if compressed:
+            response = send_file(compressed, mimetype=mimetype, conditional=True)
+            response.headers['Content-Encoding'] = encoding
+        else:
+            response = send_file(path, mimetype=mimetype, conditional=True)
+        if os.path.splitext(filename)[1] in PRECOMPRESS_EXTENSIONS:
+            response.vary.add('Accept-Encoding')
+        
+        # 只有URL中的哈希与当前内容一致时才允许长期缓存
+        if request.args.get('v') and request.args.get('v') == self.asset_hash(filename):
+            response.cache_control.no_cache = None
+            response.cache_control.public = True
+            response.cache_control.max_age = self.max_age
+            response.cache_control.immutable = True
+        else:
+            response.cache_control.no_cache = True
+        return response
+
+
+# 全局静态资源实例
+static_assets = StaticAssets()
+
+
+if __name__ == '__main__':
+    logging.basicConfig(level=logging.INFO, format='%(message)s')
+    target_folder = sys.argv[1] if len(sys.argv) > 1 else os.path.join(os.path.dirname(os.path.dirname(__file__)), 'static')
+    build(target_folder)
@@ -0,0 +1,191 @@
+"""
+临时文件清理器 - 限制TEMP_FOLDER磁盘占用并回收过期进度记录
+"""
+import os
+import threading
+import time
+import logging
+from dataclasses import dataclass, field
+from typing import List, Optional
+
+from app.utils.progress_manager import progress_manager
+
+logger = logging.getLogger(__name__)
+
+# 任务产物、检查点和锁文件的文件名前缀
+TASK_FILE_PREFIX = 'enhanced_csv_'
+
+
+@dataclass
+class SweepReport:
+    """单次清理结果"""
+    files_removed: int = 0
+    bytes_reclaimed: int = 0
+    bytes_remaining: int = 0
+    progress_entries_evicted: int = 0
+    removed_paths: List[str] = field(default_factory=list)
+    
+    def to_dict(self) -> dict:
+        return {
+            'files_removed': self.files_removed,
+            'bytes_reclaimed': self.bytes_reclaimed,
+            'bytes_remaining': self.bytes_remaining,
+            'progress_entries_evicted': self.progress_entries_evicted
+        }
+
+
+class TempFileJanitor:
+    """后台清理TEMP_FOLDER中的过期产物
+    
+    先删除超过最大保留时间的文件，再按最近使用时间（LRU）删除，
+    直到总大小低于配额。最近修改过的文件（宽限期内）不会被删除，
+    以免清理到正在写入的任务产物。
+    """
+    
+    def __init__(self, temp_folder: str = None, quota_bytes: int = 1024 * 1024 * 1024,
+                 max_age: float = 86400, min_age: float = 300, interval: float = 300):
+        self.temp_folder = temp_folder
+        self.quota_bytes = quota_bytes
+        self.max_age = max_age
+        self.min_age = min_age
+        self.interval = interval
+        self.last_report: Optional[SweepReport] = None
+        self._thread: Optional[threading.Thread] = None
+        self._pid: Optional[int] = None
+        self._stop = threading.Event()
+        self._lock = threading.Lock()
+    
+    def init_app(self, app) -> None:
+        """从应用配置初始化，并在每个工作进程的首个请求时启动后台线程"""
+        config = app.config
+        self.temp_folder = config.get('TEMP_FOLDER')
+        self.quota_bytes = int(config.get('TEMP_FOLDER_QUOTA_MB', 1024)) * 1024 * 1024
+        self.max_age = config.get('TEMP_FILE_MAX_AGE', 86400)
+        self.min_age = config.get('TEMP_FILE_MIN_AGE', 300)
+        self.interval = config.get('JANITOR_INTERVAL', 300)
+        progress_manager.configure(
+            finished_ttl=config.get('PROGRESS_TASK_TTL', 3600),
+            max_tasks=config.get('PROGRESS_MAX_TASKS', 500)
+        )
+        
+        if config.get('JANITOR_ENABLED', True):
+            # gunicorn预加载应用后fork，线程需在工作进程内启动
+            app.before_request(self.ensure_started)
+    
+    @staticmethod
+    def touch(file_path: str) -> None:
+        """标记文件最近被使用（用于LRU）"""
+        try:
+            os.utime(file_path, None)
+        except OSError:
+            pass
+    
+    def sweep(self, now: float = None) -> SweepReport:
+        """执行一次清理"""
+        now = now or time.time()
+        report = SweepReport()
+        report.progress_entries_evicted = progress_manager.evict_expired()
+        
+        if self.temp_folder and os.path.isdir(self.temp_folder):
+            with self._lock:
+                self._sweep_folder(now, report)
+        
+        self.last_report = report
+        if report.files_removed or report.progress_entries_evicted:
+            logger.info(
+                f"临时文件清理完成 - 删除文件: {report.files_removed}, "
+                f"回收: {report.bytes_reclaimed / 1024 / 1024:.1f}MB, "
+                f"剩余: {report.bytes_remaining / 1024 / 1024:.1f}MB, "
+                f"清理进度记录: {report.progress_entries_evicted}"
+            )
+        return report
+    
+    def _sweep_folder(self, now: float, report: SweepReport) -> None:
+        entries = []
+        # 持有租约的任务（任意工作进程）都有锁文件，本进程内的任务还有未完成的进度记录
+        active = {task_id for task_id, progress in progress_manager.get_all_tasks().items()
+                  if not progress.is_finished}
+        for entry in os.scandir(self.temp_folder):
+            try:
+                # 锁文件由持有者自行删除，清理器不能动
+                if entry.name.endswith('.lock'):
+                    active.add(self._task_id_of(entry.name))
+                    continue
+                if not entry.is_file(follow_symlinks=False):
+                    continue
+                stat = entry.stat()
+            except OSError:
+                continue
+            last_used = max(stat.st_atime, stat.st_mtime)
+            entries.append((last_used, stat.st_mtime, stat.st_size, entry.path))
+        
+        # 运行中任务的检查点等文件计入占用，但不删除
+        active.discard(None)
+        pinned = 0
+        candidates = []
+        for item in entries:
+            if self._task_id_of(os.path.basename(item[3])) in active:
+                pinned += item[2]
+            else:
+                candidates.append(item)
+        
+        # 最久未使用的排在前面
+        candidates.sort()
+        total = pinned + sum(size for _, _, size, _ in candidates)
+        
+        for last_used, modified, size, path in candidates:
+            if now - modified < self.min_age:
+                continue
+            if now - last_used <= self.max_age and total <= self.quota_bytes:
+                continue
+            if self._remove(path):
+                total -= size
+                report.files_removed += 1
+                report.bytes_reclaimed += size
+                report.removed_paths.append(path)
+        
+        report.bytes_remaining = total
+    
+    @staticmethod
+    def _task_id_of(name: str) -> Optional[str]:
+        """从 enhanced_csv_<task_id>.<后缀> 形式的文件名取出任务ID"""
+        if not name.startswith(TASK_FILE_PREFIX):
+            return None
+        return name[len(TASK_FILE_PREFIX):].split('.', 1)[0] or None
+    
+    @staticmethod
+    def _remove(path: str) -> bool:
+        try:
+            os.remove(path)
+            return True
+        except FileNotFoundError:
+            return False
+        except OSError as e:
+            logger.warning(f"删除临时文件失败: {path} - {e}")
+            return False
+    
+    def ensure_started(self) -> None:
+        """确保当前进程中的后台线程已启动"""
+        if self._thread is not None and self._pid == os.getpid():
+            return
+        with self._lock:
+            if self._thread is not None and self._pid == os.getpid():
+                return
+            self._pid = os.getpid()
+            self._stop.clear()
+            self._thread = threading.Thread(target=self._run, name='temp-janitor', daemon=True)
+            self._thread.start()
+    
+    def stop(self) -> None:
+        self._stop.set()
+    
+    def _run(self) -> None:
+        while not self._stop.wait(self.interval):
+            try:
+                self.sweep()
+            except Exception as e:
+                logger.error(f"临时文件清理出错: {e}")
+
+
+# 全局清理器实例
+temp_janitor = TempFileJanitor()
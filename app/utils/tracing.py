@@ -0,0 +1,287 @@
+"""
+轻量级链路追踪 - 记录增强CSV流水线中各作业及其子步骤的耗时和属性
+
+启动时按TRACING_EXPORTER选择导出方式：
+  - none:  不记录（span为空操作）
+  - jsonl: 每个span一行JSON写入TRACE_FILE
+  - otlp:  按OTLP/HTTP JSON格式批量发送到 OTLP_ENDPOINT/v1/traces
+
+逐商品的GetItem span按TRACE_ITEM_SAMPLE_RATE采样，耗时超过
+TRACE_SLOW_ITEM_SECONDS的调用总是保留，便于定位长尾商品。
+"""
+import os
+import json
+import time
+import random
+import threading
+import logging
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Dict, List, Optional
+
+import requests
+
+logger = logging.getLogger(__name__)
+
+_current_span: ContextVar[Optional['Span']] = ContextVar('current_span', default=None)
+
+
+class Span:
+    """一次操作的耗时和属性"""
+    
+    def __init__(self, tracer: 'Tracer', name: str, parent: Optional['Span'] = None,
+                 attributes: Dict = None, deferred: bool = False):
+        self.tracer = tracer
+        self.name = name
+        self.trace_id = parent.trace_id if parent else os.urandom(16).hex()
+        self.span_id = os.urandom(8).hex()
+        self.parent = parent
+        self.attributes = dict(attributes or {})
+        self.status = 'ok'
+        self.start_ns = time.time_ns()
+        self.end_ns: Optional[int] = None
+        # 延迟决定是否导出的span先缓存子span，结束时一起导出或丢弃
+        self.deferred = deferred
+        self._buffered: List['Span'] = []
+    
+    @property
+    def duration(self) -> float:
+        return ((self.end_ns or time.time_ns()) - self.start_ns) / 1e9
+    
+    def set_attribute(self, key: str, value) -> None:
+        self.attributes[key] = value
+    
+    def record_error(self, error: BaseException) -> None:
+        self.status = 'error'
+        self.attributes['error'] = f'{type(error).__name__}: {error}'
+    
+    def to_dict(self) -> Dict:
+        return {
+            'trace_id': self.trace_id,
+            'span_id': self.span_id,
+            'parent_id': self.parent.span_id if self.parent else None,
+            'name': self.name,
+            'start_time_unix_nano': self.start_ns,
+            'end_time_unix_nano': self.end_ns,
+            'duration_ms': round(self.duration * 1000, 3),
+            'status': self.status,
+            'attributes': self.attributes
+        }
+
+
+class _NoopSpan:
+    """追踪关闭或未被采样时使用的空span"""
+    
+    trace_id = span_id = None
+    duration = 0.0
+    
+    def set_attribute(self, key: str, value) -> None:
+        pass
+    
+    def record_error(self, error: BaseException) -> None:
+        pass
+
+
+NOOP_SPAN = _NoopSpan()
+
+
+class JsonLinesExporter:
+    """每个span一行JSON追加写入本地文件"""
+    
+    def __init__(self, path: str):
+        self.path = path
+        self._lock = threading.Lock()
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+    
+    def export(self, spans: List[Span]) -> None:
+        lines = ''.join(json.dumps(span.to_dict(), ensure_ascii=False, default=str) + '\n' for span in spans)
+        with self._lock:
+            with open(self.path, 'a', encoding='utf-8') as f:
+                f.write(lines)
+    
+    def shutdown(self) -> None:
+        pass
+
+
+def _otlp_value(value) -> Dict:
+    if isinstance(value, bool):
+        return {'boolValue': value}
+    if isinstance(value, int):
+        return {'intValue': str(value)}
+    if isinstance(value, float):
+        return {'doubleValue': value}
+    return {'stringValue': str(value)}
+
+
+class OTLPHttpExporter:
+    """按OTLP/HTTP JSON格式批量发送span，在后台线程中发送以免阻塞流水线"""
+    
+    def __init__(self, endpoint: str, service_name: str = 'wood', batch_size: int = 256,
+                 flush_interval: float = 2.0, timeout: float = 5.0):
+        self.url = endpoint.rstrip('/') + '/v1/traces'
+        self.service_name = service_name
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self.timeout = timeout
+        self._pending: List[Span] = []
+        self._lock = threading.Lock()
+        self._wakeup = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+        self._pid: Optional[int] = None
+    
+    def export(self, spans: List[Span]) -> None:
+        with self._lock:
+            self._pending.extend(spans)
+            full = len(self._pending) >= self.batch_size
+        self._ensure_started()
+        if full:
+            self._wakeup.set()
+    
+    def _ensure_started(self) -> None:
+        # gunicorn预加载应用后fork，线程需在工作进程内启动
+        if self._thread is not None and self._pid == os.getpid():
+            return
+        with self._lock:
+            if self._thread is not None and self._pid == os.getpid():
+                return
+            self._pid = os.getpid()
+            self._thread = threading.Thread(target=self._run, name='otlp-exporter', daemon=True)
+            self._thread.start()
+    
+    def _run(self) -> None:
+        while True:
+            self._wakeup.wait(self.flush_interval)
+            self._wakeup.clear()
+            self.flush()
+    
+    def flush(self) -> None:
+        with self._lock:
+            spans, self._pending = self._pending, []
+        if not spans:
+            return
+        try:
+            response = requests.post(self.url, json=self._payload(spans), timeout=self.timeout)
+            if response.status_code >= 400:
+                logger.warning(f"OTLP导出失败: HTTP {response.status_code}")
+        except requests.RequestException as e:
+            logger.warning(f"OTLP导出失败: {e}")
+    
+    def _payload(self, spans: List[Span]) -> Dict:
+        return {
+            'resourceSpans': [{
+                'resource': {'attributes': [{'key': 'service.name', 'value': {'stringValue': self.service_name}}]},
+                'scopeSpans': [{
+                    'scope': {'name': 'wood.tracing'},
+                    'spans': [
+                        {
+                            'traceId': span.trace_id,
+                            'spanId': span.span_id,
+                            'parentSpanId': span.parent.span_id if span.parent else '',
+                            'name': span.name,
+                            'kind': 1,
+                            'startTimeUnixNano': str(span.start_ns),
+                            'endTimeUnixNano': str(span.end_ns),
+                            'attributes': [{'key': key, 'value': _otlp_value(value)} for key, value in span.attributes.items()],
+                            'status': {'code': 2 if span.status == 'error' else 1}
+                        }
+                        for span in spans
+                    ]
+                }]
+            }]
+        }
+    
+    def shutdown(self) -> None:
+        self.flush()
+
+
+class Tracer:
+    """span的创建和导出"""
+    
+    def __init__(self):
+        self.exporter = None
+        self.item_sample_rate = 0.01
+        self.slow_item_seconds = 2.0
+    
+    @property
+    def enabled(self) -> bool:
+        return self.exporter is not None
+    
+    def init_app(self, app) -> None:
+        config = app.config
+        self.item_sample_rate = config.get('TRACE_ITEM_SAMPLE_RATE', 0.01)
+        self.slow_item_seconds = config.get('TRACE_SLOW_ITEM_SECONDS', 2.0)
+        kind = (config.get('TRACING_EXPORTER') or 'none').lower()
+        if kind == 'jsonl':
+            self.exporter = JsonLinesExporter(config.get('TRACE_FILE'))
+        elif kind == 'otlp':
+            self.exporter = OTLPHttpExporter(config.get('OTLP_ENDPOINT'), config.get('TRACE_SERVICE_NAME', 'wood'))
+        else:
+            self.exporter = None
+        if self.exporter is not None:
+            logger.info(f"链路追踪已启用: {kind}")
+    
+    def current_span(self) -> Optional[Span]:
+        return _current_span.get()
+    
+    @contextmanager
+    def span(self, name: str, parent: Optional[Span] = None, sample_rate: float = None,
+             keep_if_slower: float = None, **attributes):
+        """记录代码块为一个span
+        
+        未指定parent时使用当前上下文的span（线程池中需显式传入）。
+        指定sample_rate时按比例采样，未被采样但耗时超过keep_if_slower的span仍会导出。
+        """
+        if self.exporter is None:
+            yield NOOP_SPAN
+            return
+        if parent is None:
+            parent = _current_span.get()
+        elif isinstance(parent, _NoopSpan):
+            # 父span未被记录时子span也不记录
+            yield NOOP_SPAN
+            return
+        sampled = sample_rate is None or random.random() < sample_rate
+        if not sampled and keep_if_slower is None:
+            yield NOOP_SPAN
+            return
+        
+        span = Span(self, name, parent, attributes, deferred=not sampled)
+        token = _current_span.set(span)
+        try:
+            yield span
+        except BaseException as e:
+            span.record_error(e)
+            raise
+        finally:
+            _current_span.reset(token)
+            span.end_ns = time.time_ns()
+            self._finish(span, sampled or span.duration >= keep_if_slower)
+    
+    def _finish(self, span: Span, keep: bool) -> None:
+        parent = span.parent
+        if parent is not None and parent.deferred:
+            parent._buffered.append(span)
+            return
+        if span.deferred:
+            if not keep:
+                return
+            spans = [span] + span._buffered
+        else:
+            spans = [span]
+        try:
+            self.exporter.export(spans)
+        except Exception as e:
+            logger.warning(f"span导出失败: {e}")
+    
+    def item_span(self, name: str, parent: Optional[Span] = None, **attributes):
+        """逐商品的span（按采样率记录，慢调用总是保留）"""
+        return self.span(
+            name, parent=parent, sample_rate=self.item_sample_rate,
+            keep_if_slower=self.slow_item_seconds, **attributes
+        )
+
+
+# 全局追踪器实例
+tracer = Tracer()
@@ -0,0 +1,5 @@
+"""
+性能基准测试模块
+
+运行方式: python -m benchmarks.<模块名>
+"""
@@ -0,0 +1,151 @@
+"""
+仪表盘加载传输字节数基准测试
+
+用Flask测试客户端模拟浏览器加载一次仪表盘：HTML、app.js、最近任务列表（50条）
+和3个任务的批量进度，统计响应头+响应体的字节数和请求数。
+
+  - before: 不压缩，app.js无哈希URL（再次加载时带If-None-Match重新验证）
+  - after:  br/gzip压缩，预压缩app.js，哈希URL + immutable（再次加载时不发请求）
+
+运行方式: python -m benchmarks.bench_dashboard_bytes
+"""
+import os
+import re
+import gzip
+import json
+import shutil
+import argparse
+import platform
+import tempfile
+from datetime import datetime, timedelta
+from unittest import mock
+
+from app import create_app
+from app.services.ebay_service import EbayService
+from app.utils.compression import available_encodings, brotli, response_compressor
+from app.utils.progress_manager import progress_manager, TaskStatus
+from app.utils.static_assets import build, static_assets
+from benchmarks.bench_pipeline import RESULTS_DIR, git_commit
+
+TASK_IDS = ['task-dash-1', 'task-dash-2', 'task-dash-3']
+
+
+def _fake_task_page(self, access_token, date_range, offset, limit):
+    now = datetime(2026, 1, 1)
+    tasks = [
+        {
+            'taskId': f'task-{offset + i:08d}-5b2c-4c1a-9c0e-{i:012d}',
+            'status': 'COMPLETED',
+            'creationDate': (now - timedelta(hours=i)).isoformat() + 'Z',
+            'completionDate': (now - timedelta(hours=i) + timedelta(minutes=3)).isoformat() + 'Z',
+            'feedType': 'LMS_ACTIVE_INVENTORY_REPORT'
+        }
+        for i in range(limit)
+    ]
+    return {'tasks': tasks, 'total': limit}
+
+
+def _wire_bytes(response) -> int:
+    """状态行+响应头+响应体的字节数"""
+    body = response.get_data()
+    response.close()
+    headers = sum(len(f'{key}: {value}\r\n'.encode('utf-8')) for key, value in response.headers.items())
+    return len(f'HTTP/1.1 {response.status}\r\n'.encode('utf-8')) + headers + 2 + len(body)
+
+
+def load_dashboard(client, accept_encoding: str, cache: dict, versioned: bool) -> dict:
+    """模拟一次仪表盘加载，cache为浏览器缓存 {url: (etag, 是否immutable)}"""
+    headers = {'Accept-Encoding': accept_encoding}
+    transferred = 0
+    requests_sent = 0
+    
+    response = client.get('/', headers=headers)
+    html = response.get_data()
+    if response.headers.get('Content-Encoding') == 'gzip':
+        html = gzip.decompress(html)
+    elif response.headers.get('Content-Encoding') == 'br':
+        html = brotli.decompress(html)
+    transferred += _wire_bytes(response)
+    requests_sent += 1
+    
+    script = re.search(rb'src="([^"]*app\.js[^"]*)"', html).group(1).decode('utf-8')
+    if not versioned:
+        script = script.split('?')[0]
+    cached = cache.get(script)
+    if not (cached and cached[1]):
+        conditional = dict(headers)
+        if cached:
+            conditional['If-None-Match'] = cached[0]
+        response = client.get(script, headers=conditional)
+        transferred += _wire_bytes(response)
+        requests_sent += 1
+        cache[script] = (response.headers.get('ETag'), 'immutable' in response.headers.get('Cache-Control', ''))
+    
+    for url in ('/api/reports/recent?days=7&page_size=50', f'/api/tasks/progress-batch?ids={",".join(TASK_IDS)}'):
+        transferred += _wire_bytes(client.get(url, headers=headers))
+        requests_sent += 1
+    
+    return {'bytes': transferred, 'requests': requests_sent}
+
+
+def run_mode(mode: str, static_folder: str) -> dict:
+    after = mode == 'after'
+    app = create_app('testing')
+    response_compressor.enabled = after
+    app.static_folder = static_folder
+    static_assets.folder = static_folder
+    
+    client = app.test_client()
+    with client.session_transaction() as sess:
+        sess['ebay_token'] = {'access_token': 'bench-token', 'token_type': 'Bearer', 'debug_mode': True}
+    
+    accept_encoding = 'gzip, deflate, br' if after else 'identity'
+    cache = {}
+    with mock.patch.object(EbayService, '_fetch_inventory_task_page', _fake_task_page):
+        first = load_dashboard(client, accept_encoding, cache, versioned=after)
+        repeat = load_dashboard(client, accept_encoding, cache, versioned=after)
+    return {'mode': mode, 'first_load': first, 'repeat_load': repeat}
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--output', help='结果JSON路径，默认 benchmarks/results/dashboard-bytes-<commit>.json')
+    args = parser.parse_args()
+    
+    for task_id in TASK_IDS:
+        progress_manager.start_task(task_id, total_items=1200)
+        progress_manager.update_progress(task_id, TaskStatus.PROCESSING, current_item=400,
+                                         message_template='アイテム詳細取得中... ({current_item}/{total_items})')
+    
+    source_static = os.path.join(os.path.dirname(os.path.dirname(__file__)), 'app', 'static')
+    with tempfile.TemporaryDirectory() as plain_dir, tempfile.TemporaryDirectory() as built_dir:
+        plain_static = os.path.join(plain_dir, 'static')
+        built_static = os.path.join(built_dir, 'static')
+        shutil.copytree(source_static, plain_static, ignore=shutil.ignore_patterns('*.gz', '*.br'))
+        shutil.copytree(plain_static, built_static)
+        build(built_static)
+        results = [run_mode('before', plain_static), run_mode('after', built_static)]
+    
+    print(f"{'mode':<8} {'首次加载':>14} {'再次加载':>14}   (压缩方式: {', '.join(available_encodings())})")
+    for result in results:
+        first, repeat = result['first_load'], result['repeat_load']
+        print(f"{result['mode']:<8} {first['bytes']:>8} B/{first['requests']}次 {repeat['bytes']:>8} B/{repeat['requests']}次")
+    before, after = results
+    print(f"首次加载字节数 x{after['first_load']['bytes'] / before['first_load']['bytes']:.2f}")
+    
+    os.makedirs(RESULTS_DIR, exist_ok=True)
+    commit = git_commit()
+    output_path = args.output or os.path.join(RESULTS_DIR, f'dashboard-bytes-{commit}.json')
+    with open(output_path, 'w', encoding='utf-8') as f:
+        json.dump({
+            'commit': commit,
+            'created_at': datetime.now().isoformat(timespec='seconds'),
+            'python': platform.python_version(),
+            'encodings': available_encodings(),
+            'results': results,
+        }, f, ensure_ascii=False, indent=2)
+    print(f"\n结果已保存: {output_path}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,103 @@
+"""
+商品记录内存基准测试
+
+对比原字典格式与ItemRecord（__slots__ + Item Specifics名称编码）在
+10k/100k条记录时的常驻内存，以及两种CSV生成方式的峰值内存：
+  - dataframe: _convert_to_ebay_template + _create_csv_content（每行一个字典 + pandas）
+  - streaming: generate_enhanced_csv 逐行写出
+
+运行方式: python -m benchmarks.bench_item_records --sizes 10000 100000
+"""
+import argparse
+import gc
+import random
+import tempfile
+import time
+import tracemalloc
+
+from app.models.ebay_models import ItemRecord, SpecificNameTable
+from app.services.csv_service import CSVService
+
+SPECIFIC_NAMES = ['Brand', 'Color', 'Size', 'Material', 'Style', 'Type', 'Model', 'Country/Region of Manufacture',
+                  'MPN', 'Theme', 'Character', 'Features', 'Pattern', 'Department', 'Year Manufactured']
+SPECIFIC_VALUES = ['Unbranded', 'Black', 'White', 'Large', 'Cotton', 'Vintage', 'Japan', 'Does Not Apply', 'Blue']
+
+
+def build_item_dicts(count: int, specifics_per_item: int = 8, seed: int = 1):
+    """生成与_parse_get_item_response原字典格式相同的数据"""
+    rng = random.Random(seed)
+    items = []
+    for i in range(count):
+        item_id = str(200000000000 + i)
+        names = rng.sample(SPECIFIC_NAMES, specifics_per_item)
+        items.append({
+            # 模拟逐条解析XML得到的独立字符串对象
+            'ItemID': item_id,
+            'Title': f'Benchmark listing number {i} with a realistic length title',
+            'SKU': f'SKU-{i:08d}',
+            'Quantity': str(rng.randint(1, 20)),
+            'CurrentPrice': f'{rng.uniform(1, 500):.2f}',
+            'Currency': ''.join(['U', 'S', 'D']),
+            'CategoryID': str(rng.randint(1, 50)),
+            'CategoryName': ''.join(['Category ', str(rng.randint(1, 50))]),
+            'ItemSpecifics': {''.join(name): ''.join(rng.choice(SPECIFIC_VALUES)) for name in names}
+        })
+    return items
+
+
+def measure(build):
+    """返回 (结果, 分配后净增内存, 峰值内存)"""
+    gc.collect()
+    tracemalloc.start()
+    result = build()
+    current, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return result, current, peak
+
+
+def run(size: int) -> dict:
+    dicts, dict_bytes, _ = measure(lambda: build_item_dicts(size))
+    
+    def to_records():
+        # 从新生成的数据转换，计入记录自身持有的字符串
+        names = SpecificNameTable()
+        return [ItemRecord.from_dict(item, names) for item in build_item_dicts(size)]
+    
+    records, record_bytes, _ = measure(to_records)
+    
+    with tempfile.TemporaryDirectory() as temp_folder:
+        csv_service = CSVService({'TEMP_FOLDER': temp_folder})
+        
+        start = time.perf_counter()
+        _, _, dataframe_peak = measure(
+            lambda: csv_service._create_csv_content(csv_service._convert_to_ebay_template(dicts))
+        )
+        dataframe_seconds = time.perf_counter() - start
+        
+        start = time.perf_counter()
+        _, _, streaming_peak = measure(lambda: csv_service.generate_enhanced_csv(records, 'bench'))
+        streaming_seconds = time.perf_counter() - start
+    
+    mb = 1024 * 1024
+    return {
+        'items': size,
+        'dict_records_mb': round(dict_bytes / mb, 1),
+        'item_records_mb': round(record_bytes / mb, 1),
+        'csv_dataframe_peak_mb': round(dataframe_peak / mb, 1),
+        'csv_dataframe_seconds': round(dataframe_seconds, 2),
+        'csv_streaming_peak_mb': round(streaming_peak / mb, 1),
+        'csv_streaming_seconds': round(streaming_seconds, 2),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--sizes', type=int, nargs='+', default=[10000, 100000])
+    args = parser.parse_args()
+    
+    for size in args.sizes:
+        print(run(size))
+
+
+if __name__ == '__main__':
+    main()
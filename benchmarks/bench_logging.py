@@ -0,0 +1,140 @@
+"""
+抓取循环日志开销基准测试
+
+用OfflineXMLService抓取N个商品，其中每隔fail_every个商品抛出异常（产生逐商品错误日志），
+对比三种日志配置下 fetch_item_details 的耗时：
+  - none:  日志关闭（基准）
+  - sync:  旧配置，app logger上挂两个同步文件handler，逐商品日志不限流
+  - queue_all: 异步日志管道（QueueHandler + 后台线程写文件），逐商品日志不限流
+  - queue: 异步日志管道，逐商品日志按模板限流（默认配置）
+
+queue模式另外报告停止时写出队列剩余日志所需的时间。每种模式运行repeat次取最快一次。
+--emit-delay 给每次写文件加上延迟，模拟慢磁盘/网络文件系统。
+
+运行方式: python -m benchmarks.bench_logging --items 20000 --level DEBUG
+"""
+import os
+import time
+import logging
+import argparse
+import tempfile
+from unittest import mock
+from logging.handlers import RotatingFileHandler
+from types import SimpleNamespace
+
+from app.services import xml_service
+from app.utils.log_pipeline import log_pipeline
+from benchmarks.fixtures import OfflineXMLService, bench_config
+
+LOG_FORMAT = '%(asctime)s %(levelname)s %(name)s %(message)s'
+
+
+class FailingXMLService(OfflineXMLService):
+    """每隔fail_every个商品抛出异常的离线服务"""
+    
+    def __init__(self, config=None, fail_every: int = 10):
+        super().__init__(config)
+        self.fail_every = fail_every
+    
+    def _get_item_details_with_curl(self, item_id: str, auth_token: str):
+        if self.fail_every and int(item_id) % self.fail_every == 0:
+            raise ConnectionError('connection reset by peer')
+        return super()._get_item_details_with_curl(item_id, auth_token)
+
+
+def _configure(mode: str, level: int, log_dir: str) -> logging.Logger:
+    app_logger = logging.getLogger('app')
+    for handler in list(app_logger.handlers):
+        app_logger.removeHandler(handler)
+    xml_service.item_log.removeFilter(log_pipeline.item_filter)
+    
+    if mode == 'none':
+        app_logger.setLevel(logging.CRITICAL)
+    elif mode == 'sync':
+        # 旧实现：configure_logging和ProductionConfig.init_app各挂一个文件handler
+        for handler in (logging.FileHandler(os.path.join(log_dir, 'sync.log')),
+                        RotatingFileHandler(os.path.join(log_dir, 'sync.log'), maxBytes=10240000, backupCount=10)):
+            handler.setFormatter(logging.Formatter(LOG_FORMAT))
+            app_logger.addHandler(handler)
+        app_logger.setLevel(level)
+    else:
+        log_pipeline.init_app(SimpleNamespace(logger=app_logger, config={
+            'LOG_LEVEL': logging.getLevelName(level),
+            'LOG_FORMAT': LOG_FORMAT,
+            'LOG_FILE': os.path.join(log_dir, 'queue.log'),
+            'LOG_CONSOLE': False
+        }))
+        if mode == 'queue':
+            log_pipeline.item_filter.reset()
+            xml_service.item_log.addFilter(log_pipeline.item_filter)
+    return app_logger
+
+
+def run_mode(mode: str, item_ids, workers: int, level: int, fail_every: int, emit_delay: float = 0) -> dict:
+    file_emit = logging.FileHandler.emit
+    
+    def slow_emit(handler, record):
+        time.sleep(emit_delay)
+        file_emit(handler, record)
+    
+    with tempfile.TemporaryDirectory() as log_dir, \
+            mock.patch.object(logging.FileHandler, 'emit', slow_emit if emit_delay else file_emit):
+        app_logger = _configure(mode, level, log_dir)
+        service = FailingXMLService(bench_config(MAX_WORKERS=workers), fail_every=fail_every)
+        
+        start = time.perf_counter()
+        result = service.fetch_item_details(item_ids, 'bench-token')
+        elapsed = time.perf_counter() - start
+        
+        drain_start = time.perf_counter()
+        if mode.startswith('queue'):
+            log_pipeline.stop()
+        drain = time.perf_counter() - drain_start
+        
+        lines = 0
+        for name in os.listdir(log_dir):
+            with open(os.path.join(log_dir, name), encoding='utf-8') as f:
+                lines += sum(1 for _ in f)
+        for handler in list(app_logger.handlers):
+            handler.close()
+            app_logger.removeHandler(handler)
+    
+    return {
+        'mode': mode,
+        'items': len(item_ids),
+        'failed': len(result.failed_item_ids),
+        'seconds': round(elapsed, 3),
+        'items_per_sec': round(len(item_ids) / elapsed, 1),
+        'drain_seconds': round(drain, 3),
+        'log_lines': lines,
+        'dropped': log_pipeline.dropped if mode.startswith('queue') else 0,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--items', type=int, default=20000)
+    parser.add_argument('--workers', type=int, default=4)
+    parser.add_argument('--level', default='INFO', choices=['DEBUG', 'INFO'])
+    parser.add_argument('--fail-every', type=int, default=10, help='每隔N个商品失败一次，0为不失败')
+    parser.add_argument('--repeat', type=int, default=3)
+    parser.add_argument('--emit-delay', type=float, default=0, help='每次写文件的额外延迟（秒）')
+    args = parser.parse_args()
+    
+    item_ids = [str(100000000000 + i) for i in range(args.items)]
+    level = logging.getLevelName(args.level)
+    # 预热一次，避免首个模式包含导入和解析器初始化的开销
+    run_mode('none', item_ids[:1000], args.workers, level, args.fail_every)
+    results = [
+        min((run_mode(mode, item_ids, args.workers, level, args.fail_every, args.emit_delay) for _ in range(args.repeat)),
+            key=lambda result: result['seconds'])
+        for mode in ('none', 'sync', 'queue_all', 'queue')
+    ]
+    baseline = results[0]['seconds']
+    for result in results:
+        result['overhead_us_per_item'] = round((result['seconds'] - baseline) / result['items'] * 1e6, 1)
+        print(result)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,144 @@
+"""
+报告到CSV流水线基准测试
+
+用合成的LMS报告ZIP和GetItem响应，分别测量各阶段的耗时和峰值内存：
+  - extract:  XMLService.extract_item_ids_from_zip
+  - parse:    XMLService._parse_get_item_response（逐条解析全部响应）
+  - csv:      CSVService.generate_enhanced_csv（ItemRecord逐行流式写出模板CSV，与生产路径相同）
+  - excel:    CSVService.generate_excel
+
+耗时与峰值内存分两次运行测量，避免tracemalloc的开销计入耗时。
+结果保存为JSON（含提交ID），可用 --compare 与其他提交的结果对比。
+
+运行方式:
+  python -m benchmarks.bench_pipeline --sizes 1000 10000 100000
+  python -m benchmarks.bench_pipeline --sizes 10000 --stages parse csv --compare benchmarks/results/pipeline-abc1234.json
+"""
+import argparse
+import gc
+import json
+import os
+import platform
+import subprocess
+import tempfile
+import time
+import tracemalloc
+from datetime import datetime
+
+from app.services.csv_service import CSVService
+from app.services.xml_service import XMLService
+from app.utils.artifact_cache import artifact_cache
+from benchmarks.fixtures import bench_config, build_item_response, build_lms_report_zip, generate_items
+
+STAGES = ['extract', 'parse', 'csv', 'excel']
+RESULTS_DIR = os.path.join(os.path.dirname(__file__), 'results')
+
+
+def git_commit() -> str:
+    """当前提交ID，不在git仓库中时返回unknown"""
+    try:
+        return subprocess.run(
+            ['git', 'rev-parse', '--short', 'HEAD'], capture_output=True, text=True, check=True,
+            cwd=os.path.dirname(os.path.abspath(__file__))
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return 'unknown'
+
+
+def measure(func) -> dict:
+    """先计时运行一次，再在tracemalloc下运行一次取峰值内存"""
+    gc.collect()
+    start = time.perf_counter()
+    func()
+    seconds = time.perf_counter() - start
+
+    gc.collect()
+    tracemalloc.start()
+    func()
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return {'seconds': round(seconds, 4), 'peak_mb': round(peak / (1024 * 1024), 2)}
+
+
+def run(size: int, stages, specifics_per_item: int, categories: int) -> list:
+    """测量一个数据规模下的各阶段，前一阶段的输出作为后一阶段的输入"""
+    items = generate_items(size, specifics_per_item, categories)
+    xml_service = XMLService(bench_config())
+    output_dir = tempfile.TemporaryDirectory()
+    csv_service = CSVService({'TEMP_FOLDER': output_dir.name})
+    # 测量的是生成本身，重复运行不能命中导出缓存
+    artifact_cache.configure(enabled=False)
+
+    report_zip = build_lms_report_zip(items)
+    responses = [build_item_response(item) for item in items]
+    del items
+
+    records = [xml_service._parse_get_item_response(response) for response in responses]
+    # Excel导出的输入是按行的字典，只在准备阶段构建，不计入测量
+    rows = csv_service._convert_to_ebay_template(records) if 'excel' in stages else None
+
+    stage_funcs = {
+        'extract': lambda: xml_service.extract_item_ids_from_zip(report_zip),
+        'parse': lambda: [xml_service._parse_get_item_response(response) for response in responses],
+        'csv': lambda: csv_service.generate_enhanced_csv(records, f'bench-{size}'),
+        'excel': lambda: csv_service.generate_excel(rows),
+    }
+
+    results = []
+    with output_dir:
+        for stage in stages:
+            result = {'items': size, 'stage': stage, **measure(stage_funcs[stage])}
+            print(f"{size:>8} {stage:<8} {result['seconds']:>10.3f}s {result['peak_mb']:>10.1f}MB")
+            results.append(result)
+    return results
+
+
+def compare(results: list, baseline_path: str) -> None:
+    """打印与基准结果的比值（<1表示更快/更省内存）"""
+    with open(baseline_path, encoding='utf-8') as f:
+        baseline = json.load(f)
+    previous = {(r['items'], r['stage']): r for r in baseline['results']}
+
+    print(f"\n对比 {baseline.get('commit')} ({baseline_path})")
+    for result in results:
+        old = previous.get((result['items'], result['stage']))
+        if not old:
+            continue
+        time_ratio = result['seconds'] / old['seconds'] if old['seconds'] else float('nan')
+        memory_ratio = result['peak_mb'] / old['peak_mb'] if old['peak_mb'] else float('nan')
+        print(f"{result['items']:>8} {result['stage']:<8} 耗时 x{time_ratio:.2f}  峰值内存 x{memory_ratio:.2f}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--sizes', type=int, nargs='+', default=[1000, 10000, 100000])
+    parser.add_argument('--stages', nargs='+', choices=STAGES, default=STAGES)
+    parser.add_argument('--specifics', type=int, default=8, help='每个商品的Item Specifics数量')
+    parser.add_argument('--categories', type=int, default=50, help='商品分布的分类数')
+    parser.add_argument('--output', help='结果JSON路径，默认 benchmarks/results/pipeline-<commit>.json')
+    parser.add_argument('--compare', help='与之对比的历史结果JSON')
+    args = parser.parse_args()
+
+    os.makedirs(RESULTS_DIR, exist_ok=True)
+    commit = git_commit()
+    results = []
+    for size in args.sizes:
+        results.extend(run(size, args.stages, args.specifics, args.categories))
+
+    output_path = args.output or os.path.join(RESULTS_DIR, f'pipeline-{commit}.json')
+    with open(output_path, 'w', encoding='utf-8') as f:
+        json.dump({
+            'commit': commit,
+            'created_at': datetime.now().isoformat(timespec='seconds'),
+            'python': platform.python_version(),
+            'params': {'specifics_per_item': args.specifics, 'categories': args.categories},
+            'results': results,
+        }, f, ensure_ascii=False, indent=2)
+    print(f"\n结果已保存: {output_path}")
+
+    if args.compare:
+        compare(results, args.compare)
+
+
+if __name__ == '__main__':
+    main()
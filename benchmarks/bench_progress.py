@@ -0,0 +1,91 @@
+"""
+抓取循环进度上报开销基准测试
+
+对比三种模式下 get_item_details_batch 的吞吐量：
+  - none:      不上报进度
+  - per_item:  旧实现，每个条目加锁更新并格式化消息
+  - throttled: ProgressReporter 节流上报
+
+同时运行若干轮询线程模拟前端 progress-poll 请求对锁的竞争。
+
+运行方式: python -m benchmarks.bench_progress --items 20000
+"""
+import argparse
+import threading
+import time
+
+from app.utils.progress_manager import ProgressManager, TaskStatus
+from benchmarks.fixtures import OfflineXMLService, bench_config
+
+
+def _start_pollers(manager: ProgressManager, task_id: str, count: int, stop: threading.Event):
+    """启动模拟轮询线程"""
+    def poll():
+        while not stop.is_set():
+            progress = manager.get_progress(task_id)
+            if progress:
+                progress.to_dict()
+            time.sleep(0.001)
+    
+    threads = [threading.Thread(target=poll, daemon=True) for _ in range(count)]
+    for thread in threads:
+        thread.start()
+    return threads
+
+
+def run_mode(mode: str, item_ids, workers: int, pollers: int) -> dict:
+    manager = ProgressManager()
+    task_id = f'bench-{mode}'
+    manager.start_task(task_id, total_items=len(item_ids))
+    manager.update_progress(task_id, TaskStatus.PROCESSING,
+                            message_template='アイテム詳細取得中... ({current_item}/{total_items})')
+    
+    callback = None
+    if mode == 'per_item':
+        def callback(completed, total):
+            manager.update_progress(
+                task_id,
+                TaskStatus.PROCESSING,
+                current_item=completed,
+                message=f'アイテム詳細取得中... ({completed}/{total})'
+            )
+    elif mode == 'throttled':
+        callback = manager.create_reporter(task_id)
+    
+    service = OfflineXMLService(bench_config(MAX_WORKERS=workers))
+    stop = threading.Event()
+    threads = _start_pollers(manager, task_id, pollers, stop)
+    
+    start = time.perf_counter()
+    results = service.get_item_details_batch(item_ids, 'bench-token', task_id, callback)
+    elapsed = time.perf_counter() - start
+    
+    stop.set()
+    for thread in threads:
+        thread.join()
+    
+    return {
+        'mode': mode,
+        'items': len(item_ids),
+        'fetched': len(results),
+        'seconds': round(elapsed, 3),
+        'items_per_sec': round(len(item_ids) / elapsed, 1),
+        'flushes': getattr(callback, 'flush_count', len(item_ids) if callback else 0),
+        'final_item': manager.get_progress(task_id).current_item,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--items', type=int, default=20000)
+    parser.add_argument('--workers', type=int, default=4)
+    parser.add_argument('--pollers', type=int, default=4)
+    args = parser.parse_args()
+    
+    item_ids = [str(100000000000 + i) for i in range(args.items)]
+    for mode in ('none', 'per_item', 'throttled'):
+        print(run_mode(mode, item_ids, args.workers, args.pollers))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,393 @@
+"""
+本地eBay API替身服务器
+
+实现抓取路径用到的接口，用于不消耗API配额的负载测试：
+  - Feed API:    POST/GET inventory_task、GET inventory_task/<id>、GET task/<id>/download_result_file
+  - Trading API: GetItem、GetSellerList（按X-EBAY-API-CALL-NAME分发）
+  - OAuth:       POST identity/v1/oauth2/token
+
+可配置延迟分布（fixed/uniform/lognormal）、限流错误率、5xx错误率和畸形响应比例。
+record模式把请求转发到真实eBay并保存响应，replay模式按请求内容回放已保存的响应，
+用于确定性的重复运行。
+
+应用通过环境变量指向替身服务器:
+  EBAY_FEED_API_BASE_URL=http://127.0.0.1:9000/sell/feed/v1
+  EBAY_TRADING_API_URL=http://127.0.0.1:9000/ws/api.dll
+  EBAY_TOKEN_URL=http://127.0.0.1:9000/identity/v1/oauth2/token
+
+运行方式:
+  python -m benchmarks.ebay_standin --items 10000 --latency lognormal --latency-ms 200 --throttle-rate 0.01
+  python -m benchmarks.ebay_standin --record recordings/   # 转发到真实eBay并录制
+  python -m benchmarks.ebay_standin --replay recordings/   # 回放录制的响应
+"""
+import argparse
+import base64
+import hashlib
+import json
+import os
+import random
+import re
+import threading
+import time
+import uuid
+from dataclasses import dataclass
+from typing import Dict, Optional
+from xml.sax.saxutils import escape
+
+import requests
+from flask import Flask, Response, jsonify, request
+
+from benchmarks.fixtures import EBAY_NS, build_item_response, build_lms_report_zip, generate_items
+
+FEED_PREFIX = '/sell/feed/v1'
+TRADING_PATH = '/ws/api.dll'
+TOKEN_PATH = '/identity/v1/oauth2/token'
+
+
+@dataclass
+class StandinSettings:
+    """替身服务器配置"""
+    items: int = 1000
+    specifics_per_item: int = 8
+    categories: int = 50
+    latency: str = 'lognormal'  # none / fixed / uniform / lognormal
+    latency_ms: float = 150.0  # fixed为固定值，其余为中位数
+    latency_spread: float = 0.5  # uniform为±比例，lognormal为sigma
+    throttle_rate: float = 0.0  # 返回限流错误的比例
+    error_rate: float = 0.0  # 返回5xx的比例
+    malformed_rate: float = 0.0  # 返回截断响应的比例
+    report_delay: float = 10.0  # 库存报告从创建到完成的秒数
+    seed: int = 1
+    record_dir: Optional[str] = None
+    replay_dir: Optional[str] = None
+    upstream_feed_url: str = 'https://api.ebay.com/sell/feed/v1'
+    upstream_trading_url: str = 'https://api.ebay.com/ws/api.dll'
+    upstream_token_url: str = 'https://api.ebay.com/identity/v1/oauth2/token'
+
+
+class FaultInjector:
+    """按配置抽样延迟和故障，使用固定种子保证可重复"""
+
+    def __init__(self, settings: StandinSettings):
+        self.settings = settings
+        self._rng = random.Random(settings.seed)
+        self._lock = threading.Lock()
+
+    def delay(self) -> float:
+        """本次请求的延迟（秒）"""
+        settings = self.settings
+        base = settings.latency_ms / 1000.0
+        with self._lock:
+            if settings.latency == 'fixed':
+                return base
+            if settings.latency == 'uniform':
+                return max(0.0, self._rng.uniform(base * (1 - settings.latency_spread),
+                                                  base * (1 + settings.latency_spread)))
+            if settings.latency == 'lognormal':
+                return self._rng.lognormvariate(0.0, settings.latency_spread) * base
+        return 0.0
+
+    def choose_fault(self) -> Optional[str]:
+        """按比例抽取故障类型: throttle / error / malformed / None"""
+        with self._lock:
+            roll = self._rng.random()
+        for fault, rate in (('throttle', self.settings.throttle_rate),
+                            ('error', self.settings.error_rate),
+                            ('malformed', self.settings.malformed_rate)):
+            if roll < rate:
+                return fault
+            roll -= rate
+        return None
+
+
+class Recorder:
+    """按请求内容保存/查找响应，文件名为请求摘要（不含认证头，回放时令牌可以不同）"""
+
+    def __init__(self, directory: str):
+        self.directory = directory
+        os.makedirs(directory, exist_ok=True)
+
+    @staticmethod
+    def request_key(method: str, path: str, query: str, body: bytes, call_name: str = '') -> str:
+        digest = hashlib.sha256()
+        for part in (method, path, '&'.join(sorted(query.split('&'))) if query else '', call_name):
+            digest.update(part.encode('utf-8') + b'\0')
+        digest.update(body or b'')
+        return digest.hexdigest()[:32]
+
+    def _path(self, key: str) -> str:
+        return os.path.join(self.directory, f'{key}.json')
+
+    def load(self, key: str) -> Optional[Response]:
+        try:
+            with open(self._path(key), encoding='utf-8') as f:
+                saved = json.load(f)
+        except FileNotFoundError:
+            return None
+        return Response(base64.b64decode(saved['body']), status=saved['status'], headers=saved['headers'])
+
+    def save(self, key: str, method: str, path: str, response: requests.Response) -> None:
+        headers = {name: value for name, value in response.headers.items()
+                   if name.lower() in ('content-type', 'location')}
+        with open(self._path(key), 'w', encoding='utf-8') as f:
+            json.dump({
+                'method': method,
+                'path': path,
+                'status': response.status_code,
+                'headers': headers,
+                'body': base64.b64encode(response.content).decode('ascii'),
+            }, f, indent=2)
+
+
+def _trading_error(code: str, message: str) -> str:
+    return f'''<?xml version="1.0" encoding="UTF-8"?>
+<GetItemResponse xmlns="{EBAY_NS}">
+  <Timestamp>{time.strftime('%Y-%m-%dT%H:%M:%S.000Z', time.gmtime())}</Timestamp>
+  <Ack>Failure</Ack>
+  <Errors>
+    <ShortMessage>{escape(message)}</ShortMessage>
+    <LongMessage>{escape(message)}</LongMessage>
+    <ErrorCode>{code}</ErrorCode>
+    <SeverityCode>Error</SeverityCode>
+    <ErrorClassification>RequestError</ErrorClassification>
+  </Errors>
+</GetItemResponse>'''
+
+
+def _xml_value(body: str, tag: str, default: str = '') -> str:
+    match = re.search(rf'<{tag}>\s*([^<]*?)\s*</{tag}>', body)
+    return match.group(1) if match else default
+
+
+def create_standin_app(settings: StandinSettings = None) -> Flask:
+    """创建替身服务器应用"""
+    settings = settings or StandinSettings()
+    app = Flask(__name__)
+    faults = FaultInjector(settings)
+    recorder = Recorder(settings.record_dir or settings.replay_dir) \
+        if settings.record_dir or settings.replay_dir else None
+
+    catalog = {item['ItemID']: item for item in generate_items(
+        settings.items, settings.specifics_per_item, settings.categories, settings.seed
+    )}
+    item_list = list(catalog.values())
+    report_cache: Dict[str, bytes] = {}
+    tasks: Dict[str, Dict] = {}
+    tasks_lock = threading.Lock()
+    stats = {'requests': 0, 'throttled': 0, 'errors': 0, 'malformed': 0, 'replayed': 0, 'recorded': 0}
+
+    def upstream_url(path: str) -> str:
+        if path.startswith(FEED_PREFIX):
+            return settings.upstream_feed_url + path[len(FEED_PREFIX):]
+        if path == TOKEN_PATH:
+            return settings.upstream_token_url
+        return settings.upstream_trading_url
+
+    @app.before_request
+    def record_or_replay():
+        """record/replay模式下不走合成数据"""
+        if recorder is None or request.path == '/_standin/stats':
+            return None
+        body = request.get_data()
+        key = Recorder.request_key(request.method, request.path, request.query_string.decode('utf-8'),
+                                   body, request.headers.get('X-EBAY-API-CALL-NAME', ''))
+        if settings.replay_dir:
+            stats['replayed'] += 1
+            time.sleep(faults.delay())
+            return recorder.load(key) or (jsonify({'error': f'未录制的请求: {request.method} {request.path}'}), 404)
+
+        headers = {name: value for name, value in request.headers.items() if name.lower() not in ('host', 'content-length')}
+        upstream = requests.request(request.method, upstream_url(request.path), params=request.args,
+                                    headers=headers, data=body, timeout=60, allow_redirects=False)
+        recorder.save(key, request.method, request.path, upstream)
+        stats['recorded'] += 1
+        return Response(upstream.content, status=upstream.status_code,
+                        headers={name: value for name, value in upstream.headers.items()
+                                 if name.lower() in ('content-type', 'location')})
+
+    def inject(rest: bool):
+        """注入延迟和故障，返回故障响应或None"""
+        stats['requests'] += 1
+        time.sleep(faults.delay())
+        fault = faults.choose_fault()
+        if fault == 'throttle':
+            stats['throttled'] += 1
+            if rest:
+                return jsonify({'errors': [{'errorId': 2001, 'domain': 'ACCESS', 'category': 'REQUEST',
+                                            'message': 'Too many requests. The request limit has been reached.'}]}), 429
+            return Response(_trading_error('518', 'Call usage limit has been reached.'), mimetype='text/xml')
+        if fault == 'error':
+            stats['errors'] += 1
+            return Response('Service Unavailable', status=503)
+        return fault
+
+    def maybe_malformed(response: Response, fault) -> Response:
+        if fault == 'malformed':
+            stats['malformed'] += 1
+            data = response.get_data()
+            response.set_data(data[:len(data) // 2])
+        return response
+
+    def task_status(task: Dict) -> str:
+        elapsed = time.time() - task['created_at']
+        if elapsed >= settings.report_delay:
+            return 'COMPLETED'
+        return 'IN_PROCESS' if elapsed >= settings.report_delay / 2 else 'QUEUED'
+
+    def task_json(task_id: str, task: Dict) -> Dict:
+        status = task_status(task)
+        return {
+            'taskId': task_id,
+            'status': status,
+            'feedType': 'LMS_ACTIVE_INVENTORY_REPORT',
+            'schemaVersion': '1.0',
+            'creationDate': time.strftime('%Y-%m-%dT%H:%M:%S.000Z', time.gmtime(task['created_at'])),
+            'completionDate': time.strftime('%Y-%m-%dT%H:%M:%S.000Z', time.gmtime(task['created_at'] + settings.report_delay))
+            if status == 'COMPLETED' else None,
+            'detailHref': f'{FEED_PREFIX}/inventory_task/{task_id}',
+        }
+
+    @app.route(f'{FEED_PREFIX}/inventory_task', methods=['POST'])
+    def create_inventory_task():
+        fault = inject(rest=True)
+        if fault not in (None, 'malformed'):
+            return fault
+        task_id = f'task-{uuid.uuid4().hex[:12]}'
+        with tasks_lock:
+            tasks[task_id] = {'created_at': time.time(),
+                              'marketplace': request.headers.get('X-EBAY-C-MARKETPLACE-ID', 'EBAY_US')}
+        response = Response(status=202)
+        response.headers['Location'] = f'{request.host_url.rstrip("/")}{FEED_PREFIX}/inventory_task/{task_id}'
+        return response
+
+    @app.route(f'{FEED_PREFIX}/inventory_task', methods=['GET'])
+    def list_inventory_tasks():
+        fault = inject(rest=True)
+        if fault not in (None, 'malformed'):
+            return fault
+        limit = int(request.args.get('limit', 10))
+        offset = int(request.args.get('offset', 0))
+        with tasks_lock:
+            all_tasks = sorted(tasks.items(), key=lambda entry: entry[1]['created_at'], reverse=True)
+        page = [task_json(task_id, task) for task_id, task in all_tasks[offset:offset + limit]]
+        body = {'tasks': page, 'total': len(all_tasks), 'limit': limit, 'offset': offset}
+        if offset + limit < len(all_tasks):
+            body['next'] = f'{FEED_PREFIX}/inventory_task?limit={limit}&offset={offset + limit}'
+        return maybe_malformed(jsonify(body), fault)
+
+    @app.route(f'{FEED_PREFIX}/inventory_task/<task_id>', methods=['GET'])
+    def get_inventory_task(task_id):
+        fault = inject(rest=True)
+        if fault not in (None, 'malformed'):
+            return fault
+        with tasks_lock:
+            task = tasks.get(task_id)
+        if task is None:
+            return jsonify({'errors': [{'errorId': 160022, 'message': 'The task ID does not exist.'}]}), 404
+        return maybe_malformed(jsonify(task_json(task_id, task)), fault)
+
+    @app.route(f'{FEED_PREFIX}/task/<task_id>/download_result_file', methods=['GET'])
+    def download_result_file(task_id):
+        fault = inject(rest=True)
+        if fault not in (None, 'malformed'):
+            return fault
+        with tasks_lock:
+            task = tasks.get(task_id)
+        if task is None or task_status(task) != 'COMPLETED':
+            return jsonify({'errors': [{'errorId': 160023, 'message': 'The file is not available.'}]}), 404
+        if 'report' not in report_cache:
+            report_cache['report'] = build_lms_report_zip(item_list)
+        response = Response(report_cache['report'], mimetype='application/octet-stream')
+        response.headers['Content-Disposition'] = f'attachment; filename="{task_id}.zip"'
+        return maybe_malformed(response, fault)
+
+    @app.route(TRADING_PATH, methods=['POST'])
+    def trading_api():
+        fault = inject(rest=False)
+        if fault not in (None, 'malformed'):
+            return fault
+        body = request.get_data(as_text=True)
+        call_name = request.headers.get('X-EBAY-API-CALL-NAME', '')
+        if call_name == 'GetItem':
+            item = catalog.get(_xml_value(body, 'ItemID'))
+            xml = build_item_response(item) if item else _trading_error(
+                '17', 'This item cannot be accessed because the listing has been deleted or you are not the seller.'
+            )
+        elif call_name == 'GetSellerList':
+            xml = _seller_list_response(item_list, int(_xml_value(body, 'EntriesPerPage', '200')),
+                                        int(_xml_value(body, 'PageNumber', '1')))
+        else:
+            xml = _trading_error('2', f'Unsupported API call {call_name}.')
+        return maybe_malformed(Response(xml, mimetype='text/xml'), fault)
+
+    @app.route(TOKEN_PATH, methods=['POST'])
+    def token():
+        inject(rest=True)
+        return jsonify({
+            'access_token': f'standin-{uuid.uuid4().hex}',
+            'refresh_token': request.form.get('refresh_token') or f'standin-refresh-{uuid.uuid4().hex}',
+            'token_type': 'User Access Token',
+            'expires_in': 7200,
+        })
+
+    @app.route('/_standin/stats')
+    def standin_stats():
+        return jsonify({**stats, 'tasks': len(tasks), 'items': len(catalog)})
+
+    return app
+
+
+def _seller_list_response(items, entries_per_page: int, page_number: int) -> str:
+    """GetSellerList分页响应"""
+    entries_per_page = max(1, min(entries_per_page, 200))
+    total_pages = max(1, -(-len(items) // entries_per_page))
+    page = items[(page_number - 1) * entries_per_page:page_number * entries_per_page]
+    item_xml = ''.join(
+        f'<Item><ItemID>{item["ItemID"]}</ItemID><Title>{escape(item["Title"])}</Title><SKU>{item["SKU"]}</SKU>'
+        f'<Quantity>{item["Quantity"]}</Quantity><SellingStatus><CurrentPrice currencyID="{item["Currency"]}">'
+        f'{item["CurrentPrice"]}</CurrentPrice></SellingStatus></Item>'
+        for item in page
+    )
+    return f'''<?xml version="1.0" encoding="UTF-8"?>
+<GetSellerListResponse xmlns="{EBAY_NS}">
+  <Ack>Success</Ack>
+  <PaginationResult><TotalNumberOfPages>{total_pages}</TotalNumberOfPages><TotalNumberOfEntries>{len(items)}</TotalNumberOfEntries></PaginationResult>
+  <HasMoreItems>{'true' if page_number < total_pages else 'false'}</HasMoreItems>
+  <ItemArray>{item_xml}</ItemArray>
+  <ItemsPerPage>{entries_per_page}</ItemsPerPage>
+  <PageNumber>{page_number}</PageNumber>
+  <ReturnedItemCountActual>{len(page)}</ReturnedItemCountActual>
+</GetSellerListResponse>'''
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--port', type=int, default=9000)
+    parser.add_argument('--items', type=int, default=1000, help='报告中的商品数')
+    parser.add_argument('--specifics', type=int, default=8, help='每个商品的Item Specifics数量')
+    parser.add_argument('--categories', type=int, default=50)
+    parser.add_argument('--latency', choices=['none', 'fixed', 'uniform', 'lognormal'], default='lognormal')
+    parser.add_argument('--latency-ms', type=float, default=150.0)
+    parser.add_argument('--latency-spread', type=float, default=0.5)
+    parser.add_argument('--throttle-rate', type=float, default=0.0)
+    parser.add_argument('--error-rate', type=float, default=0.0)
+    parser.add_argument('--malformed-rate', type=float, default=0.0)
+    parser.add_argument('--report-delay', type=float, default=10.0, help='库存报告完成所需秒数')
+    parser.add_argument('--seed', type=int, default=1)
+    mode = parser.add_mutually_exclusive_group()
+    mode.add_argument('--record', metavar='DIR', help='转发到真实eBay并录制响应')
+    mode.add_argument('--replay', metavar='DIR', help='回放录制的响应')
+    args = parser.parse_args()
+
+    settings = StandinSettings(
+        items=args.items, specifics_per_item=args.specifics, categories=args.categories,
+        latency=args.latency, latency_ms=args.latency_ms, latency_spread=args.latency_spread,
+        throttle_rate=args.throttle_rate, error_rate=args.error_rate, malformed_rate=args.malformed_rate,
+        report_delay=args.report_delay, seed=args.seed, record_dir=args.record, replay_dir=args.replay,
+    )
+    create_standin_app(settings).run(host=args.host, port=args.port, threaded=True)
+
+
+if __name__ == '__main__':
+    main()
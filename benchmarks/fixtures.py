@@ -0,0 +1,126 @@
+"""
+基准测试用的模拟eBay响应
+"""
+import random
+import zipfile
+from io import BytesIO
+from typing import Dict, List
+from xml.sax.saxutils import escape
+
+from app.services.xml_service import XMLService
+
+SPECIFIC_NAMES = ['Brand', 'Color', 'Size', 'Material', 'Style', 'Type', 'Model', 'Country/Region of Manufacture',
+                  'MPN', 'Theme', 'Character', 'Features', 'Pattern', 'Department', 'Year Manufactured',
+                  'Vintage', 'Era', 'Original/Licensed Reproduction', 'Signed', 'Number of Items in Set']
+SPECIFIC_VALUES = ['Unbranded', 'Black', 'White', 'Large', 'Cotton', 'Vintage', 'Japan', 'Does Not Apply', 'Blue',
+                   'Hand Made', 'Original', 'Yes', 'No', '1960-1969', 'Ceramic & Porcelain', 'Wood & Bamboo']
+EBAY_NS = 'urn:ebay:apis:eBLBaseComponents'
+
+
+def build_get_item_response(item_id: str, currency: str = 'USD', specifics_count: int = 5) -> str:
+    """构建GetItem响应XML"""
+    specifics = ''.join(
+        f'<NameValueList><Name>Spec{i}</Name><Value>Value {i} of {item_id}</Value></NameValueList>'
+        for i in range(specifics_count)
+    )
+    return f'''<?xml version="1.0" encoding="UTF-8"?>
+<GetItemResponse xmlns="urn:ebay:apis:eBLBaseComponents">
+  <Ack>Success</Ack>
+  <Item>
+    <ItemID>{item_id}</ItemID>
+    <Title>Benchmark Item {item_id}</Title>
+    <SKU>SKU-{item_id}</SKU>
+    <Quantity>3</Quantity>
+    <SellingStatus><CurrentPrice currencyID="{currency}">19.99</CurrentPrice></SellingStatus>
+    <PrimaryCategory><CategoryID>1234</CategoryID><CategoryName>Collectibles</CategoryName></PrimaryCategory>
+    <ItemSpecifics>{specifics}</ItemSpecifics>
+  </Item>
+</GetItemResponse>'''
+
+
+def generate_items(count: int, specifics_per_item: int = 8, categories: int = 50, seed: int = 1) -> List[Dict]:
+    """生成模拟商品（ItemID、标题、分类分布、Item Specifics），相同参数结果相同"""
+    rng = random.Random(seed)
+    specifics_per_item = min(specifics_per_item, len(SPECIFIC_NAMES))
+    items = []
+    for i in range(count):
+        category = rng.randint(1, categories)
+        items.append({
+            'ItemID': str(200000000000 + i),
+            'Title': f'Vintage listing {i} & accessories <lot> with a realistic length title',
+            'SKU': f'SKU-{i:08d}',
+            'Quantity': str(rng.randint(1, 20)),
+            'CurrentPrice': f'{rng.uniform(1, 500):.2f}',
+            'Currency': 'USD',
+            'CategoryID': str(10000 + category),
+            'CategoryName': f'Collectibles:Category {category}',
+            'ItemSpecifics': {
+                name: rng.choice(SPECIFIC_VALUES) for name in rng.sample(SPECIFIC_NAMES, specifics_per_item)
+            }
+        })
+    return items
+
+
+def build_item_response(item: Dict) -> str:
+    """按generate_items生成的商品构建GetItem响应XML"""
+    specifics = ''.join(
+        f'<NameValueList><Name>{escape(name)}</Name><Value>{escape(value)}</Value></NameValueList>'
+        for name, value in item['ItemSpecifics'].items()
+    )
+    return f'''<?xml version="1.0" encoding="UTF-8"?>
+<GetItemResponse xmlns="{EBAY_NS}">
+  <Ack>Success</Ack>
+  <Item>
+    <ItemID>{item['ItemID']}</ItemID>
+    <Title>{escape(item['Title'])}</Title>
+    <SKU>{item['SKU']}</SKU>
+    <Quantity>{item['Quantity']}</Quantity>
+    <SellingStatus><CurrentPrice currencyID="{item['Currency']}">{item['CurrentPrice']}</CurrentPrice></SellingStatus>
+    <PrimaryCategory><CategoryID>{item['CategoryID']}</CategoryID><CategoryName>{escape(item['CategoryName'])}</CategoryName></PrimaryCategory>
+    <ItemSpecifics>{specifics}</ItemSpecifics>
+  </Item>
+</GetItemResponse>'''
+
+
+def build_lms_report_zip(items: List[Dict]) -> bytes:
+    """构建LMS_ACTIVE_INVENTORY_REPORT结果ZIP（与Feed API下载的文件结构相同）"""
+    rows = ''.join(
+        f'<SKUDetails><SKU>{item["SKU"]}</SKU><Price>{item["CurrentPrice"]}</Price>'
+        f'<Quantity>{item["Quantity"]}</Quantity><ItemID>{item["ItemID"]}</ItemID></SKUDetails>'
+        for item in items
+    )
+    xml = (
+        f'<?xml version="1.0" encoding="UTF-8"?>'
+        f'<BulkDataExchangeResponses xmlns="{EBAY_NS}">'
+        f'<ActiveInventoryReport><Ack>Success</Ack><Version>1</Version>{rows}</ActiveInventoryReport>'
+        f'</BulkDataExchangeResponses>'
+    )
+    output = BytesIO()
+    with zipfile.ZipFile(output, 'w', zipfile.ZIP_DEFLATED) as zip_file:
+        zip_file.writestr('ActiveInventoryReport.xml', xml)
+    return output.getvalue()
+
+
+class OfflineXMLService(XMLService):
+    """不访问网络的XMLService，GetItem调用直接返回模拟响应"""
+    
+    def __init__(self, config=None, specifics_count: int = 5):
+        super().__init__(config)
+        self.specifics_count = specifics_count
+    
+    def _get_item_details_with_curl(self, item_id: str, auth_token: str):
+        return build_get_item_response(item_id, specifics_count=self.specifics_count)
+
+
+def bench_config(**overrides) -> dict:
+    """基准测试配置（不需要Flask应用上下文）"""
+    config = {
+        'MAX_WORKERS': 4,
+        'TASK_TIMEOUT': 600,
+        'ITEM_REQUEST_DELAY': 0,
+        'EBAY_APP_ID': 'bench-app-id',
+        'EBAY_CERT_ID': 'bench-cert-id',
+        'EBAY_TRADING_API_URL': 'http://127.0.0.1:1/ws/api.dll',
+    }
+    config.update(overrides)
+    return config
@@ -0,0 +1,349 @@
+"""
+端到端负载测试
+
+按生产方式启动应用（gunicorn + gevent，gunicorn.conf.py + wsgi.py），eBay API指向
+本地替身服务器（benchmarks/ebay_standin.py），然后用若干虚拟用户按权重混合请求：
+  - poll:     GET /api/tasks/progress-poll/<job>
+  - sse:      GET /api/tasks/progress/<job>（记录首个事件延迟，保持连接 --sse-seconds 秒）
+  - export:   POST /api/tasks/export（服务端创建报告并生成增强CSV）
+  - download: GET /api/tasks/enhanced-csv/<job>
+
+输出各操作的延迟分位数、吞吐量、错误数、同时在线的SSE连接数，以及每个工作进程的峰值RSS，
+结果保存为JSON（含提交ID）。
+
+运行方式:
+  python -m benchmarks.load_test --workers 2 --users 200 --duration 60 --mix poll=6 sse=2 export=1 download=1
+  python -m benchmarks.load_test --items 5000 --latency-ms 300 --throttle-rate 0.02 --transport pooled
+"""
+import argparse
+import json
+import os
+import random
+import shutil
+import socket
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+from collections import defaultdict
+from datetime import datetime
+
+import psutil
+import requests
+
+from benchmarks.bench_pipeline import RESULTS_DIR, git_commit
+
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+OPERATIONS = ['poll', 'sse', 'export', 'download']
+
+
+def free_port() -> int:
+    with socket.socket() as sock:
+        sock.bind(('127.0.0.1', 0))
+        return sock.getsockname()[1]
+
+
+def wait_until_ready(url: str, timeout: float = 30.0) -> None:
+    deadline = time.time() + timeout
+    while time.time() < deadline:
+        try:
+            requests.get(url, timeout=1)
+            return
+        except requests.RequestException:
+            time.sleep(0.2)
+    raise RuntimeError(f'服务未在{timeout}秒内启动: {url}')
+
+
+def percentile(sorted_values, fraction: float) -> float:
+    if not sorted_values:
+        return 0.0
+    index = min(len(sorted_values) - 1, int(round(fraction * (len(sorted_values) - 1))))
+    return sorted_values[index]
+
+
+class Recorder:
+    """线程安全地收集各操作的延迟和错误"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.latencies = defaultdict(list)
+        self.errors = defaultdict(int)
+        self.active_streams = 0
+        self.max_active_streams = 0
+
+    def record(self, operation: str, seconds: float, ok: bool = True) -> None:
+        with self._lock:
+            if ok:
+                self.latencies[operation].append(seconds)
+            else:
+                self.errors[operation] += 1
+
+    def stream_opened(self) -> None:
+        with self._lock:
+            self.active_streams += 1
+            self.max_active_streams = max(self.max_active_streams, self.active_streams)
+
+    def stream_closed(self) -> None:
+        with self._lock:
+            self.active_streams -= 1
+
+    def summary(self, duration: float) -> dict:
+        operations = {}
+        for operation in sorted(set(self.latencies) | set(self.errors)):
+            values = sorted(self.latencies[operation])
+            operations[operation] = {
+                'count': len(values),
+                'errors': self.errors[operation],
+                'throughput_rps': round(len(values) / duration, 2),
+                'p50_ms': round(percentile(values, 0.50) * 1000, 1),
+                'p90_ms': round(percentile(values, 0.90) * 1000, 1),
+                'p99_ms': round(percentile(values, 0.99) * 1000, 1),
+                'max_ms': round((values[-1] if values else 0.0) * 1000, 1),
+            }
+        return {'operations': operations, 'max_active_sse_streams': self.max_active_streams}
+
+
+class RSSSampler(threading.Thread):
+    """定期采样gunicorn主进程及各工作进程的RSS"""
+
+    def __init__(self, pid: int, interval: float = 1.0):
+        super().__init__(daemon=True)
+        self.pid = pid
+        self.interval = interval
+        self.peak_rss = {}
+        self._stop_event = threading.Event()
+
+    def run(self):
+        while not self._stop_event.is_set():
+            try:
+                master = psutil.Process(self.pid)
+                for process in [master] + master.children():
+                    rss = process.memory_info().rss
+                    self.peak_rss[process.pid] = max(self.peak_rss.get(process.pid, 0), rss)
+            except psutil.Error:
+                pass
+            self._stop_event.wait(self.interval)
+
+    def stop(self) -> dict:
+        self._stop_event.set()
+        self.join()
+        mb = 1024 * 1024
+        return {
+            ('master' if pid == self.pid else f'worker-{pid}'): round(rss / mb, 1)
+            for pid, rss in sorted(self.peak_rss.items())
+        }
+
+
+class VirtualUser(threading.Thread):
+    """按权重随机执行操作直到截止时间"""
+
+    def __init__(self, base_url, cookie, mix, jobs, jobs_lock, recorder, deadline, sse_seconds, seed):
+        super().__init__(daemon=True)
+        self.base_url = base_url
+        self.session = requests.Session()
+        # 生产配置的会话Cookie带Secure标记，HTTP下需要手动携带
+        self.session.headers['Cookie'] = cookie
+        self.operations, self.weights = zip(*mix.items())
+        self.jobs = jobs
+        self.jobs_lock = jobs_lock
+        self.recorder = recorder
+        self.deadline = deadline
+        self.sse_seconds = sse_seconds
+        self.rng = random.Random(seed)
+
+    def _random_job(self):
+        with self.jobs_lock:
+            return self.rng.choice(self.jobs) if self.jobs else None
+
+    def run(self):
+        while time.time() < self.deadline:
+            operation = self.rng.choices(self.operations, self.weights)[0]
+            try:
+                getattr(self, f'do_{operation}')()
+            except requests.RequestException:
+                self.recorder.record(operation, 0.0, ok=False)
+
+    def do_poll(self):
+        job_id = self._random_job()
+        start = time.perf_counter()
+        response = self.session.get(f'{self.base_url}/api/tasks/progress-poll/{job_id}', timeout=30)
+        self.recorder.record('poll', time.perf_counter() - start, response.status_code in (200, 404))
+
+    def do_sse(self):
+        job_id = self._random_job()
+        start = time.perf_counter()
+        self.recorder.stream_opened()
+        try:
+            with self.session.get(f'{self.base_url}/api/tasks/progress/{job_id}', stream=True, timeout=30) as response:
+                first_event = None
+                for line in response.iter_lines():
+                    if line.startswith(b'data:') and first_event is None:
+                        first_event = time.perf_counter() - start
+                        self.recorder.record('sse_first_event', first_event)
+                    if time.perf_counter() - start >= self.sse_seconds or time.time() >= self.deadline:
+                        break
+                self.recorder.record('sse', time.perf_counter() - start, first_event is not None)
+        finally:
+            self.recorder.stream_closed()
+
+    def do_export(self):
+        start = time.perf_counter()
+        response = self.session.post(f'{self.base_url}/api/tasks/export', json={}, timeout=60)
+        ok = response.status_code == 202
+        self.recorder.record('export', time.perf_counter() - start, ok)
+        if ok:
+            with self.jobs_lock:
+                self.jobs.append(response.json()['job_id'])
+
+    def do_download(self):
+        job_id = self._random_job()
+        start = time.perf_counter()
+        response = self.session.get(f'{self.base_url}/api/tasks/enhanced-csv/{job_id}', timeout=60)
+        response.content  # 读完响应体，计入下载时间
+        # 未完成的作业返回404，单独统计
+        operation = 'download' if response.status_code == 200 else 'download_not_ready'
+        self.recorder.record(operation, time.perf_counter() - start, response.status_code in (200, 404))
+
+
+def start_services(args, workdir):
+    """启动替身服务器和gunicorn，返回 (基础URL, 替身进程, gunicorn进程)"""
+    standin_port, app_port = free_port(), free_port()
+    standin_url = f'http://127.0.0.1:{standin_port}'
+    standin_log = open(os.path.join(workdir, 'standin.log'), 'w')
+    standin = subprocess.Popen([
+        sys.executable, '-m', 'benchmarks.ebay_standin', '--port', str(standin_port),
+        '--items', str(args.items), '--latency', args.latency, '--latency-ms', str(args.latency_ms),
+        '--throttle-rate', str(args.throttle_rate), '--report-delay', str(args.report_delay),
+    ], cwd=REPO_ROOT, stdout=standin_log, stderr=subprocess.STDOUT)
+    wait_until_ready(f'{standin_url}/_standin/stats')
+
+    env = dict(
+        os.environ,
+        PORT=str(app_port),
+        WEB_CONCURRENCY=str(args.workers),
+        FLASK_ENV='production',
+        SECRET_KEY='load-test-secret',
+        LOG_LEVEL='warning',
+        EBAY_USER_ACCESS_TOKEN='load-test-token',
+        EBAY_APP_ID='load-test-app',
+        EBAY_CERT_ID='load-test-cert',
+        EBAY_FEED_API_BASE_URL=f'{standin_url}/sell/feed/v1',
+        EBAY_TRADING_API_URL=f'{standin_url}/ws/api.dll',
+        EBAY_TOKEN_URL=f'{standin_url}/identity/v1/oauth2/token',
+        ITEM_FETCH_TRANSPORT=args.transport,
+        ITEM_REQUEST_DELAY='0',
+        REPORT_POLL_INITIAL_DELAY='0.5',
+        REPORT_POLL_MAX_DELAY='2',
+    )
+    # 在临时目录中运行，temp/和logs/不写入仓库
+    app_log = open(os.path.join(workdir, 'gunicorn.log'), 'w')
+    gunicorn = subprocess.Popen([
+        sys.executable, '-m', 'gunicorn', '-c', os.path.join(REPO_ROOT, 'gunicorn.conf.py'),
+        '--pythonpath', REPO_ROOT, 'wsgi:application',
+    ], cwd=workdir, env=env, stdout=app_log, stderr=subprocess.STDOUT)
+    base_url = f'http://127.0.0.1:{app_port}'
+    wait_until_ready(f'{base_url}/health', timeout=60)
+    return base_url, standin, gunicorn
+
+
+def login(base_url: str) -> str:
+    """通过调试令牌登录，返回会话Cookie"""
+    response = requests.get(f'{base_url}/', timeout=10)
+    response.raise_for_status()
+    return '; '.join(f'{cookie.name}={cookie.value}' for cookie in response.cookies)
+
+
+def run(args) -> dict:
+    workdir = tempfile.mkdtemp(prefix='wood-load-')
+    standin = gunicorn = None
+    try:
+        base_url, standin, gunicorn = start_services(args, workdir)
+        cookie = login(base_url)
+        recorder = Recorder()
+        jobs, jobs_lock = [], threading.Lock()
+
+        # 预先创建若干作业，供轮询/SSE/下载使用
+        seed_user = VirtualUser(base_url, cookie, {'export': 1}, jobs, jobs_lock, recorder, 0, 0, 0)
+        for _ in range(args.initial_jobs):
+            seed_user.do_export()
+
+        sampler = RSSSampler(gunicorn.pid)
+        sampler.start()
+        start = time.time()
+        deadline = start + args.duration
+        users = [
+            VirtualUser(base_url, cookie, args.mix, jobs, jobs_lock, recorder, deadline, args.sse_seconds, seed)
+            for seed in range(args.users)
+        ]
+        for user in users:
+            user.start()
+        for user in users:
+            user.join()
+        duration = time.time() - start
+
+        return {
+            'commit': git_commit(),
+            'created_at': datetime.now().isoformat(timespec='seconds'),
+            'params': {key: value for key, value in vars(args).items() if key != 'output'},
+            'duration_seconds': round(duration, 1),
+            **recorder.summary(duration),
+            'peak_rss_mb': sampler.stop(),
+            'jobs_created': len(jobs),
+        }
+    finally:
+        for process in (gunicorn, standin):
+            if process is not None:
+                process.terminate()
+                try:
+                    process.wait(timeout=15)
+                except subprocess.TimeoutExpired:
+                    process.kill()
+        if args.keep_logs:
+            print(f'日志目录: {workdir}')
+        else:
+            shutil.rmtree(workdir, ignore_errors=True)
+
+
+def parse_mix(values) -> dict:
+    mix = {}
+    for value in values:
+        operation, _, weight = value.partition('=')
+        if operation not in OPERATIONS:
+            raise argparse.ArgumentTypeError(f'未知的操作: {operation}')
+        mix[operation] = float(weight or 1)
+    return mix
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--workers', type=int, default=2, help='gunicorn工作进程数')
+    parser.add_argument('--users', type=int, default=50, help='并发虚拟用户数')
+    parser.add_argument('--duration', type=float, default=30.0, help='压测时长（秒）')
+    parser.add_argument('--mix', nargs='+', default=['poll=6', 'sse=2', 'export=1', 'download=1'],
+                        help='操作权重，如 poll=6 sse=2 export=1 download=1')
+    parser.add_argument('--sse-seconds', type=float, default=10.0, help='每个SSE连接保持的秒数')
+    parser.add_argument('--initial-jobs', type=int, default=3, help='开始前创建的作业数')
+    parser.add_argument('--items', type=int, default=500, help='替身报告中的商品数')
+    parser.add_argument('--latency', default='lognormal', choices=['none', 'fixed', 'uniform', 'lognormal'])
+    parser.add_argument('--latency-ms', type=float, default=150.0)
+    parser.add_argument('--throttle-rate', type=float, default=0.0)
+    parser.add_argument('--report-delay', type=float, default=5.0)
+    parser.add_argument('--transport', choices=['curl', 'pooled'], default='pooled')
+    parser.add_argument('--output', help='结果JSON路径，默认 benchmarks/results/load-<commit>.json')
+    parser.add_argument('--keep-logs', action='store_true', help='保留gunicorn和替身服务器日志')
+    args = parser.parse_args()
+    args.mix = parse_mix(args.mix)
+
+    result = run(args)
+    print(json.dumps(result, ensure_ascii=False, indent=2))
+
+    os.makedirs(RESULTS_DIR, exist_ok=True)
+    output_path = args.output or os.path.join(RESULTS_DIR, f'load-{result["commit"]}.json')
+    with open(output_path, 'w', encoding='utf-8') as f:
+        json.dump(result, f, ensure_ascii=False, indent=2)
+    print(f'结果已保存: {output_path}')
+
+
+if __name__ == '__main__':
+    main()
@@ -18,11 +18,15 @@ class BaseConfig:
     EBAY_USER_ACCESS_TOKEN = os.environ.get('EBAY_USER_ACCESS_TOKEN')  # 调试用
     
     # eBay API端点
-    EBAY_OAUTH_BASE_URL = 'https://auth.ebay.com/oauth2/authorize'
-    EBAY_TOKEN_URL = 'https://api.ebay.com/identity/v1/oauth2/token'
-    EBAY_FEED_API_BASE_URL = 'https://api.ebay.com/sell/feed/v1'
-    EBAY_TRADING_API_URL = 'https://api.ebay.com/ws/api.dll'
+    # 端点可通过环境变量指向本地替身服务器（benchmarks/ebay_standin.py）
+    EBAY_OAUTH_BASE_URL = os.environ.get('EBAY_OAUTH_BASE_URL', 'https://auth.ebay.com/oauth2/authorize')
+    EBAY_TOKEN_URL = os.environ.get('EBAY_TOKEN_URL', 'https://api.ebay.com/identity/v1/oauth2/token')
+    EBAY_FEED_API_BASE_URL = os.environ.get('EBAY_FEED_API_BASE_URL', 'https://api.ebay.com/sell/feed/v1')
+    EBAY_TRADING_API_URL = os.environ.get('EBAY_TRADING_API_URL', 'https://api.ebay.com/ws/api.dll')
     EBAY_SCOPES = ['https://api.ebay.com/oauth/api_scope/sell.inventory']
+    TOKEN_REFRESH_MARGIN = int(os.environ.get('TOKEN_REFRESH_MARGIN', 300))  # 令牌过期前多少秒主动刷新
+    EBAY_MARKETPLACE_ID = os.environ.get('EBAY_MARKETPLACE_ID', 'EBAY_US')  # 未指定站点时的默认站点
+    EXPORT_MAX_MARKETPLACES = int(os.environ.get('EXPORT_MAX_MARKETPLACES', 4))  # 一次导出最多同时处理的站点数
     
     # 会话配置
     PERMANENT_SESSION_LIFETIME = timedelta(hours=2)
@@ -36,15 +40,105 @@ class BaseConfig:
     # 性能配置
     MAX_WORKERS = int(os.environ.get('MAX_WORKERS', 4))
     TASK_TIMEOUT = int(os.environ.get('TASK_TIMEOUT', 300))  # 5分钟
+    FETCH_TIME_BUDGET = int(os.environ.get('FETCH_TIME_BUDGET', TASK_TIMEOUT))  # 批量获取的时间预算（秒），0为不限制
+    FETCH_BUDGET_MARGIN = int(os.environ.get('FETCH_BUDGET_MARGIN', 20))  # 截止前预留给在途请求的时间（秒）
+    ITEM_REQUEST_DELAY = float(os.environ.get('ITEM_REQUEST_DELAY', 0.1))  # 单个GetItem调用前的间隔（秒）
+    ITEM_FETCH_MAX_CONCURRENCY = int(os.environ.get('ITEM_FETCH_MAX_CONCURRENCY', 8))  # 每个进程中所有作业合计的GetItem并发上限
+    
+    # 进度上报节流配置
+    PROGRESS_UPDATE_INTERVAL = float(os.environ.get('PROGRESS_UPDATE_INTERVAL', 0.5))  # 秒
+    PROGRESS_UPDATE_MIN_ITEMS = int(os.environ.get('PROGRESS_UPDATE_MIN_ITEMS', 50))
+    PROGRESS_BATCH_MAX_TASKS = int(os.environ.get('PROGRESS_BATCH_MAX_TASKS', 50))  # 批量进度接口一次最多查询的任务数
+    PROGRESS_LONGPOLL_MAX_WAIT = float(os.environ.get('PROGRESS_LONGPOLL_MAX_WAIT', 25))  # 长轮询最长挂起时间（秒）
+    PROGRESS_LONGPOLL_INTERVAL = float(os.environ.get('PROGRESS_LONGPOLL_INTERVAL', 0.5))  # 长轮询检查进度变化的间隔（秒）
+    PROGRESS_SNAPSHOT_INTERVAL = float(os.environ.get('PROGRESS_SNAPSHOT_INTERVAL', 1.0))  # 跨进程进度快照仅计数变化时的最短写入间隔（秒）
+    
+    # HTTP连接池配置（进程内所有EbayService共享）
+    HTTP_POOL_CONNECTIONS = int(os.environ.get('HTTP_POOL_CONNECTIONS', 10))  # 缓存的主机连接池数量
+    HTTP_POOL_MAXSIZE = int(os.environ.get('HTTP_POOL_MAXSIZE', 20))  # 每个主机保持的最大连接数
+    HTTP_POOL_BLOCK = os.environ.get('HTTP_POOL_BLOCK', 'false').lower() == 'true'
+    HTTP_CONNECT_TIMEOUT = float(os.environ.get('HTTP_CONNECT_TIMEOUT', 5))  # 秒
+    HTTP_READ_TIMEOUT = float(os.environ.get('HTTP_READ_TIMEOUT', 60))  # 秒
+    HTTP_TCP_KEEPALIVE = os.environ.get('HTTP_TCP_KEEPALIVE', 'true').lower() == 'true'
+    ITEM_FETCH_TRANSPORT = os.environ.get('ITEM_FETCH_TRANSPORT', 'curl')  # curl 或 pooled（使用共享连接池）
+    
+    # Feed API响应缓存配置
+    FEED_CACHE_ENABLED = os.environ.get('FEED_CACHE_ENABLED', 'true').lower() == 'true'
+    FEED_CACHE_MAX_ENTRIES = int(os.environ.get('FEED_CACHE_MAX_ENTRIES', 1024))
+    FEED_STATUS_CACHE_TTL = int(os.environ.get('FEED_STATUS_CACHE_TTL', 5))  # 进行中任务状态（秒）
+    FEED_FINAL_STATUS_CACHE_TTL = int(os.environ.get('FEED_FINAL_STATUS_CACHE_TTL', 3600))  # 已结束任务状态（秒）
+    FEED_RECENT_CACHE_TTL = int(os.environ.get('FEED_RECENT_CACHE_TTL', 15))  # 最近任务列表（秒）
+    FEED_TASK_PAGE_SIZE = int(os.environ.get('FEED_TASK_PAGE_SIZE', 200))  # 库存任务列表每页条数
+    
+    # 监控配置
+    METRICS_ENABLED = os.environ.get('METRICS_ENABLED', 'true').lower() == 'true'  # 是否开放 /metrics
+    METRICS_TOKEN = os.environ.get('METRICS_TOKEN', '')  # 设置后可用 Authorization: Bearer <令牌> 访问 /metrics
+    METRICS_ALLOWED_NETWORKS = os.environ.get('METRICS_ALLOWED_NETWORKS', '127.0.0.1/32,::1/128')  # 无需令牌即可访问 /metrics 的来源网段
+    
+    # 链路追踪配置
+    TRACING_EXPORTER = os.environ.get('TRACING_EXPORTER', 'none')  # none / jsonl / otlp
+    TRACE_FILE = os.environ.get('TRACE_FILE', os.path.join(os.getcwd(), 'logs', 'traces.jsonl'))
+    OTLP_ENDPOINT = os.environ.get('OTLP_ENDPOINT', 'http://localhost:4318')
+    TRACE_SERVICE_NAME = os.environ.get('TRACE_SERVICE_NAME', 'wood')
+    TRACE_ITEM_SAMPLE_RATE = float(os.environ.get('TRACE_ITEM_SAMPLE_RATE', 0.01))  # 逐商品GetItem span的采样率
+    TRACE_SLOW_ITEM_SECONDS = float(os.environ.get('TRACE_SLOW_ITEM_SECONDS', 2.0))  # 超过此耗时的GetItem总是记录
+    
+    # 管理接口配置
+    ADMIN_TOKEN = os.environ.get('ADMIN_TOKEN', '')  # 为空时管理接口不可用
+    PROFILE_MAX_SECONDS = int(os.environ.get('PROFILE_MAX_SECONDS', 60))  # 单次采样分析的最长时间
+    PROFILE_SAMPLE_INTERVAL = float(os.environ.get('PROFILE_SAMPLE_INTERVAL', 0.01))  # 采样间隔（秒）
     
     # 日志配置
     LOG_LEVEL = os.environ.get('LOG_LEVEL', 'INFO')
     LOG_FORMAT = '%(asctime)s %(levelname)s %(name)s %(message)s'
+    LOG_CONSOLE = os.environ.get('LOG_CONSOLE', 'true').lower() == 'true'  # 是否输出到标准错误（Cloud Run日志）
+    LOG_FILE = os.environ.get('LOG_FILE', os.path.join('logs', 'wood.log'))  # 为空时只输出到控制台
+    LOG_FILE_MAX_BYTES = int(os.environ.get('LOG_FILE_MAX_BYTES', 10240000))
+    LOG_FILE_BACKUP_COUNT = int(os.environ.get('LOG_FILE_BACKUP_COUNT', 10))
+    LOG_QUEUE_SIZE = int(os.environ.get('LOG_QUEUE_SIZE', 10000))  # 日志队列上限，满时丢弃新日志
+    LOG_ITEM_BURST = int(os.environ.get('LOG_ITEM_BURST', 20))  # 逐商品日志：同一模板每个窗口最多输出条数
+    LOG_ITEM_WINDOW = float(os.environ.get('LOG_ITEM_WINDOW', 10))  # 逐商品日志限流窗口（秒）
     
     # 文件上传配置
     UPLOAD_FOLDER = os.path.join(os.getcwd(), 'uploads')
     TEMP_FOLDER = os.path.join(os.getcwd(), 'temp')
     
+    # 资源回收配置
+    PROGRESS_TASK_TTL = int(os.environ.get('PROGRESS_TASK_TTL', 3600))  # 已完成任务进度保留时间（秒）
+    PROGRESS_MAX_TASKS = int(os.environ.get('PROGRESS_MAX_TASKS', 500))
+    JANITOR_ENABLED = True
+    JANITOR_INTERVAL = int(os.environ.get('JANITOR_INTERVAL', 300))  # 秒
+    TEMP_FOLDER_QUOTA_MB = int(os.environ.get('TEMP_FOLDER_QUOTA_MB', 1024))
+    TEMP_FILE_MAX_AGE = int(os.environ.get('TEMP_FILE_MAX_AGE', 86400))  # 秒
+    TEMP_FILE_MIN_AGE = int(os.environ.get('TEMP_FILE_MIN_AGE', 300))  # 宽限期，避免删除正在写入的文件
+    
+    # 服务端商品数据存储配置
+    LISTING_STORE_TTL = int(os.environ.get('LISTING_STORE_TTL', 3600))  # 秒
+    LISTING_STORE_MEMORY_MB = int(os.environ.get('LISTING_STORE_MEMORY_MB', 64))  # 每个工作进程的内存缓存上限
+    LISTING_STORE_DISK_MB = int(os.environ.get('LISTING_STORE_DISK_MB', 512))
+    
+    # 响应压缩和静态资源缓存配置
+    COMPRESS_ENABLED = os.environ.get('COMPRESS_ENABLED', 'true').lower() == 'true'
+    COMPRESS_MIN_SIZE = int(os.environ.get('COMPRESS_MIN_SIZE', 1024))  # 小于该字节数的响应不压缩
+    COMPRESS_LEVEL = int(os.environ.get('COMPRESS_LEVEL', 6))  # gzip压缩级别
+    COMPRESS_BROTLI_QUALITY = int(os.environ.get('COMPRESS_BROTLI_QUALITY', 4))  # 动态响应的brotli压缩质量
+    STATIC_MAX_AGE = int(os.environ.get('STATIC_MAX_AGE', 31536000))  # 带内容哈希的静态资源缓存时间（秒）
+    
+    # 导出文件缓存配置
+    ARTIFACT_CACHE_ENABLED = os.environ.get('ARTIFACT_CACHE_ENABLED', 'true').lower() == 'true'
+    ARTIFACT_CACHE_MB = int(os.environ.get('ARTIFACT_CACHE_MB', 128))  # 每个工作进程的缓存上限
+    
+    # 检查点配置
+    CHECKPOINT_FLUSH_ITEMS = int(os.environ.get('CHECKPOINT_FLUSH_ITEMS', 50))  # 每写入N条记录同步一次磁盘
+    
+    # 并发后端配置: auto / thread / gevent / asyncio（auto按gunicorn工作进程类型选择）
+    CONCURRENCY_BACKEND = os.environ.get('CONCURRENCY_BACKEND', 'auto')
+    
+    # 服务端报告编排配置
+    REPORT_POLL_INITIAL_DELAY = float(os.environ.get('REPORT_POLL_INITIAL_DELAY', 5))  # 首次查询报告状态前等待（秒）
+    REPORT_POLL_MAX_DELAY = float(os.environ.get('REPORT_POLL_MAX_DELAY', 60))  # 指数退避上限（秒）
+    REPORT_POLL_TIMEOUT = int(os.environ.get('REPORT_POLL_TIMEOUT', 1800))  # 等待报告生成的最长时间（秒）
+    
     @staticmethod
     def init_app(app):
         """初始化应用配置"""
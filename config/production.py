@@ -28,24 +28,4 @@ class ProductionConfig(BaseConfig):
     @staticmethod
     def init_app(app):
         BaseConfig.init_app(app)
-        
-        # 生产环境特殊初始化
-        import logging
-        from logging.handlers import RotatingFileHandler
-        
-        if not os.path.exists('logs'):
-            os.mkdir('logs')
-        
-        file_handler = RotatingFileHandler(
-            'logs/wood.log', 
-            maxBytes=10240000, 
-            backupCount=10
-        )
-        file_handler.setFormatter(logging.Formatter(
-            '%(asctime)s %(levelname)s %(name)s %(message)s'
-        ))
-        file_handler.setLevel(logging.INFO)
-        app.logger.addHandler(file_handler)
-        
-        app.logger.setLevel(logging.INFO)
-        app.logger.info('Wood production startup')
+        # 日志handler由configure_logging统一配置（异步日志管道），这里不再重复添加
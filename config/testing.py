@@ -16,6 +16,9 @@ class TestingConfig(BaseConfig):
     # 测试环境特殊配置
     WTF_CSRF_ENABLED = False
     
+    # 测试环境不启动后台清理线程
+    JANITOR_ENABLED = False
+    
     # 使用内存数据库进行测试（如果需要）
     # SQLALCHEMY_DATABASE_URI = 'sqlite:///:memory:'
     
@@ -7,7 +7,9 @@ backlog = 2048
 
 # 工作进程 - Cloud Run优化设置
 workers = int(os.environ.get('WEB_CONCURRENCY', 2))
-worker_class = 'gevent'
+# gevent工作进程下应用自动使用gevent并发后端（CONCURRENCY_BACKEND=auto）
+worker_class = os.environ.get('GUNICORN_WORKER_CLASS', 'gevent')
+threads = int(os.environ.get('GUNICORN_THREADS', 4))  # 仅gthread工作进程使用
 worker_connections = 500
 max_requests = 1000
 max_requests_jitter = 50
@@ -45,3 +47,8 @@ def pre_fork(server, worker):
 
 def post_fork(server, worker):
     server.log.info("ワーカーフォーク後: %s", worker.pid)
+
+def worker_exit(server, worker):
+    # 工作进程退出时不执行atexit，需主动写出日志队列中剩余的日志
+    from app.utils.log_pipeline import log_pipeline
+    log_pipeline.stop()
@@ -0,0 +1,96 @@
+"""
+管理接口测试
+"""
+import pytest
+
+
+@pytest.fixture
+def admin_app(app, tmp_path):
+    from app.utils.profiler import task_profiler
+    app.config['ADMIN_TOKEN'] = 'secret'
+    task_profiler.output_dir = str(tmp_path)
+    return app
+
+
+def test_admin_endpoints_hidden_without_token_config(client):
+    """测试未配置ADMIN_TOKEN时管理接口不可用"""
+    assert client.post('/api/admin/profile/task-1/cprofile').status_code == 404
+
+
+def test_admin_token_required(admin_app, client):
+    """测试令牌错误时拒绝访问"""
+    response = client.post('/api/admin/profile/task-1/cprofile', headers={'X-Admin-Token': 'wrong'})
+    assert response.status_code == 403
+
+
+def test_sample_requires_task_running_in_this_worker(admin_app, client):
+    """测试本进程未运行该任务时返回409"""
+    response = client.post('/api/admin/profile/task-1/sample?seconds=1', headers={'X-Admin-Token': 'secret'})
+    assert response.status_code == 409
+
+
+def test_arm_then_download_cprofile(admin_app, client):
+    """测试标记任务并在运行后下载cProfile结果"""
+    from app.utils.profiler import task_profiler
+    headers = {'X-Admin-Token': 'secret'}
+    
+    assert client.get('/api/admin/profile/task-1/cprofile', headers=headers).status_code == 404
+    assert client.post('/api/admin/profile/task-1/cprofile', headers=headers).status_code == 202
+    with task_profiler.profile_run('task-1'):
+        sum(range(100))
+    
+    response = client.get('/api/admin/profile/task-1/cprofile', headers=headers)
+    assert response.status_code == 200
+    assert response.data
+
+
+def test_cprofile_includes_fetch_worker_threads(admin_app):
+    """测试cProfile结果包含抓取线程中执行的函数，而不只是作业线程的等待"""
+    import pstats
+    import threading
+    from app.utils.profiler import task_profiler
+    
+    def fetch_in_worker():
+        with task_profiler.track('task-1'):
+            sorted(range(1000), key=lambda value: -value)
+    
+    task_profiler.arm('task-1')
+    with task_profiler.profile_run('task-1'):
+        worker = threading.Thread(target=fetch_in_worker)
+        worker.start()
+        worker.join()
+    
+    stats = pstats.Stats(task_profiler.result_path('task-1'))
+    assert '<lambda>' in {name for _, _, name in stats.stats}
+
+
+def test_cprofile_under_gevent_keeps_job_profile(admin_app, monkeypatch):
+    """测试gevent下抓取greenlet不替换作业的Profile，抓取之后执行的代码也被记录"""
+    pytest.importorskip('gevent')
+    import pstats
+    import threading
+    import gevent.thread
+    from app.utils.concurrency import concurrency
+    from app.utils.profiler import task_profiler
+    
+    def generate_csv_after_fetch():
+        return sorted(range(1000), reverse=True)
+    
+    def fetch_item():
+        with task_profiler.track('task-1'):
+            concurrency.sleep(0)
+    
+    # 与gevent monkey patch后相同，线程ID按greenlet区分
+    monkeypatch.setattr(threading, 'get_ident', gevent.thread.get_ident)
+    concurrency.configure('gevent')
+    try:
+        task_profiler.arm('task-1')
+        with task_profiler.profile_run('task-1'):
+            with concurrency.executor(4) as executor:
+                executor.map(lambda _: fetch_item(), range(8))
+            generate_csv_after_fetch()
+    finally:
+        concurrency.configure('auto')
+    
+    stats = pstats.Stats(task_profiler.result_path('task-1'))
+    assert 'generate_csv_after_fetch' in {name for _, _, name in stats.stats}
@@ -0,0 +1,25 @@
+"""
+报告导出路由测试
+"""
+from app.api import reports
+
+
+def test_listings_kept_server_side_for_export(auth_session, monkeypatch):
+    """测试商品数据保存在服务端，会话中只有键"""
+    monkeypatch.setattr(reports.EbayService, 'create_inventory_task', lambda self, token: None)
+    
+    response = auth_session.post('/api/reports/generate')
+    assert response.status_code == 200
+    
+    with auth_session.session_transaction() as session:
+        assert 'listings_data' not in session
+        assert len(session['listings_key']) < 64
+    
+    export = auth_session.get('/api/reports/export/csv')
+    assert export.status_code == 200
+    assert b'DEMO-001' in export.data
+
+
+def test_export_without_listings(auth_session):
+    """测试未生成报告时导出返回400"""
+    assert auth_session.get('/api/reports/export/excel').status_code == 400
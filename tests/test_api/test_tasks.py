@@ -0,0 +1,198 @@
+"""
+任务处理流程测试
+"""
+import pytest
+from app.api import tasks
+from app.services.checkpoint_service import CheckpointService
+from app.services.csv_service import CSVService
+from app.services.xml_service import XMLService
+from app.utils.progress_manager import progress_manager, TaskStatus
+
+
+def _get_item_xml(item_id):
+    return f'''<?xml version="1.0" encoding="UTF-8"?>
+<GetItemResponse xmlns="urn:ebay:apis:eBLBaseComponents">
+  <Item>
+    <ItemID>{item_id}</ItemID>
+    <Title>Item {item_id}</Title>
+    <SKU>SKU-{item_id}</SKU>
+    <Quantity>1</Quantity>
+    <SellingStatus><CurrentPrice currencyID="USD">9.99</CurrentPrice></SellingStatus>
+    <ItemSpecifics><NameValueList><Name>Brand</Name><Value>B{item_id}</Value></NameValueList></ItemSpecifics>
+  </Item>
+</GetItemResponse>'''
+
+
+@pytest.fixture
+def pipeline_config(app, tmp_path):
+    """使用临时目录且不等待API间隔的配置"""
+    config = app.config.copy()
+    config.update({'TEMP_FOLDER': str(tmp_path), 'ITEM_REQUEST_DELAY': 0})
+    return config
+
+
+def test_resume_skips_checkpointed_items(app, pipeline_config, monkeypatch):
+    """测试从检查点续传时只获取剩余商品"""
+    task_id = 'resume-task'
+    checkpoint_service = CheckpointService(pipeline_config)
+    checkpoint_service.save_item_ids(task_id, ['1', '2', '3'])
+    with checkpoint_service.open_writer(task_id) as writer:
+        writer('1', {'ItemID': '1', 'Title': 'Item 1', 'Currency': 'USD', 'ItemSpecifics': {}})
+    
+    requested = []
+    
+    def fake_get_item(self, item_id, auth_token):
+        requested.append(item_id)
+        return _get_item_xml(item_id)
+    
+    monkeypatch.setattr(XMLService, '_get_item_details_with_curl', fake_get_item)
+    
+    progress_manager.start_task(task_id)
+    tasks._process_enhanced_csv_async(task_id, {'access_token': 'token'}, pipeline_config)
+    
+    progress = progress_manager.get_progress(task_id)
+    assert progress.status == TaskStatus.COMPLETED
+    assert sorted(requested) == ['2', '3']
+    assert progress.total_items == 3
+    
+    with open(CSVService(pipeline_config).get_temp_file_path(task_id), encoding='utf-8-sig') as f:
+        content = f.read()
+    assert 'Item 1' in content and 'Item 2' in content and 'Item 3' in content
+    
+    # 成功后检查点被清除
+    assert checkpoint_service.load_item_ids(task_id) is None
+    progress_manager.cleanup_task(task_id)
+
+
+
+def test_export_workflow_waits_for_report_then_enhances(app, pipeline_config, monkeypatch):
+    """测试服务端编排：报告完成前按退避查询，完成后自动生成CSV"""
+    task_id = 'export-task'
+    pipeline_config.update({'REPORT_POLL_INITIAL_DELAY': 0, 'REPORT_POLL_MAX_DELAY': 0})
+    statuses = iter(['QUEUED', 'IN_PROCESS', 'COMPLETED'])
+    processed = []
+    
+    monkeypatch.setattr(
+        tasks.EbayService, 'get_inventory_task_status',
+        lambda self, access_token, task_id: {'taskId': task_id, 'status': next(statuses)}
+    )
+    monkeypatch.setattr(tasks, '_process_enhanced_csv_async', lambda *args: processed.append(args[0]))
+    
+    progress_manager.start_task(task_id)
+    tasks._run_export_workflow(task_id, {'access_token': 'token'}, pipeline_config)
+    
+    assert processed == [task_id]
+    assert next(statuses, None) is None
+    progress_manager.cleanup_task(task_id)
+
+
+def test_export_workflow_fails_when_report_fails(app, pipeline_config, monkeypatch):
+    """测试库存报告生成失败时作业直接失败"""
+    task_id = 'export-failed-task'
+    pipeline_config.update({'REPORT_POLL_INITIAL_DELAY': 0})
+    monkeypatch.setattr(
+        tasks.EbayService, 'get_inventory_task_status',
+        lambda self, access_token, task_id: {'taskId': task_id, 'status': 'FAILED'}
+    )
+    
+    progress_manager.start_task(task_id)
+    tasks._run_export_workflow(task_id, {'access_token': 'token'}, pipeline_config)
+    
+    progress = progress_manager.get_progress(task_id)
+    assert progress.status == TaskStatus.FAILED
+    assert 'FAILED' in progress.message
+    progress_manager.cleanup_task(task_id)
+
+
+def test_export_endpoint_reports_creation_failure(auth_session, monkeypatch):
+    """测试创建库存报告失败时返回错误"""
+    monkeypatch.setattr(tasks.EbayService, 'create_inventory_task', lambda self, access_token: None)
+    
+    response = auth_session.post('/api/tasks/export')
+    
+    assert response.status_code == 502
+
+
+def test_export_endpoint_fans_out_per_marketplace(auth_session, monkeypatch):
+    """测试多站点导出为每个站点创建独立作业"""
+    launched = []
+    monkeypatch.setattr(
+        tasks.EbayService, 'create_inventory_task',
+        lambda self, access_token: {'taskId': f'task-{self.marketplace.site_code}'}
+    )
+    monkeypatch.setattr(
+        tasks, '_launch_background_job',
+        lambda task_id, token_info, target, **kwargs: launched.append((task_id, kwargs['marketplace_id']))
+    )
+    
+    response = auth_session.post('/api/tasks/export', json={'marketplaces': ['EBAY_US', 'EBAY_GB']})
+    
+    assert response.status_code == 202
+    assert [job['job_id'] for job in response.get_json()['jobs']] == ['task-US', 'task-UK']
+    assert launched == [('task-US', 'EBAY_US'), ('task-UK', 'EBAY_GB')]
+    
+    response = auth_session.post('/api/tasks/export', json={'marketplaces': ['EBAY_XX']})
+    assert response.status_code == 400
+
+
+def test_summary_endpoint_returns_persisted_summary(auth_session):
+    """测试任务结束后可通过摘要API查询阶段耗时"""
+    progress_manager.start_task('summary-task')
+    progress_manager.update_progress('summary-task', TaskStatus.DOWNLOADING)
+    progress_manager.complete_task('summary-task', success=False, message='失敗')
+    
+    response = auth_session.get('/api/tasks/summary/summary-task')
+    
+    assert response.status_code == 200
+    data = response.get_json()['data']
+    assert data['status'] == 'failed'
+    assert [stage['stage'] for stage in data['stages']] == ['pending', 'downloading']
+    assert auth_session.get('/api/tasks/summary/missing-task').status_code == 404
+
+
+def test_progress_batch_returns_304_until_state_changes(app, auth_session, monkeypatch):
+    """测试批量进度接口：ETag未变化时长轮询后返回304，进度变化后返回新数据"""
+    app.config['PROGRESS_LONGPOLL_INTERVAL'] = 0.01
+    progress_manager.start_task('batch-a', total_items=10)
+    progress_manager.start_task('batch-b', total_items=10)
+    
+    response = auth_session.get('/api/tasks/progress-batch?ids=batch-a,batch-b,batch-missing')
+    assert response.status_code == 200
+    body = response.get_json()
+    assert set(body['data']) == {'batch-a', 'batch-b'}
+    assert body['missing'] == ['batch-missing']
+    etag = response.headers['ETag']
+    
+    # 状态不变：挂起wait秒后返回304
+    response = auth_session.get('/api/tasks/progress-batch?ids=batch-a,batch-b,batch-missing&wait=0.05',
+                                headers={'If-None-Match': etag})
+    assert response.status_code == 304
+    assert response.headers['ETag'] == etag
+    
+    # 等待期间进度变化：立即返回新数据
+    sleeps = []
+    
+    def advance(seconds):
+        if not sleeps:
+            progress_manager.update_progress('batch-a', TaskStatus.PROCESSING, current_item=5)
+        sleeps.append(seconds)
+    
+    monkeypatch.setattr(tasks.concurrency, 'sleep', advance)
+    response = auth_session.get('/api/tasks/progress-batch?ids=batch-a,batch-b,batch-missing&wait=5',
+                                headers={'If-None-Match': etag})
+    assert response.status_code == 200
+    assert response.headers['ETag'] != etag
+    assert response.get_json()['data']['batch-a']['current_item'] == 5
+    assert len(sleeps) == 1
+
+
+def test_progress_batch_validates_ids(app, auth_session):
+    """测试批量进度接口的参数校验"""
+    app.config['PROGRESS_BATCH_MAX_TASKS'] = 2
+    
+    assert auth_session.get('/api/tasks/progress-batch').status_code == 400
+    assert auth_session.get('/api/tasks/progress-batch?ids=a,b,c').status_code == 400
+    assert auth_session.get('/api/tasks/progress-batch?ids=a&wait=x').status_code == 400
+    assert auth_session.get('/api/tasks/progress-batch?ids=a,,b').status_code == 400
+    assert auth_session.get('/api/tasks/progress-batch?ids=a,%20').status_code == 400
+    assert auth_session.get('/api/tasks/progress-batch?ids=a,../../secret').status_code == 400
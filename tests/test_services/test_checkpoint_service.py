@@ -0,0 +1,51 @@
+"""
+检查点服务测试
+"""
+import os
+import pytest
+from app.services.checkpoint_service import CheckpointService
+
+
+@pytest.fixture
+def checkpoint_service(tmp_path):
+    """创建使用临时目录的检查点服务"""
+    return CheckpointService({'TEMP_FOLDER': str(tmp_path), 'CHECKPOINT_FLUSH_ITEMS': 2})
+
+
+def test_report_and_item_ids_roundtrip(checkpoint_service):
+    """测试报告和ItemID列表的保存与读取"""
+    assert checkpoint_service.load_report('task-1') is None
+    assert checkpoint_service.load_item_ids('task-1') is None
+    
+    checkpoint_service.save_report('task-1', b'PK\x03\x04zip')
+    checkpoint_service.save_item_ids('task-1', ['1', '2', '3'])
+    
+    assert checkpoint_service.load_report('task-1') == b'PK\x03\x04zip'
+    assert checkpoint_service.load_item_ids('task-1') == ['1', '2', '3']
+
+
+def test_records_appended_and_truncated_line_ignored(checkpoint_service):
+    """测试增量记录写入，中断时写了一半的行被忽略"""
+    with checkpoint_service.open_writer('task-1') as writer:
+        writer('1', {'ItemID': '1', 'ItemSpecifics': {'Brand': 'A'}})
+        writer('2', {'ItemID': '2', 'ItemSpecifics': {}})
+    
+    with open(checkpoint_service._path('task-1', '.records.jsonl'), 'a', encoding='utf-8') as f:
+        f.write('{"item_id": "3", "rec')
+    
+    records = checkpoint_service.load_records('task-1')
+    assert set(records) == {'1', '2'}
+    assert records['1']['ItemSpecifics'] == {'Brand': 'A'}
+
+
+def test_clear_removes_checkpoints(checkpoint_service):
+    """测试清除检查点"""
+    checkpoint_service.save_report('task-1', b'zip')
+    checkpoint_service.save_item_ids('task-1', ['1'])
+    with checkpoint_service.open_writer('task-1') as writer:
+        writer('1', {'ItemID': '1'})
+    
+    checkpoint_service.clear('task-1')
+    
+    for suffix in ('.report.zip', '.items.json', '.records.jsonl'):
+        assert not os.path.exists(checkpoint_service._path('task-1', suffix))
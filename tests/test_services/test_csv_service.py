@@ -131,3 +131,52 @@ def test_get_temp_file_path(csv_service):
     file_path = csv_service.get_temp_file_path(task_id)
     
     assert 'enhanced_csv_test-task-123.csv' in file_path
+
+
+def test_enhanced_csv_matches_dataframe_output(csv_service, sample_item_data):
+    """测试逐行写出的CSV与按行构建DataFrame的结果一致（含ItemRecord输入）"""
+    from app.models.ebay_models import ItemRecord, SpecificNameTable
+    
+    expected = csv_service._create_csv_content(
+        csv_service._convert_to_ebay_template(sample_item_data)
+    ).decode('utf-8-sig')
+    
+    names = SpecificNameTable()
+    records = [ItemRecord.from_dict(item, names) for item in sample_item_data]
+    file_path = csv_service.generate_enhanced_csv(records, 'test-task-records')
+    
+    with open(file_path, 'r', encoding='utf-8-sig') as f:
+        assert f.read() == expected
+    
+    # 名称表在记录间共享
+    assert len(names) == 5
+    assert records[0].get('ItemSpecifics') == sample_item_data[0]['ItemSpecifics']
+    
+    csv_service.cleanup_temp_file(file_path)
+
+
+def test_enhanced_csv_uses_marketplace_site(csv_service, sample_item_data):
+    """测试按站点填写模板名和Listing site列"""
+    file_path = csv_service.generate_enhanced_csv(sample_item_data, 'test-task-uk', 'EBAY_GB')
+    
+    with open(file_path, 'r', encoding='utf-8-sig') as f:
+        lines = f.read().splitlines()
+    
+    assert lines[0].endswith('download_UK')
+    assert lines[2].split(',')[4] == 'UK'
+    
+    csv_service.cleanup_temp_file(file_path)
+
+
+def test_repeat_exports_served_from_cache(csv_service):
+    """测试相同数据的重复导出直接返回缓存"""
+    from app.utils.artifact_cache import artifact_cache
+    listings_data = [{'sku': 'CACHE-001', 'title': 'Cached Item', 'price': 1.5}]
+    hits = artifact_cache.stats()['hits']
+    
+    first = csv_service.generate_excel(listings_data).getvalue()
+    second = csv_service.generate_excel(listings_data).getvalue()
+    
+    assert first == second
+    assert artifact_cache.stats()['hits'] == hits + 1
+    assert csv_service.generate_basic_csv(listings_data).getvalue() != first
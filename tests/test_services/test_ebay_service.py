@@ -0,0 +1,115 @@
+"""
+eBay服务测试
+"""
+import pytest
+from app.services.ebay_service import EbayService
+from app.utils.response_cache import feed_cache
+
+
+def _fake_pages(total, calls):
+    """按offset/limit返回模拟的库存任务分页"""
+    def fetch(self, access_token, date_range, offset=0, limit=200):
+        calls.append(offset)
+        tasks = [{'taskId': f'task-{i}', 'status': 'COMPLETED'}
+                 for i in range(offset, min(offset + limit, total))]
+        page = {'tasks': tasks, 'total': total, 'offset': offset, 'limit': limit}
+        if offset + limit < total:
+            page['next'] = f'?offset={offset + limit}'
+        return page
+    return fetch
+
+
+@pytest.fixture(autouse=True)
+def clear_feed_cache():
+    feed_cache.clear()
+    yield
+    feed_cache.clear()
+
+
+def test_iter_recent_tasks_follows_all_pages(app, monkeypatch):
+    """测试遍历所有分页"""
+    calls = []
+    monkeypatch.setattr(EbayService, '_fetch_inventory_task_page', _fake_pages(5, calls))
+    
+    task_ids = [task['taskId'] for task in EbayService().iter_recent_inventory_tasks('token', page_size=2)]
+    
+    assert task_ids == [f'task-{i}' for i in range(5)]
+    assert calls == [0, 2, 4]
+
+
+def test_get_recent_tasks_collects_pages(app, monkeypatch):
+    """测试获取全部最近任务（不再只返回第一页）"""
+    calls = []
+    monkeypatch.setattr(EbayService, '_fetch_inventory_task_page', _fake_pages(450, calls))
+    
+    result = EbayService().get_recent_inventory_tasks('token', days=7)
+    
+    assert result['total'] == 450
+    assert len(result['tasks']) == 450
+    assert calls == [0, 200, 400]
+
+
+def test_recent_reports_cursor_mode(app, auth_session, monkeypatch):
+    """测试/api/reports/recent的cursor分页模式"""
+    calls = []
+    monkeypatch.setattr(EbayService, '_fetch_inventory_task_page', _fake_pages(5, calls))
+    
+    seen = []
+    cursor = None
+    while True:
+        url = '/api/reports/recent?page_size=2' + (f'&cursor={cursor}' if cursor else '')
+        data = auth_session.get(url).get_json()
+        assert data['total_count'] == 5
+        seen.extend(task['task_id'] for task in data['tasks'])
+        cursor = data['next_cursor']
+        if not cursor:
+            break
+    
+    assert seen == [f'task-{i}' for i in range(5)]
+    
+    response = auth_session.get('/api/reports/recent?cursor=invalid!')
+    assert response.status_code == 400
+
+
+def test_recent_pages_cached_and_invalidated_on_create(app, monkeypatch):
+    """测试同一分钟内的重复查询命中分页缓存，新建任务后分页缓存失效"""
+    calls = []
+    monkeypatch.setattr(EbayService, '_fetch_inventory_task_page', _fake_pages(3, calls))
+    service = EbayService()
+    
+    assert service.recent_date_range(7) == service.recent_date_range(7)
+    list(service.iter_recent_inventory_tasks('token'))
+    list(service.iter_recent_inventory_tasks('token'))
+    assert calls == [0]
+    
+    class Accepted:
+        status_code = 202
+        headers = {'Location': 'https://api.ebay.com/sell/feed/v1/inventory_task/task-new'}
+    
+    monkeypatch.setattr(EbayService, '_send', lambda self, *args, **kwargs: Accepted())
+    assert service.create_inventory_task('token')['taskId'] == 'task-new'
+    list(service.iter_recent_inventory_tasks('token'))
+    assert calls == [0, 0]
+
+
+def test_recent_tasks_not_cached_when_later_page_fails(app, monkeypatch):
+    """测试第二页获取失败时不返回也不缓存不完整的任务列表"""
+    calls = []
+    fetch = _fake_pages(450, calls)
+    failures = [200]
+    
+    def flaky(self, access_token, date_range, offset=0, limit=200):
+        if offset in failures:
+            failures.remove(offset)
+            calls.append(offset)
+            return None
+        return fetch(self, access_token, date_range, offset, limit)
+    
+    monkeypatch.setattr(EbayService, '_fetch_inventory_task_page', flaky)
+    service = EbayService()
+    
+    assert service.get_recent_inventory_tasks('token', days=7) is None
+    
+    # 失败的页没有被缓存，重试时取得完整列表
+    result = service.get_recent_inventory_tasks('token', days=7)
+    assert result['total'] == 450
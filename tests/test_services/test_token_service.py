@@ -0,0 +1,93 @@
+"""
+令牌管理服务测试
+"""
+import time
+import threading
+from app.services.token_service import AccessToken, TokenManager, is_expired_token_response
+
+
+class _Refresher:
+    """记录调用次数的模拟刷新函数"""
+    
+    def __init__(self, delay=0.0):
+        self.calls = 0
+        self.delay = delay
+    
+    def __call__(self, refresh_token):
+        self.calls += 1
+        time.sleep(self.delay)
+        return {'access_token': f'fresh-{self.calls}', 'expires_in': 7200}
+
+
+def test_token_not_refreshed_before_margin():
+    """测试距离过期较远时不刷新"""
+    refresher = _Refresher()
+    token = AccessToken('old', 'refresh', expires_at=time.time() + 3600,
+                        refresher=refresher, refresh_margin=300)
+    
+    assert token.current() == 'old'
+    assert refresher.calls == 0
+
+
+def test_concurrent_workers_trigger_single_refresh():
+    """测试多个抓取线程同时到达刷新时间时只刷新一次并共享新令牌"""
+    refresher = _Refresher(delay=0.05)
+    token = AccessToken('old', 'refresh', expires_at=time.time() + 60,
+                        refresher=refresher, refresh_margin=300)
+    seen = []
+    
+    threads = [threading.Thread(target=lambda: seen.append(token.current())) for _ in range(8)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    
+    assert refresher.calls == 1
+    assert set(seen) == {'fresh-1'}
+    assert token.expires_at > time.time() + 7000
+
+
+def test_invalidate_forces_refresh_once():
+    """测试令牌被API拒绝时强制刷新，重复上报旧令牌不会再次刷新"""
+    refresher = _Refresher()
+    token = AccessToken('old', 'refresh', expires_at=time.time() + 3600, refresher=refresher)
+    
+    assert token.invalidate('old') == 'fresh-1'
+    assert token.invalidate('old') == 'fresh-1'
+    assert refresher.calls == 1
+
+
+def test_token_without_refresh_token_is_static():
+    """测试调试令牌（无刷新令牌）不会刷新"""
+    token = TokenManager().for_session_token({'access_token': 'debug'}, config={})
+    assert token.current() == 'debug'
+    assert not token.can_refresh
+
+
+def test_expired_token_response_detection():
+    """测试识别Trading API令牌过期错误"""
+    assert is_expired_token_response('<Errors><ErrorCode>21917053</ErrorCode></Errors>')
+    assert not is_expired_token_response('<Ack>Success</Ack>')
+    assert not is_expired_token_response(None)
+
+
+def test_login_required_refreshes_and_writes_back_session_token(client, monkeypatch):
+    """测试请求时临近过期的session令牌被刷新并写回，之后的请求不再刷新"""
+    from app.services.ebay_service import EbayService
+    refresher = _Refresher()
+    monkeypatch.setattr(EbayService, 'refresh_access_token', lambda self, refresh_token: refresher(refresh_token))
+    with client.session_transaction() as sess:
+        sess['ebay_token'] = {
+            'access_token': 'old',
+            'refresh_token': 'session-refresh-token',
+            'token_type': 'Bearer',
+            'expires_at': time.time() + 60
+        }
+    
+    for _ in range(2):
+        assert client.get('/api/tasks/progress-batch?ids=task-1').status_code == 200
+    
+    with client.session_transaction() as sess:
+        assert sess['ebay_token']['access_token'] == 'fresh-1'
+        assert sess['ebay_token']['expires_at'] > time.time() + 3600
+    assert refresher.calls == 1
@@ -0,0 +1,167 @@
+"""
+XML服务测试
+"""
+import time
+import threading
+import pytest
+from app.services.xml_service import XMLService, item_fetch_limiter
+
+
+def _get_item_xml(item_id, currency='USD'):
+    return f'''<?xml version="1.0" encoding="UTF-8"?>
+<GetItemResponse xmlns="urn:ebay:apis:eBLBaseComponents">
+  <Item>
+    <ItemID>{item_id}</ItemID>
+    <Title>Item {item_id}</Title>
+    <SellingStatus><CurrentPrice currencyID="{currency}">9.99</CurrentPrice></SellingStatus>
+  </Item>
+</GetItemResponse>'''
+
+
+class SlowXMLService(XMLService):
+    """每次GetItem调用固定耗时的XMLService"""
+    
+    latency = 0.02
+    
+    def _get_item_details_with_curl(self, item_id, auth_token):
+        time.sleep(self.latency)
+        return _get_item_xml(item_id)
+
+
+@pytest.fixture
+def xml_config():
+    return {
+        'MAX_WORKERS': 2,
+        'TASK_TIMEOUT': 300,
+        'ITEM_REQUEST_DELAY': 0,
+        'FETCH_BUDGET_MARGIN': 0
+    }
+
+
+def test_fetch_without_budget_limit_fetches_all(xml_config):
+    """测试不限时间预算时获取全部商品"""
+    service = SlowXMLService(xml_config)
+    item_ids = [str(i) for i in range(10)]
+    
+    result = service.fetch_item_details(item_ids, 'token', time_budget=0)
+    
+    assert not result.partial
+    assert sorted(item['ItemID'] for item in result.items) == sorted(item_ids)
+
+
+def test_fetch_with_budget_returns_partial_results(xml_config):
+    """测试时间预算用尽时返回已获取的结果和未获取的ItemID"""
+    service = SlowXMLService(xml_config)
+    item_ids = [str(i) for i in range(200)]
+    recorded = []
+    
+    result = service.fetch_item_details(
+        item_ids, 'token', time_budget=0.1,
+        item_callback=lambda item_id, item: recorded.append(item_id)
+    )
+    
+    assert result.partial
+    assert result.items
+    fetched = {item['ItemID'] for item in result.items}
+    # 已获取与未获取的ItemID互不重叠且覆盖全部
+    assert fetched.isdisjoint(result.unfetched_item_ids)
+    assert fetched | set(result.unfetched_item_ids) == set(item_ids)
+    assert sorted(recorded) == sorted(fetched)
+
+
+def test_concurrent_jobs_share_fetch_limit(xml_config):
+    """测试多个作业（如多站点导出）同时抓取时，GetItem总并发不超过进程级上限"""
+    in_flight = []
+    peak = []
+    guard = threading.Lock()
+    
+    class CountingService(XMLService):
+        def _get_item_details_with_curl(self, item_id, auth_token):
+            with guard:
+                in_flight.append(item_id)
+                peak.append(len(in_flight))
+            time.sleep(0.01)
+            with guard:
+                in_flight.remove(item_id)
+            return _get_item_xml(item_id)
+    
+    xml_config['MAX_WORKERS'] = 4
+    item_fetch_limiter.configure(3)
+    try:
+        jobs = [
+            threading.Thread(target=CountingService(xml_config, marketplace_id).fetch_item_details,
+                             args=([f'{marketplace_id}-{i}' for i in range(20)], 'token'),
+                             kwargs={'time_budget': 0})
+            for marketplace_id in ('EBAY_US', 'EBAY_GB', 'EBAY_DE')
+        ]
+        for job in jobs:
+            job.start()
+        for job in jobs:
+            job.join(5)
+    finally:
+        item_fetch_limiter.configure(8)
+    
+    assert len(peak) == 60
+    assert max(peak) <= 3
+
+
+def test_batch_skips_non_usd_items(xml_config):
+    """测试只返回USD商品"""
+    class MixedCurrencyService(XMLService):
+        def _get_item_details_with_curl(self, item_id, auth_token):
+            return _get_item_xml(item_id, 'USD' if item_id == '1' else 'GBP')
+    
+    items = MixedCurrencyService(xml_config).get_item_details_batch(['1', '2'], 'token')
+    assert [item['ItemID'] for item in items] == ['1']
+    
+    # 英国站只输出GBP商品
+    items = MixedCurrencyService(xml_config, 'EBAY_GB').get_item_details_batch(['1', '2'], 'token')
+    assert [item['ItemID'] for item in items] == ['2']
+
+
+def test_parse_shares_specific_names(xml_config):
+    """测试解析结果为紧凑记录，且Item Specifics名称在任务内共享"""
+    service = XMLService(xml_config)
+    xml = '''<?xml version="1.0" encoding="UTF-8"?>
+<GetItemResponse xmlns="urn:ebay:apis:eBLBaseComponents">
+  <Item>
+    <ItemID>{item_id}</ItemID>
+    <SellingStatus><CurrentPrice currencyID="USD">1.00</CurrentPrice></SellingStatus>
+    <PrimaryCategory><CategoryID>1</CategoryID><CategoryName>Toys</CategoryName></PrimaryCategory>
+    <ItemSpecifics>
+      <NameValueList><Name>Brand</Name><Value>Acme</Value></NameValueList>
+      <NameValueList><Name>Color</Name><Value>{item_id}</Value></NameValueList>
+    </ItemSpecifics>
+  </Item>
+</GetItemResponse>'''
+    
+    first = service._parse_get_item_response(xml.format(item_id='1'))
+    second = service._parse_get_item_response(xml.format(item_id='2'))
+    
+    assert first.get('CategoryName') == 'Toys'
+    assert second.get('ItemSpecifics') == {'Brand': 'Acme', 'Color': '2'}
+    assert first.names is second.names
+    assert service.specific_names.names == ['Brand', 'Color']
+    assert not hasattr(first, '__dict__')
+
+
+def test_parse_skips_specific_with_empty_name(xml_config):
+    """测试空的Item Specifics名称只跳过该项，商品本身仍被解析"""
+    service = XMLService(xml_config)
+    xml = '''<?xml version="1.0" encoding="UTF-8"?>
+<GetItemResponse xmlns="urn:ebay:apis:eBLBaseComponents">
+  <Item>
+    <ItemID>1</ItemID>
+    <SellingStatus><CurrentPrice currencyID="USD">1.00</CurrentPrice></SellingStatus>
+    <ItemSpecifics>
+      <NameValueList><Name/><Value>orphan</Value></NameValueList>
+      <NameValueList><Name>Brand</Name><Value>Acme</Value></NameValueList>
+    </ItemSpecifics>
+  </Item>
+</GetItemResponse>'''
+    
+    record = service._parse_get_item_response(xml)
+    
+    assert record is not None
+    assert record.get('ItemID') == '1'
+    assert record.get('ItemSpecifics') == {'Brand': 'Acme'}
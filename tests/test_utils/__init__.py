@@ -0,0 +1,3 @@
+"""
+工具层测试
+"""
@@ -0,0 +1,29 @@
+"""
+导出文件缓存测试
+"""
+from app.utils.artifact_cache import ArtifactCache, fingerprint
+
+
+def test_fingerprint_depends_on_data_and_options():
+    """测试指纹随数据和格式选项变化，与字典键顺序无关"""
+    rows = [{'sku': 'A', 'price': 1.0}]
+    
+    assert fingerprint('csv', rows) == fingerprint('csv', [{'price': 1.0, 'sku': 'A'}])
+    assert fingerprint('csv', rows) != fingerprint('xlsx', rows)
+    assert fingerprint('csv', rows) != fingerprint('csv', rows, encoding='utf-8')
+    assert fingerprint('csv', rows) != fingerprint('csv', [{'sku': 'A', 'price': 2.0}])
+
+
+def test_size_bounded_lru_eviction():
+    """测试超过总字节上限时淘汰最久未使用的条目"""
+    cache = ArtifactCache(max_bytes=10)
+    cache.put('a', b'12345')
+    cache.put('b', b'12345')
+    assert cache.get('a') == b'12345'
+    
+    cache.put('c', b'12345')
+    
+    assert cache.get('b') is None
+    assert cache.get('a') == b'12345'
+    assert cache.stats()['evictions'] == 1
+    assert not cache.put('huge', b'x' * 11)
@@ -0,0 +1,47 @@
+"""
+响应压缩测试
+"""
+import gzip
+from flask import Response, jsonify
+from app.utils.compression import ResponseCompressor
+
+
+def test_compresses_large_json_and_weakens_etag(app):
+    """测试超过阈值的JSON按Accept-Encoding压缩，强ETag改为弱ETag"""
+    compressor = ResponseCompressor(min_size=100)
+    payload = {'items': ['x' * 20] * 50}
+    
+    with app.test_request_context(headers={'Accept-Encoding': 'gzip'}):
+        response = jsonify(payload)
+        response.set_etag('abc')
+        response = compressor.compress(response)
+    
+    assert response.headers['Content-Encoding'] == 'gzip'
+    assert 'Accept-Encoding' in response.vary
+    assert response.get_etag() == ('abc', True)
+    assert gzip.decompress(response.get_data()) == jsonify(payload).get_data()
+    assert int(response.headers['Content-Length']) == len(response.get_data())
+
+
+def test_skips_small_streamed_and_unaccepted_responses(app):
+    """测试小响应、流式响应和不接受压缩的客户端保持原样"""
+    compressor = ResponseCompressor(min_size=100)
+    
+    with app.test_request_context(headers={'Accept-Encoding': 'gzip'}):
+        small = compressor.compress(jsonify({'ok': True}))
+        stream = compressor.compress(Response(iter(['data: x\n\n'] * 100), mimetype='text/event-stream'))
+        binary = compressor.compress(Response(b'x' * 1000, mimetype='application/zip'))
+    with app.test_request_context(headers={'Accept-Encoding': 'identity'}):
+        identity = compressor.compress(Response(b'x' * 1000, mimetype='text/html'))
+    
+    for response in (small, stream, binary, identity):
+        assert 'Content-Encoding' not in response.headers
+    assert 'Accept-Encoding' in identity.vary
+
+
+def test_app_responses_are_compressed(auth_session):
+    """测试应用注册的钩子压缩仪表盘HTML"""
+    response = auth_session.get('/', headers={'Accept-Encoding': 'gzip'})
+    
+    assert response.headers['Content-Encoding'] == 'gzip'
+    assert b'app.js' in gzip.decompress(response.data)
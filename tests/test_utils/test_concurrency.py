@@ -0,0 +1,106 @@
+"""
+并发后端测试 - 各后端的抓取吞吐量和抓取期间的请求延迟
+"""
+import time
+import pytest
+from app.services.xml_service import XMLService
+from app.utils.concurrency import concurrency, detect_backend
+from app.utils.progress_manager import ProgressManager
+
+ITEM_LATENCY = 0.05
+
+
+def _get_item_xml(item_id):
+    return f'''<?xml version="1.0" encoding="UTF-8"?>
+<GetItemResponse xmlns="urn:ebay:apis:eBLBaseComponents">
+  <Item>
+    <ItemID>{item_id}</ItemID>
+    <SellingStatus><CurrentPrice currencyID="USD">9.99</CurrentPrice></SellingStatus>
+  </Item>
+</GetItemResponse>'''
+
+
+class BackendXMLService(XMLService):
+    """GetItem调用通过并发后端等待固定时间（模拟网络I/O）"""
+    
+    def _get_item_details_with_curl(self, item_id, auth_token):
+        concurrency.sleep(ITEM_LATENCY)
+        return _get_item_xml(item_id)
+
+
+@pytest.fixture(params=['thread', 'gevent', 'asyncio'])
+def backend(request):
+    if request.param == 'gevent':
+        pytest.importorskip('gevent')
+    concurrency.configure(request.param)
+    yield request.param
+    concurrency.configure('auto')
+
+
+@pytest.fixture
+def service():
+    return BackendXMLService({'MAX_WORKERS': 10, 'TASK_TIMEOUT': 300, 'ITEM_REQUEST_DELAY': 0})
+
+
+def test_fetch_throughput(backend, service):
+    """测试各后端按并发数并行抓取（40件×50ms，10并发约0.2秒，串行需2秒）"""
+    item_ids = [str(i) for i in range(40)]
+    
+    start = time.perf_counter()
+    result = service.fetch_item_details(item_ids, 'token', time_budget=0)
+    elapsed = time.perf_counter() - start
+    
+    assert concurrency.name == backend
+    assert len(result.items) == 40
+    assert elapsed < 1.0
+
+
+def test_request_latency_during_background_fetch(backend, service):
+    """测试后台作业抓取期间，进度查询等短请求不被阻塞"""
+    manager = ProgressManager()
+    manager.start_task('job', total_items=100)
+    finished = []
+    
+    def job():
+        service.fetch_item_details(
+            [str(i) for i in range(100)], 'token', time_budget=0,
+            progress_callback=lambda completed, total: manager.set_current_item('job', completed)
+        )
+        finished.append(True)
+    
+    handle = concurrency.spawn(job)
+    latencies = []
+    for _ in range(5):
+        start = time.perf_counter()
+        concurrency.sleep(0.01)
+        manager.get_progress('job').to_dict()
+        latencies.append(time.perf_counter() - start)
+    handle.join(5)
+    
+    assert finished
+    assert max(latencies) < 0.1
+    assert manager.get_progress('job').current_item == 100
+
+
+def test_auto_uses_threads_without_gevent_patching():
+    """测试未打gevent补丁的进程中auto选择线程后端"""
+    assert detect_backend() == 'thread'
+    with pytest.raises(ValueError):
+        concurrency.configure('fibers')
+
+
+def test_cached_lock_follows_backend_switch():
+    """测试切换后端后ProgressManager的锁按新后端重新创建"""
+    pytest.importorskip('gevent')
+    manager = ProgressManager()
+    concurrency.configure('gevent')
+    try:
+        gevent_lock = manager._lock
+        assert type(gevent_lock).__module__.startswith('gevent')
+    finally:
+        concurrency.configure('thread')
+    try:
+        assert manager._lock is not gevent_lock
+        assert not type(manager._lock).__module__.startswith('gevent')
+    finally:
+        concurrency.configure('auto')
@@ -0,0 +1,56 @@
+"""
+共享HTTP连接池测试
+"""
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+import pytest
+from app.services.ebay_service import EbayService
+from app.utils.http_pool import SharedHTTPPool, http_pool
+
+
+class _KeepAliveHandler(BaseHTTPRequestHandler):
+    protocol_version = 'HTTP/1.1'
+    
+    def do_GET(self):
+        body = b'{"ok": true}'
+        self.send_response(200)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+    
+    def log_message(self, format, *args):
+        pass
+
+
+@pytest.fixture
+def local_server():
+    server = ThreadingHTTPServer(('127.0.0.1', 0), _KeepAliveHandler)
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    yield f'http://127.0.0.1:{server.server_address[1]}'
+    server.shutdown()
+    server.server_close()
+
+
+def test_connections_reused_across_requests(local_server):
+    """测试多次请求复用同一连接并统计复用次数"""
+    pool = SharedHTTPPool()
+    pool.configure({'HTTP_CONNECT_TIMEOUT': 2, 'HTTP_READ_TIMEOUT': 2})
+    session = pool.get_session()
+    
+    for _ in range(5):
+        assert session.get(f'{local_server}/ping').status_code == 200
+    
+    stats = pool.stats()
+    assert stats['requests'] == 5
+    assert stats['connections_opened'] == 1
+    assert stats['connections_reused'] == 4
+    assert session.default_timeout == (2, 2)
+    pool.close()
+
+
+def test_ebay_services_share_session(app):
+    """测试所有EbayService实例共享同一会话"""
+    assert EbayService().ssl_session is EbayService(app.config).ssl_session
+    assert EbayService().ssl_session is http_pool.get_session()
@@ -0,0 +1,27 @@
+"""
+任务摘要测试
+"""
+from app.utils.job_summary import JobSummaryStore
+from app.utils.progress_manager import ProgressManager, TaskStatus
+
+
+def test_summary_written_when_task_finishes(tmp_path):
+    """测试任务结束时写入摘要，运行中不写入"""
+    manager = ProgressManager()
+    store = JobSummaryStore(str(tmp_path))
+    manager.add_listener(store._on_progress)
+    
+    manager.start_task('task-1', total_items=10)
+    manager.update_progress('task-1', TaskStatus.PROCESSING, current_item=0)
+    manager.set_current_item('task-1', 10)
+    assert store.load('task-1') is None
+    
+    manager.complete_task('task-1', success=True, message='完了')
+    
+    summary = store.load('task-1')
+    assert summary['status'] == 'completed'
+    assert summary['processed_items'] == 10
+    assert summary['message'] == '完了'
+    assert [stage['stage'] for stage in summary['stages']] == ['pending', 'processing']
+    assert all(stage['ended_at'] is not None for stage in summary['stages'])
+
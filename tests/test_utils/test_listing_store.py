@@ -0,0 +1,48 @@
+"""
+服务端商品数据存储测试
+"""
+import os
+import time
+from app.utils.listing_store import ListingStore
+
+
+def test_put_and_get_across_processes(tmp_path):
+    """测试数据写入磁盘，其他进程（新实例）也能读取"""
+    store = ListingStore(str(tmp_path))
+    key = store.put([{'sku': 'A-1', 'price': 9.99}])
+    
+    assert store.get(key) == [{'sku': 'A-1', 'price': 9.99}]
+    assert ListingStore(str(tmp_path)).get(key) == [{'sku': 'A-1', 'price': 9.99}]
+
+
+def test_invalid_or_unknown_keys(tmp_path):
+    """测试非法键（路径穿越等）和不存在的键返回None"""
+    store = ListingStore(str(tmp_path))
+    assert store.get('../../etc/passwd') is None
+    assert store.get('a' * 22) is None
+
+
+def test_expired_entries_removed(tmp_path):
+    """测试超过TTL的条目不可读取并被删除"""
+    store = ListingStore(str(tmp_path), ttl=60)
+    key = store.put([{'sku': 'A-1'}])
+    old = time.time() - 120
+    os.utime(os.path.join(str(tmp_path), f'{key}.json'), (old, old))
+    
+    assert ListingStore(str(tmp_path), ttl=60).get(key) is None
+    assert not os.path.exists(os.path.join(str(tmp_path), f'{key}.json'))
+
+
+def test_memory_and_disk_limits(tmp_path):
+    """测试内存缓存按LRU淘汰，磁盘超过上限时删除最旧条目"""
+    rows = [{'sku': f'SKU-{i}', 'title': 'x' * 100} for i in range(10)]
+    store = ListingStore(str(tmp_path), max_memory_bytes=2000, max_disk_bytes=2000)
+    
+    first = store.put(rows)
+    old = time.time() - 10
+    os.utime(os.path.join(str(tmp_path), f'{first}.json'), (old, old))
+    second = store.put(rows)
+    
+    assert store.stats()['memory_entries'] == 1
+    assert store.get(first) is None
+    assert store.get(second) == rows
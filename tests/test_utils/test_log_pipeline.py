@@ -0,0 +1,78 @@
+"""
+异步日志管道测试
+"""
+import os
+import time
+import queue
+import logging
+import threading
+from flask import Flask
+from app.utils.log_pipeline import LogPipeline, RateLimitFilter
+
+
+def _record(msg, *args):
+    return logging.LogRecord('app.test.items', logging.ERROR, __file__, 1, msg, args, None)
+
+
+def test_rate_limit_filter_suppresses_repeated_templates(monkeypatch):
+    """测试同一模板在窗口内超过burst的日志被省略，下一窗口附带省略条数"""
+    now = [100.0]
+    monkeypatch.setattr(time, 'monotonic', lambda: now[0])
+    log_filter = RateLimitFilter(burst=3, window=10)
+    
+    passed = [log_filter.filter(_record('ItemID %s 获取失败', i)) for i in range(5)]
+    assert passed == [True, True, True, False, False]
+    assert log_filter.filter(_record('其他模板 %s', 1))
+    
+    now[0] += 10
+    record = _record('ItemID %s 获取失败', 99)
+    assert log_filter.filter(record)
+    assert '2条相同日志被省略' in record.getMessage()
+    assert record.getMessage().startswith('ItemID 99 获取失败')
+
+
+def test_pipeline_replaces_handlers_and_writes_in_background(tmp_path):
+    """测试app logger只保留队列handler，日志在后台线程格式化并只写一次"""
+    app = Flask('log-pipeline-test')
+    app.logger.addHandler(logging.StreamHandler())
+    app.config.update(LOG_FILE=str(tmp_path / 'logs' / 'wood.log'), LOG_CONSOLE=False,
+                      LOG_FORMAT='%(levelname)s %(name)s %(message)s', LOG_LEVEL='INFO')
+    pipeline = LogPipeline()
+    pipeline.init_app(app)
+    
+    assert app.logger.handlers == [pipeline.handler]
+    
+    seen = []
+    pipeline.handlers[0].addFilter(lambda record: seen.append((record.msg, record.args)) or True)
+    child = logging.getLogger('log-pipeline-test.items')
+    child.info('ItemID %s 处理完成', '123')
+    child.debug('不输出 %s', 'debug')
+    pipeline.stop()
+    
+    assert (tmp_path / 'logs' / 'wood.log').read_text(encoding='utf-8').splitlines() == [
+        'INFO log-pipeline-test.items ItemID 123 处理完成'
+    ]
+    # 入队时未格式化，模板和参数原样交给后台线程
+    assert seen == [('ItemID %s 处理完成', ('123',))]
+    assert pipeline.stats() == {'queued': 0, 'dropped': 0}
+
+
+def test_dropped_records_counted_from_many_threads():
+    """测试队列满时多个线程丢弃的日志全部计数"""
+    pipeline = LogPipeline()
+    full_queue = queue.Queue(1)
+    full_queue.put_nowait(None)
+    pipeline._queue, pipeline._pid = full_queue, os.getpid()
+    record = _record('ItemID %s 获取失败', 1)
+    
+    def emit():
+        for _ in range(2000):
+            pipeline.handler.enqueue(record)
+    
+    threads = [threading.Thread(target=emit) for _ in range(8)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    
+    assert pipeline.stats()['dropped'] == 16000
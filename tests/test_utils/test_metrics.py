@@ -0,0 +1,84 @@
+"""
+Prometheus指标测试
+"""
+from app.utils.metrics import Counter, Gauge, Histogram, MetricsRegistry, metrics_registry, record_ebay_call
+from app.services.ebay_service import trading_call_outcome
+
+
+def test_histogram_buckets_are_cumulative():
+    """测试直方图按累积分桶输出"""
+    registry = MetricsRegistry()
+    histogram = Histogram('test_seconds', '测试耗时', ['call'], buckets=(0.1, 1.0), registry=registry)
+    
+    for value in (0.05, 0.5, 0.7, 5.0):
+        histogram.observe(value, call='GetItem')
+    
+    text = registry.render()
+    assert '# TYPE test_seconds histogram' in text
+    assert 'test_seconds_bucket{call="GetItem",le="0.1"} 1.0' in text
+    assert 'test_seconds_bucket{call="GetItem",le="1.0"} 3.0' in text
+    assert 'test_seconds_bucket{call="GetItem",le="+Inf"} 4.0' in text
+    assert 'test_seconds_count{call="GetItem"} 4.0' in text
+    assert histogram.get_count(call='GetItem') == 4
+
+
+def test_counter_gauge_and_collectors():
+    """测试计数器、仪表和采集函数的输出"""
+    registry = MetricsRegistry()
+    counter = Counter('test_total', '测试次数', ['outcome'], registry=registry)
+    gauge = Gauge('test_active', '测试活动数', registry=registry)
+    registry.add_collector(lambda: [('test_entries', 'gauge', '条目数', {}, 3)])
+    
+    counter.inc(outcome='throttled')
+    counter.inc(2, outcome='throttled')
+    with gauge.track_inprogress():
+        assert gauge.get() == 1
+    
+    text = registry.render()
+    assert 'test_total{outcome="throttled"} 3.0' in text
+    assert 'test_active 0.0' in text
+    assert 'test_entries 3.0' in text
+
+
+def test_trading_outcome_detects_throttling():
+    """测试Trading API调用频率超限（错误码518）被计为throttled"""
+    throttled = '<GetItemResponse><Ack>Failure</Ack><Errors><ErrorCode>518</ErrorCode></Errors></GetItemResponse>'
+    
+    assert trading_call_outcome('<GetItemResponse><Ack>Success</Ack></GetItemResponse>') == 'success'
+    assert trading_call_outcome(throttled) == 'throttled'
+    assert trading_call_outcome(None) == 'failure'
+
+
+def test_metrics_endpoint(client):
+    """测试 /metrics 返回Prometheus文本格式"""
+    record_ebay_call('trading', 'GetItem', 0.2, 'success')
+    
+    response = client.get('/metrics')
+    
+    assert response.status_code == 200
+    assert response.mimetype == 'text/plain'
+    text = response.get_data(as_text=True)
+    assert 'wood_ebay_request_duration_seconds_bucket{api="trading",call="GetItem",le="0.25"}' in text
+    assert 'wood_feed_cache_entries' in text
+
+
+def test_metrics_endpoint_disabled(client):
+    """测试关闭指标后 /metrics 返回404"""
+    metrics_registry.enabled = False
+    try:
+        assert client.get('/metrics').status_code == 404
+    finally:
+        metrics_registry.enabled = True
+
+
+def test_metrics_endpoint_access_control(app, client):
+    """测试 /metrics 只允许本机、允许网段或持有METRICS_TOKEN的请求"""
+    remote = {'REMOTE_ADDR': '10.0.0.5'}
+    assert client.get('/metrics', environ_base=remote).status_code == 403
+    
+    app.config['METRICS_TOKEN'] = 'scrape-secret'
+    assert client.get('/metrics', environ_base=remote, headers={'Authorization': 'Bearer wrong'}).status_code == 403
+    assert client.get('/metrics', environ_base=remote, headers={'Authorization': 'Bearer scrape-secret'}).status_code == 200
+    
+    app.config['METRICS_ALLOWED_NETWORKS'] = '10.0.0.0/8'
+    assert client.get('/metrics', environ_base=remote).status_code == 200
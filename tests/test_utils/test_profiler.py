@@ -0,0 +1,55 @@
+"""
+任务分析器测试
+"""
+import os
+import pstats
+import threading
+from app.utils.profiler import TaskProfiler, render_collapsed
+
+
+def _busy_wait(stop):
+    while not stop.is_set():
+        stop.wait(0.001)
+
+
+def test_sample_collects_stacks_of_tracked_threads():
+    """测试只采样登记为任务线程的调用栈"""
+    profiler = TaskProfiler()
+    stop = threading.Event()
+    
+    def worker():
+        with profiler.track('task-1'):
+            _busy_wait(stop)
+    
+    thread = threading.Thread(target=worker)
+    thread.start()
+    try:
+        while not profiler.is_tracking('task-1'):
+            stop.wait(0.001)
+        stacks, rounds = profiler.sample('task-1', seconds=0.1, interval=0.005)
+    finally:
+        stop.set()
+        thread.join()
+    
+    assert rounds > 0
+    assert all('_busy_wait (test_profiler.py' in stack for stack in stacks)
+    line = render_collapsed(stacks).splitlines()[0]
+    assert line.rsplit(' ', 1)[1].isdigit()
+    assert not profiler.is_tracking('task-1')
+
+
+def test_cprofile_runs_only_when_armed(tmp_path):
+    """测试标记后的下一次运行启用cProfile，标记只生效一次"""
+    profiler = TaskProfiler(str(tmp_path))
+    
+    with profiler.profile_run('task-1'):
+        sum(range(1000))
+    assert not os.path.exists(profiler.result_path('task-1'))
+    
+    profiler.arm('task-1')
+    with profiler.profile_run('task-1'):
+        sorted(range(1000), reverse=True)
+    
+    stats = pstats.Stats(profiler.result_path('task-1'))
+    assert any(func[2] == "<built-in method builtins.sorted>" for func in stats.stats)
+    assert not os.path.exists(profiler._arm_path('task-1'))
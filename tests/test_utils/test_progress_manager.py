@@ -0,0 +1,130 @@
+"""
+进度管理器测试
+"""
+import time
+import threading
+import pytest
+from app.utils.progress_manager import ProgressManager, TaskStatus
+
+
+@pytest.fixture
+def manager():
+    """创建独立的进度管理器"""
+    manager = ProgressManager()
+    manager.start_task('task-1', total_items=200)
+    return manager
+
+
+def test_message_template_rendered_on_read(manager):
+    """测试消息模板在读取时格式化"""
+    manager.update_progress('task-1', TaskStatus.PROCESSING,
+                            message_template='取得中... ({current_item}/{total_items})')
+    manager.set_current_item('task-1', 42)
+    
+    data = manager.get_progress('task-1').to_dict()
+    assert data['message'] == '取得中... (42/200)'
+    assert data['current_item'] == 42
+    
+    # 普通消息会覆盖模板
+    manager.update_progress('task-1', TaskStatus.GENERATING, message='CSV生成中')
+    assert manager.get_progress('task-1').to_dict()['message'] == 'CSV生成中'
+
+
+def test_reporter_throttles_by_item_count(manager):
+    """测试按数量阈值合并进度更新"""
+    reporter = manager.create_reporter('task-1', min_interval=3600, min_items=50)
+    
+    for completed in range(1, 200):
+        reporter(completed, 200)
+    
+    assert reporter.flush_count == 3
+    assert manager.get_progress('task-1').current_item == 150
+    
+    # 最后一个条目总是立即上报
+    reporter(200, 200)
+    assert manager.get_progress('task-1').current_item == 200
+    assert reporter.flush_count == 4
+
+
+def test_reporter_flushes_after_interval(manager):
+    """测试按时间阈值上报"""
+    reporter = manager.create_reporter('task-1', min_interval=0, min_items=1000)
+    reporter(1, 200)
+    assert manager.get_progress('task-1').current_item == 1
+
+
+def test_set_current_item_unknown_task(manager):
+    """测试未知任务不会报错"""
+    manager.set_current_item('missing', 10)
+    assert manager.get_progress('missing') is None
+
+
+def test_evict_expired_finished_tasks():
+    """测试已完成任务超过保留时间后被清理，运行中任务保留"""
+    manager = ProgressManager(finished_ttl=0, max_tasks=100)
+    manager.start_task('done')
+    manager.start_task('running')
+    manager.complete_task('done', success=True)
+    
+    assert manager.evict_expired() == 1
+    assert manager.get_progress('done') is None
+    assert manager.get_progress('running') is not None
+
+
+def test_evict_oldest_finished_over_limit():
+    """测试超过数量上限时清理最早完成的任务"""
+    manager = ProgressManager(finished_ttl=3600, max_tasks=2)
+    manager.start_task('a')
+    manager.complete_task('a')
+    manager.start_task('b')
+    manager.complete_task('b')
+    manager.start_task('c')
+    
+    assert len(manager) == 2
+    assert manager.get_progress('a') is None
+    assert manager.get_progress('b') is not None
+    assert manager.get_progress('c') is not None
+
+
+def test_stage_timestamps_and_eta(manager, monkeypatch):
+    """测试阶段时间记录、窗口处理速度和剩余时间估算"""
+    clock = iter([100.0, 110.0, 112.0, 120.0, 130.0])
+    monkeypatch.setattr(time, 'time', lambda: next(clock))
+    
+    manager.update_progress('task-1', TaskStatus.DOWNLOADING)
+    manager.update_progress('task-1', TaskStatus.PROCESSING, current_item=0)
+    manager.set_current_item('task-1', 40)
+    
+    progress = manager.get_progress('task-1')
+    assert progress.items_per_second == 20.0
+    assert progress.eta_seconds == 8.0
+    assert [stage['stage'] for stage in progress.stages] == ['pending', 'downloading', 'processing']
+    assert progress.stages[1] == {'stage': 'downloading', 'started_at': 100.0, 'ended_at': 110.0}
+    
+    manager.complete_task('task-1', success=True)
+    data = manager.get_progress('task-1').to_dict()
+    assert data['stages'][-1]['ended_at'] == 120.0
+    assert data['stages'][-1]['duration'] == 10.0
+    assert data['eta_seconds'] is None
+
+
+def test_set_current_item_concurrent_with_stage_changes(manager):
+    """测试抓取线程更新计数的同时切换阶段，速度采样窗口不会被并发修改"""
+    errors = []
+    
+    def report():
+        try:
+            for i in range(20000):
+                manager.set_current_item('task-1', i)
+        except RuntimeError as e:
+            errors.append(e)
+    
+    threads = [threading.Thread(target=report) for _ in range(4)]
+    for thread in threads:
+        thread.start()
+    for i in range(2000):
+        manager.update_progress('task-1', TaskStatus.PROCESSING if i % 2 else TaskStatus.GENERATING, current_item=i)
+    for thread in threads:
+        thread.join()
+    
+    assert not errors
@@ -0,0 +1,67 @@
+"""
+响应缓存测试
+"""
+import time
+import threading
+from app.utils.response_cache import ResponseCache
+
+
+def test_hits_within_ttl():
+    """测试TTL内命中缓存"""
+    cache = ResponseCache()
+    calls = []
+    loader = lambda: calls.append(1) or {'status': 'IN_PROCESS'}
+    
+    assert cache.get_or_load('k', loader, 60) == {'status': 'IN_PROCESS'}
+    assert cache.get_or_load('k', loader, 60) == {'status': 'IN_PROCESS'}
+    assert len(calls) == 1
+    assert cache.stats()['hits'] == 1
+
+
+def test_ttl_depends_on_result_and_failures_not_cached():
+    """测试按结果决定TTL，失败结果（None）不缓存"""
+    cache = ResponseCache()
+    ttl = lambda result: 3600 if result['status'] == 'COMPLETED' else 0
+    
+    cache.get_or_load('running', lambda: {'status': 'IN_PROCESS'}, ttl)
+    cache.get_or_load('done', lambda: {'status': 'COMPLETED'}, ttl)
+    cache.get_or_load('error', lambda: None, ttl)
+    
+    assert cache.stats()['entries'] == 1
+    assert cache.get_or_load('done', lambda: None, ttl) == {'status': 'COMPLETED'}
+
+
+def test_concurrent_identical_calls_coalesced():
+    """测试相同键的并发请求只调用一次loader"""
+    cache = ResponseCache()
+    calls = []
+    
+    def slow_loader():
+        calls.append(1)
+        time.sleep(0.05)
+        return {'tasks': []}
+    
+    results = []
+    threads = [threading.Thread(target=lambda: results.append(cache.get_or_load('k', slow_loader, 10)))
+               for _ in range(6)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    
+    assert len(calls) == 1
+    assert results == [{'tasks': []}] * 6
+    assert cache.stats()['coalesced'] + cache.stats()['hits'] == 5
+
+
+def test_lru_eviction_and_invalidate():
+    """测试超过上限时淘汰最久未使用的条目，以及按条件失效"""
+    cache = ResponseCache(max_entries=2)
+    cache.get_or_load(('recent', 'u1'), lambda: 1, 60)
+    cache.get_or_load(('recent', 'u2'), lambda: 2, 60)
+    cache.get_or_load(('recent', 'u1'), lambda: 0, 60)
+    cache.get_or_load(('status', 'u1'), lambda: 3, 60)
+    
+    assert cache.stats()['evictions'] == 1
+    assert cache.invalidate(lambda key: key[0] == 'recent') == 1
+    assert cache.stats()['entries'] == 1
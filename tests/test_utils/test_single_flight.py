@@ -0,0 +1,101 @@
+"""
+单飞任务去重测试
+"""
+import sys
+from app.utils.progress_manager import ProgressManager, TaskStatus
+from app.utils.single_flight import SingleFlight
+
+
+def test_acquire_is_exclusive_in_process(tmp_path):
+    """测试同一进程内同一任务只能获取一次租约"""
+    flight = SingleFlight(str(tmp_path))
+    lease = flight.acquire('task-1')
+    
+    assert lease is not None
+    assert flight.acquire('task-1') is None
+    assert flight.is_running('task-1')
+    assert flight.acquire('task-2') is not None
+    
+    lease.release()
+    assert not flight.is_running('task-1')
+    assert flight.acquire('task-1') is not None
+
+
+def test_acquire_is_exclusive_across_workers(tmp_path):
+    """测试共享锁目录的两个实例（模拟两个工作进程）互斥"""
+    worker_a = SingleFlight(str(tmp_path))
+    worker_b = SingleFlight(str(tmp_path))
+    
+    lease = worker_a.acquire('task-1')
+    assert lease is not None
+    assert worker_b.acquire('task-1') is None
+    assert worker_b.is_running('task-1')
+    
+    lease.release()
+    assert worker_b.acquire('task-1') is not None
+
+
+def test_progress_snapshot_shared(tmp_path):
+    """测试持有租约的进程发布进度快照"""
+    manager = ProgressManager()
+    leader = SingleFlight(str(tmp_path))
+    follower = SingleFlight(str(tmp_path))
+    manager.add_listener(leader._publish_progress)
+    
+    lease = leader.acquire('task-1')
+    manager.start_task('task-1', total_items=10)
+    manager.update_progress('task-1', TaskStatus.PROCESSING, current_item=4)
+    
+    progress = follower.read_progress('task-1')
+    assert progress.status == TaskStatus.PROCESSING
+    assert progress.current_item == 4
+    
+    manager.complete_task('task-1', message='完了')
+    lease.release()
+    assert follower.read_progress('task-1').status == TaskStatus.COMPLETED
+
+
+def test_count_only_snapshots_are_coalesced(tmp_path):
+    """测试仅计数变化的进度上报按间隔合并写入，状态变化立即写入"""
+    manager = ProgressManager()
+    leader = SingleFlight(str(tmp_path), snapshot_interval=60)
+    follower = SingleFlight(str(tmp_path))
+    manager.add_listener(leader._publish_progress)
+    
+    lease = leader.acquire('task-1')
+    manager.start_task('task-1', total_items=10)
+    manager.update_progress('task-1', TaskStatus.PROCESSING, current_item=1)
+    for i in range(2, 9):
+        manager.set_current_item('task-1', i)
+    assert follower.read_progress('task-1').current_item == 1
+    
+    manager.update_progress('task-1', TaskStatus.GENERATING)
+    assert follower.read_progress('task-1').current_item == 8
+    
+    manager.complete_task('task-1')
+    lease.release()
+    assert follower.read_progress('task-1').status == TaskStatus.COMPLETED
+
+
+def test_get_progress_prefers_newer_snapshot(tmp_path, monkeypatch):
+    """测试本进程只留有旧进度时，返回持有租约的进程发布的较新快照"""
+    old_manager = ProgressManager()
+    old_manager.start_task('task-1', total_items=10)
+    old_manager.complete_task('task-1', success=False)
+    monkeypatch.setattr(sys.modules['app.utils.single_flight'], 'progress_manager', old_manager)
+    
+    leader_manager = ProgressManager()
+    leader = SingleFlight(str(tmp_path))
+    follower = SingleFlight(str(tmp_path))
+    leader_manager.add_listener(leader._publish_progress)
+    
+    assert follower.get_progress('task-1').status == TaskStatus.FAILED
+    
+    lease = leader.acquire('task-1')
+    leader_manager.start_task('task-1', total_items=10)
+    leader_manager.update_progress('task-1', TaskStatus.PROCESSING, current_item=3)
+    
+    progress = follower.get_progress('task-1')
+    assert progress.status == TaskStatus.PROCESSING
+    assert progress.current_item == 3
+    lease.release()
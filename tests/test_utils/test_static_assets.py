@@ -0,0 +1,59 @@
+"""
+静态资源测试
+"""
+import os
+import gzip
+import pytest
+from flask import url_for
+from app.utils.static_assets import build, static_assets
+
+
+@pytest.fixture
+def static_dir(app, tmp_path, monkeypatch):
+    """使用临时静态目录"""
+    (tmp_path / 'app.js').write_text('console.log("hello");\n' * 200)
+    monkeypatch.setattr(static_assets, 'folder', str(tmp_path))
+    return tmp_path
+
+
+def test_static_urls_carry_content_hash(app, static_dir):
+    """测试url_for生成带内容哈希的URL，内容变化后哈希变化"""
+    with app.test_request_context():
+        first = url_for('static', filename='app.js')
+        (static_dir / 'app.js').write_text('console.log("changed");\n')
+        os.utime(static_dir / 'app.js', (1, 1))
+        second = url_for('static', filename='app.js')
+    
+    assert first.startswith('/static/app.js?v=')
+    assert first != second
+
+
+def test_hashed_requests_get_immutable_cache_headers(app, client, static_dir):
+    """测试哈希匹配时返回长期缓存头，否则要求重新验证"""
+    digest = static_assets.asset_hash('app.js')
+    
+    response = client.get(f'/static/app.js?v={digest}')
+    assert response.headers['Cache-Control'] == 'public, max-age=31536000, immutable'
+    response.close()
+    
+    response = client.get('/static/app.js?v=stale')
+    assert response.headers['Cache-Control'] == 'no-cache'
+    response.close()
+
+
+def test_serves_precompressed_file(client, static_dir):
+    """测试构建后的.gz文件按Accept-Encoding直接返回"""
+    assert str(static_dir / 'app.js.gz') in build(str(static_dir))
+    assert build(str(static_dir)) == []
+    
+    response = client.get('/static/app.js', headers={'Accept-Encoding': 'gzip'})
+    assert response.headers['Content-Encoding'] == 'gzip'
+    assert response.mimetype == 'text/javascript'
+    assert gzip.decompress(response.get_data()) == (static_dir / 'app.js').read_bytes()
+    response.close()
+    
+    response = client.get('/static/app.js')
+    assert 'Content-Encoding' not in response.headers
+    response.close()
+    
+    assert client.get('/static/../config.py').status_code == 404
@@ -0,0 +1,84 @@
+"""
+临时文件清理器测试
+"""
+import os
+import time
+import pytest
+from app.utils.progress_manager import progress_manager
+from app.utils.temp_janitor import TempFileJanitor
+
+
+def _make_file(folder, name, size, age):
+    path = os.path.join(folder, name)
+    with open(path, 'wb') as f:
+        f.write(b'x' * size)
+    timestamp = time.time() - age
+    os.utime(path, (timestamp, timestamp))
+    return path
+
+
+@pytest.fixture
+def temp_folder(tmp_path):
+    return str(tmp_path)
+
+
+def test_sweep_removes_expired_files(temp_folder):
+    """测试删除超过保留时间的文件"""
+    old = _make_file(temp_folder, 'enhanced_csv_old.csv', 100, age=7200)
+    fresh = _make_file(temp_folder, 'enhanced_csv_new.csv', 100, age=600)
+    
+    janitor = TempFileJanitor(temp_folder, quota_bytes=10 ** 6, max_age=3600, min_age=60)
+    report = janitor.sweep()
+    
+    assert not os.path.exists(old)
+    assert os.path.exists(fresh)
+    assert report.files_removed == 1
+    assert report.bytes_reclaimed == 100
+    assert report.bytes_remaining == 100
+
+
+def test_sweep_enforces_quota_lru(temp_folder):
+    """测试超出配额时按LRU删除，宽限期内的文件保留"""
+    oldest = _make_file(temp_folder, 'a.csv', 400, age=3000)
+    middle = _make_file(temp_folder, 'b.csv', 400, age=2000)
+    newest = _make_file(temp_folder, 'c.csv', 400, age=10)
+    
+    janitor = TempFileJanitor(temp_folder, quota_bytes=900, max_age=86400, min_age=60)
+    report = janitor.sweep()
+    
+    assert not os.path.exists(oldest)
+    assert os.path.exists(middle)
+    assert os.path.exists(newest)
+    assert report.bytes_reclaimed == 400
+    
+    # 被访问过的文件不应优先删除
+    janitor.quota_bytes = 500
+    TempFileJanitor.touch(middle)
+    os.utime(newest, (time.time() - 120, time.time() - 120))
+    janitor.min_age = 0
+    janitor.sweep()
+    assert os.path.exists(middle)
+    assert not os.path.exists(newest)
+
+
+def test_sweep_keeps_files_of_running_tasks(temp_folder):
+    """测试运行中任务（本进程进度记录或其他进程的锁文件）的检查点不被删除"""
+    local_items = _make_file(temp_folder, 'enhanced_csv_local.items.json', 100, age=7200)
+    local_records = _make_file(temp_folder, 'enhanced_csv_local.records.jsonl', 100, age=7200)
+    remote_records = _make_file(temp_folder, 'enhanced_csv_remote.records.jsonl', 100, age=7200)
+    _make_file(temp_folder, 'enhanced_csv_remote.lock', 0, age=7200)
+    stale = _make_file(temp_folder, 'enhanced_csv_done.records.jsonl', 100, age=7200)
+    
+    progress_manager.start_task('local')
+    try:
+        janitor = TempFileJanitor(temp_folder, quota_bytes=10 ** 6, max_age=3600, min_age=60)
+        report = janitor.sweep()
+    finally:
+        progress_manager.cleanup_task('local')
+    
+    assert os.path.exists(local_items)
+    assert os.path.exists(local_records)
+    assert os.path.exists(remote_records)
+    assert not os.path.exists(stale)
+    assert report.files_removed == 1
+    assert report.bytes_remaining == 300
@@ -0,0 +1,93 @@
+"""
+链路追踪测试
+"""
+import json
+import time
+from app.utils.tracing import Tracer, JsonLinesExporter, OTLPHttpExporter, NOOP_SPAN
+
+
+class ListExporter:
+    def __init__(self):
+        self.spans = []
+    
+    def export(self, spans):
+        self.spans.extend(spans)
+
+
+def _tracer(exporter=None):
+    tracer = Tracer()
+    tracer.exporter = exporter
+    return tracer
+
+
+def test_disabled_tracer_yields_noop_span():
+    """测试未配置导出器时span为空操作"""
+    tracer = _tracer()
+    with tracer.span('job') as span:
+        span.set_attribute('items', 1)
+    assert span is NOOP_SPAN
+
+
+def test_children_share_trace_and_written_as_json_lines(tmp_path):
+    """测试子span继承trace_id并逐行写入JSON"""
+    path = tmp_path / 'traces.jsonl'
+    tracer = _tracer(JsonLinesExporter(str(path)))
+    
+    with tracer.span('job', task_id='task-1') as job:
+        with tracer.span('report.extract') as span:
+            span.set_attribute('item_count', 3)
+    
+    records = [json.loads(line) for line in path.read_text(encoding='utf-8').splitlines()]
+    assert [record['name'] for record in records] == ['report.extract', 'job']
+    assert records[0]['parent_id'] == job.span_id
+    assert records[0]['trace_id'] == records[1]['trace_id']
+    assert records[0]['attributes'] == {'item_count': 3}
+
+
+def test_item_spans_sampled_but_slow_calls_kept():
+    """测试未被采样的逐商品span只在耗时超过阈值时导出（连同子span）"""
+    exporter = ListExporter()
+    tracer = _tracer(exporter)
+    tracer.item_sample_rate = 0
+    tracer.slow_item_seconds = 0.05
+    
+    with tracer.span('items.fetch') as parent:
+        with tracer.item_span('ebay.GetItem', parent=parent, item_id='fast') as fast:
+            with tracer.span('item.parse', parent=fast):
+                pass
+        with tracer.item_span('ebay.GetItem', parent=parent, item_id='slow') as slow:
+            with tracer.span('item.parse', parent=slow):
+                time.sleep(0.06)
+    
+    names = [(span.name, span.attributes.get('item_id')) for span in exporter.spans]
+    assert ('ebay.GetItem', 'fast') not in names
+    assert ('ebay.GetItem', 'slow') in names
+    assert [span.name for span in exporter.spans].count('item.parse') == 1
+
+
+def test_errors_recorded_on_span():
+    """测试异常记录到span状态"""
+    exporter = ListExporter()
+    tracer = _tracer(exporter)
+    try:
+        with tracer.span('report.download'):
+            raise ValueError('boom')
+    except ValueError:
+        pass
+    
+    assert exporter.spans[0].status == 'error'
+    assert 'boom' in exporter.spans[0].attributes['error']
+
+
+def test_otlp_payload_format():
+    """测试OTLP/HTTP JSON格式"""
+    exporter = ListExporter()
+    tracer = _tracer(exporter)
+    with tracer.span('csv.write', rows=10):
+        pass
+    
+    payload = OTLPHttpExporter('http://collector:4318/')._payload(exporter.spans)
+    span = payload['resourceSpans'][0]['scopeSpans'][0]['spans'][0]
+    assert span['name'] == 'csv.write'
+    assert len(span['traceId']) == 32 and len(span['spanId']) == 16
+    assert span['attributes'] == [{'key': 'rows', 'value': {'intValue': '10'}}]